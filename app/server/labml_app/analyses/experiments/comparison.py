@@ -11,7 +11,9 @@ from ...db import run
 
 @Analysis.route('POST', 'compare/metrics/{run_uuid}')
 async def get_comparison_metrics(request: Request, run_uuid: str) -> Any:
-    indicators = (await request.json())['indicators']
+    data = await request.json()
+    indicators = data['indicators']
+    width = data.get('width', None)
 
     r = run.get(run_uuid)
     if r is None:
@@ -25,6 +27,13 @@ async def get_comparison_metrics(request: Request, run_uuid: str) -> Any:
         status_code = 200
 
         track_data = get_metrics_tracking_util(track_data, indicators)
+        if width:
+            lod_data = {s['name']: s for s in ans.get_lod_tracking(indicators,
+                                                                  data.get('start_step', None),
+                                                                  data.get('end_step', None),
+                                                                  int(width))}
+            track_data = [lod_data.get(s['name'], s) for s in track_data]
+
         response = JSONResponse({'series': track_data})
         response.status_code = status_code
 
@@ -8,6 +8,7 @@ from labml_app.enums import INDICATORS
 from ..analysis import Analysis
 from ..series import SeriesModel, Series
 from ..series_collection import SeriesCollection
+from ..series_lod import SeriesLOD
 from labml_app.settings import INDICATOR_LIMIT
 
 
@@ -46,7 +47,7 @@ class MetricsAnalysis(Analysis):
                     new_indicators.add(ind)
                 res[ind] = s
 
-        return self.metrics.track(res)
+        return self.metrics.track(res, keep_lod=True)
 
     def get_tracking(self):
         res = []
@@ -63,6 +64,25 @@ class MetricsAnalysis(Analysis):
 
         return res
 
+    def get_lod_tracking(self, indicators: List[str], start: Optional[float], end: Optional[float],
+                         width: int) -> List[Dict[str, Any]]:
+        res = []
+        for ind in sorted(self.metrics.tracking.keys()):
+            if ind not in indicators:
+                continue
+
+            data = self.metrics.get_lod(ind, start, end, width)
+            if data is None:
+                continue
+
+            series = SeriesLOD.detail(data)
+            series['name'] = ind
+            series['is_summary'] = False
+
+            res.append(series)
+
+        return res
+
     @staticmethod
     def get_or_create(run_uuid: str):
         metrics_key = MetricsIndex.get(run_uuid)
@@ -92,6 +112,7 @@ class MetricsAnalysis(Analysis):
         if metrics_key:
             m: MetricsModel = metrics_key.load()
             MetricsIndex.delete(run_uuid)
+            m.delete_lod()
             m.delete()
 
 
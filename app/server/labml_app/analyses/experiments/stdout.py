@@ -8,7 +8,7 @@ from starlette.responses import JSONResponse
 
 import labml_app.db.run
 from labml_app.analyses.analysis import Analysis
-from labml_app.analyses.logs import Logs, LogPageType
+from labml_app.analyses.logs import Logs, get_logs, search_logs
 
 
 class StdOut(Logs):
@@ -29,12 +29,16 @@ class StdOutIndex(Index['StdOut']):
 async def get_stdout(request: Request, run_uuid: str) -> Any:
     """
         body data: {
-            page: int
+            page: int,
+            start: int,
+            end: int,
+            tail: int
         }
 
         page = -2 means get all logs.
         page = -1 means get last page.
         page = n means get nth page.
+        start and end gives lines in [start, end), and tail gives the last tail lines, instead of pages.
     """
     # get the run
 
@@ -43,7 +47,6 @@ async def get_stdout(request: Request, run_uuid: str) -> Any:
         return JSONResponse(status_code=404, content={'message': 'Run not found'})
 
     json = await request.json()
-    page = json.get('page', LogPageType.LAST.value)
 
     key = StdOutIndex.get(run_uuid)
     std_out: StdOutModel
@@ -55,7 +58,29 @@ async def get_stdout(request: Request, run_uuid: str) -> Any:
     else:
         std_out = key.load()
 
-    return std_out.get_data(page_no=page)
+    return get_logs(std_out, json)
+
+
+@Analysis.route('POST', 'logs/stdout/{run_uuid}/search')
+async def search_std_out(request: Request, run_uuid: str) -> Any:
+    """
+        body data: {
+            query: str,
+            is_regex: bool,
+            context: int,
+            limit: int
+        }
+    """
+    run_uuid = labml_app.db.run.get_main_rank(run_uuid)
+    if run_uuid is None:
+        return JSONResponse(status_code=404, content={'message': 'Run not found'})
+
+    key = StdOutIndex.get(run_uuid)
+    if key is None:
+        return JSONResponse(status_code=404, content={'message': 'Stdout not found'})
+
+    json = await request.json()
+    return search_logs(key.load(), json)
 
 
 @Analysis.route('POST', 'logs/stdout/{run_uuid}/opt')
@@ -1,13 +1,26 @@
+import json
+import re
+import time
+import zlib
+from collections import deque
 from enum import Enum
 
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
 from labml_app.settings import LOG_CHAR_LIMIT
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Iterator, Tuple
 
 from labml_db import Key, Model
 from labml_db.serializer.pickle import PickleSerializer
+from starlette.responses import JSONResponse
 
 from labml_app.analyses.analysis import Analysis
+from labml_app.utils.console import split_console_lines
 
 
 class LogPage:
@@ -22,29 +35,11 @@ class LogPage:
         unmerged = self.logs_unmerged + new_logs
         processed = ''
         if len(new_logs) > 1:
-            processed, unmerged = self._format_output(unmerged)
+            processed, unmerged = split_console_lines(unmerged)
 
         self.logs_unmerged = unmerged
         self.logs += processed
 
-    @staticmethod
-    def _format_output(output: str) -> (str, str):
-        res = []
-        temp = ''
-        for i, c in enumerate(output):
-            if c == '\n':
-                temp += '\n'
-                res.append(temp)
-                temp = ''
-            elif c == '\r' and len(output) > i + 1 and output[i + 1] == '\n':
-                pass
-            elif c == '\r':
-                temp = ''
-            else:
-                temp += c
-
-        return ''.join(res), temp
-
     def get_data(self) -> Dict[str, Any]:
         return {
             'logs': self.logs + self.logs_unmerged,
@@ -59,46 +54,303 @@ class LogPageModel(Model['LogPageModel'], LogPage):
     pass
 
 
+# full pages that are compressed into a chunk
+LOG_CHUNK_PAGES = 64
+# maximum number of lines returned by a range read
+LINES_LIMIT = 10_000
+# maximum number of search results
+SEARCH_LIMIT = 100
+# seconds after which a search stops, and returns the matches found so far
+SEARCH_TIME_LIMIT = 5.
+# maximum length of a search regular expression
+SEARCH_REGEX_MAX_LENGTH = 256
+
+
+def _has_nested_repeat(pattern, in_repeat: bool = False) -> bool:
+    """Whether a parsed regular expression repeats a repeat, which can take exponential time to match"""
+    for op, av in pattern:
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            is_repeat = av[1] > 1
+            if is_repeat and in_repeat:
+                return True
+            if _has_nested_repeat(av[2], in_repeat or is_repeat):
+                return True
+        elif op == sre_constants.SUBPATTERN:
+            if _has_nested_repeat(av[-1], in_repeat):
+                return True
+        elif op == sre_constants.BRANCH:
+            if any(_has_nested_repeat(p, in_repeat) for p in av[1]):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if _has_nested_repeat(av[1], in_repeat):
+                return True
+
+    return False
+
+
+def _split_lines(text: str) -> List[str]:
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+
+    return lines
+
+
+class LogChunk:
+    """
+    Full pages of logs, compressed together.
+
+    Chunks are written once, and are never updated.
+    """
+    data: bytes
+    n_pages: int
+
+    @classmethod
+    def defaults(cls):
+        return dict(data=b'', n_pages=0)
+
+    def set_pages(self, pages: List[str]):
+        self.data = zlib.compress(json.dumps(pages).encode('utf-8'))
+        self.n_pages = len(pages)
+
+    def get_pages(self) -> List[str]:
+        return json.loads(zlib.decompress(self.data).decode('utf-8'))
+
+
+@Analysis.db_model(PickleSerializer, 'log_chunk')
+class LogChunkModel(Model['LogChunkModel'], LogChunk):
+    pass
+
+
 class LogPageType(Enum):
     LAST = -1
     ALL = -2
 
 
 class Logs:
+    """
+    Logs of a run, in pages of ``LOG_CHAR_LIMIT`` characters.
+
+    Only the last page is updated with new logs.
+    Older pages are moved to ``log_chunks`` in groups of ``LOG_CHUNK_PAGES``,
+     so that ``log_pages`` and this model stay small however long the run is.
+    """
+    log_chunks: List[Key['LogChunkModel']]
+    log_chunk_pages: List[int]
+    log_chunk_lines: List[int]
     log_pages: List[Key['LogPageModel']]
     wrap_logs: bool
 
     @classmethod
     def defaults(cls):
         return dict(
+            log_chunks=[],
+            log_chunk_pages=[],
+            log_chunk_lines=[],
             log_pages=[],
             wrap_logs=True
         )
 
+    @property
+    def n_chunked_pages(self) -> int:
+        return sum(self.log_chunk_pages)
+
+    @property
+    def n_pages(self) -> int:
+        return self.n_chunked_pages + len(self.log_pages)
+
+    def _get_chunked_page(self, page_no: int) -> Optional[str]:
+        for key, n_pages in zip(self.log_chunks, self.log_chunk_pages):
+            if page_no < n_pages:
+                return key.load().get_pages()[page_no]
+            page_no -= n_pages
+
+        return None
+
+    def _get_page(self, page_no: int) -> Optional[str]:
+        n_chunked_pages = self.n_chunked_pages
+        if page_no < n_chunked_pages:
+            return self._get_chunked_page(page_no)
+
+        page = self.log_pages[page_no - n_chunked_pages].load()
+        if page is None:
+            # moved to a chunk after this was loaded
+            return None
+
+        return page.logs + page.logs_unmerged
+
     def get_data(self, page_no: int = LogPageType.LAST.value):
         page_dict: Dict[str, str] = {}
+        n_pages = self.n_pages
 
         if page_no == LogPageType.ALL.value:
-            pages: List['LogPage'] = [page.load() for page in self.log_pages]
-            for i, p in enumerate(pages):
-                page_dict[str(i)] = p.logs + p.logs_unmerged
-        elif len(self.log_pages) > page_no >= 0:
-            page = self.log_pages[page_no].load()
-            page_dict[str(page_no)] = page.logs + page.logs_unmerged
-
-        if len(self.log_pages) > 0:  # always include the last page
-            page = self.log_pages[-1].load()
-            page_dict[str(len(self.log_pages) - 1)] = page.logs + page.logs_unmerged
+            i = 0
+            # chunks are loaded one at a time
+            for key in self.log_chunks:
+                for p in key.load().get_pages():
+                    page_dict[str(i)] = p
+                    i += 1
+            pages: List['LogPage'] = LogPageModel.mload([str(k) for k in self.log_pages])
+            for p in pages:
+                if p is not None:
+                    page_dict[str(i)] = p.logs + p.logs_unmerged
+                i += 1
+        elif n_pages > page_no >= 0:
+            page = self._get_page(page_no)
+            if page is not None:
+                page_dict[str(page_no)] = page
+
+        if n_pages > 0:  # always include the last page
+            page = self._get_page(n_pages - 1)
+            if page is not None:
+                page_dict[str(n_pages - 1)] = page
 
         return {
             'pages': page_dict,
-            'page_length': len(self.log_pages),
+            'page_length': n_pages,
+            'wrap_logs': self.wrap_logs,
+        }
+
+    def _get_live_lines(self) -> List[List[str]]:
+        """Lines of each page in ``log_pages``"""
+        pages: List['LogPage'] = LogPageModel.mload([str(k) for k in self.log_pages])
+
+        return [_split_lines(p.logs + p.logs_unmerged) for p in pages if p is not None]
+
+    def _iter_lines(self, live_lines: List[List[str]], start: int = 0) -> Iterator[Tuple[int, List[str]]]:
+        """
+        Lines of each page, with the line number of the first line.
+
+        Chunks before line ``start`` are skipped, and the others are loaded one at a time.
+        """
+        line_no = 0
+        for key, n_lines in zip(self.log_chunks, self.log_chunk_lines):
+            if line_no + n_lines <= start:
+                line_no += n_lines
+                continue
+            for p in key.load().get_pages():
+                lines = _split_lines(p)
+                yield line_no, lines
+                line_no += len(lines)
+
+        for lines in live_lines:
+            yield line_no, lines
+            line_no += len(lines)
+
+    def get_lines(self, start: int = 0, end: Optional[int] = None, *, tail: Optional[int] = None):
+        """
+        Lines in ``[start, end)``, or the last ``tail`` lines.
+
+        At most ``LINES_LIMIT`` lines are returned.
+        """
+        live_lines = self._get_live_lines()
+        n_lines = sum(self.log_chunk_lines) + sum(len(lines) for lines in live_lines)
+
+        if tail is not None:
+            end = n_lines
+            start = n_lines - min(tail, LINES_LIMIT)
+        start = max(0, start)
+        if end is None or end > start + LINES_LIMIT:
+            end = start + LINES_LIMIT
+        end = min(end, n_lines)
+
+        res = []
+        for line_no, lines in self._iter_lines(live_lines, start):
+            if line_no >= end:
+                break
+            res += lines[max(0, start - line_no):end - line_no]
+
+        return {
+            'start': start,
+            'lines': res,
+            'n_lines': n_lines,
             'wrap_logs': self.wrap_logs,
         }
 
+    def search(self, query: str, *, is_regex: bool = False, context: int = 0, limit: int = SEARCH_LIMIT):
+        """
+        Lines that contain ``query``, with ``context`` lines before and after them.
+
+        Pages are searched as a whole first, and are split into lines only if there's a match.
+        Regular expressions are matched line by line, so that a match can't span the whole log,
+         and the search stops after ``SEARCH_TIME_LIMIT`` seconds.
+        Raises ``re.error`` if ``query`` is not a valid, or an unsafe, regular expression.
+        """
+        if is_regex:
+            if len(query) > SEARCH_REGEX_MAX_LENGTH:
+                raise re.error(f'longer than {SEARCH_REGEX_MAX_LENGTH} characters')
+            pattern = re.compile(query)
+            if _has_nested_repeat(sre_parse.parse(query)):
+                raise re.error('nested quantifiers, like (a+)+, are not supported')
+        else:
+            pattern = re.compile(re.escape(query))
+        limit = min(limit, SEARCH_LIMIT)
+        context = max(0, context)
+        start_time = time.time()
+
+        matches = []
+        # matches waiting for lines after them
+        pending = []
+        before = deque(maxlen=context)
+        is_truncated = False
+        for line_no, lines in self._iter_lines(self._get_live_lines()):
+            if time.time() - start_time > SEARCH_TIME_LIMIT:
+                is_truncated = True
+                break
+            if not pending and not is_regex and pattern.search('\n'.join(lines)) is None:
+                if context:
+                    before.extend(lines[-context:])
+                continue
+
+            for i, line in enumerate(lines):
+                for m in pending:
+                    m['after'].append(line)
+                pending = [m for m in pending if len(m['after']) < context]
+
+                if len(matches) < limit and pattern.search(line) is not None:
+                    m = {'line': line_no + i, 'text': line, 'before': list(before), 'after': []}
+                    matches.append(m)
+                    if context:
+                        pending.append(m)
+
+                before.append(line)
+
+            if len(matches) == limit and not pending:
+                # there might be more matches
+                is_truncated = True
+                break
+
+        return {
+            'matches': matches,
+            'is_truncated': is_truncated,
+        }
+
     def update_opt(self, data: Dict[str, Any]):
         self.wrap_logs = data.get('wrap_logs', True)
 
+    def _chunk_pages(self):
+        """Moves full pages to a chunk, when there are ``LOG_CHUNK_PAGES`` of them"""
+        if len(self.log_pages) <= LOG_CHUNK_PAGES:
+            return
+
+        keys = self.log_pages[:LOG_CHUNK_PAGES]
+        pages: List['LogPage'] = LogPageModel.mload([str(k) for k in keys])
+        texts = [p.logs + p.logs_unmerged if p is not None else '' for p in pages]
+        chunk = LogChunkModel()
+        chunk.set_pages(texts)
+        chunk.save()
+
+        self.log_chunks.append(chunk.key)
+        self.log_chunk_pages.append(chunk.n_pages)
+        self.log_chunk_lines.append(sum(len(_split_lines(t)) for t in texts))
+        self.log_pages = self.log_pages[LOG_CHUNK_PAGES:]
+
+        # the pages are deleted only after the chunk and this model are written;
+        #  with ``db.write_back`` the deletes wait for ``db.flush``, and are sent together
+        self.save()
+        for k in keys:
+            k.delete()
+
     def update_logs(self, content: str):
         if len(self.log_pages) == 0:
             page = LogPageModel()
@@ -117,6 +369,7 @@ class Logs:
             page.update_logs(content)
             page.save()
             self.log_pages.append(page.key)
+            self._chunk_pages()
         else:
             page.update_logs(content)
             page.save()
@@ -145,3 +398,49 @@ class Logs:
                 page.update_logs(line)
 
         LogPageModel.msave(loaded_pages)
+
+        while len(self.log_pages) > LOG_CHUNK_PAGES:
+            self._chunk_pages()
+
+
+def _get_int(json: Dict[str, Any], name: str, default: Optional[int] = None) -> Optional[int]:
+    value = json.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f'{name} should be an integer')
+
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} should be an integer')
+
+
+def get_logs(logs: Logs, json: Dict[str, Any]) -> Any:
+    """Response to a request for pages, a range of lines or the last lines"""
+    try:
+        if 'tail' in json:
+            return logs.get_lines(tail=_get_int(json, 'tail'))
+        if 'start' in json:
+            return logs.get_lines(_get_int(json, 'start'), _get_int(json, 'end'))
+
+        return logs.get_data(page_no=_get_int(json, 'page', LogPageType.LAST.value))
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={'message': str(e)})
+
+
+def search_logs(logs: Logs, json: Dict[str, Any]) -> Any:
+    """Response to a search request"""
+    query = json.get('query', None)
+    if not isinstance(query, str) or not query:
+        return JSONResponse(status_code=400, content={'message': 'query should be a string'})
+
+    try:
+        return logs.search(query,
+                           is_regex=bool(json.get('is_regex', False)),
+                           context=_get_int(json, 'context', 0),
+                           limit=_get_int(json, 'limit', SEARCH_LIMIT))
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={'message': str(e)})
+    except re.error as e:
+        return JSONResponse(status_code=400, content={'message': f'Invalid regular expression: {e}'})
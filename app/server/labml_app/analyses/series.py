@@ -1,16 +1,25 @@
 import base64
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 
 import numpy as np
 
+try:
+    import labml_fast_merge
+except ImportError:
+    labml_fast_merge = None
+
 MAX_BUFFER_LENGTH = 1024
+MIN_CAPACITY = 16
+# below this the per call overhead of ``merge_numpy`` is more than the python loop
+NUMPY_MERGE_MIN_LENGTH = 128
 OUTLIER_MARGIN = 0.04
 
 SeriesModel = Dict[str, Union[np.ndarray, List[float], float]]
 
 
-def _remove_old(values, steps, last_steps):
+def _find_old(steps) -> int:
+    """Number of points older than a day from the last step"""
     break_time = datetime.fromtimestamp(steps[-1]) - timedelta(days=1)
 
     left = 0
@@ -23,45 +32,205 @@ def _remove_old(values, steps, last_steps):
             right = m
 
     if datetime.fromtimestamp(steps[left]) < break_time:
-        return values, steps
+        return 0
+
+    return left
+
+
+def _view_of(array: np.ndarray) -> Tuple[np.ndarray, int]:
+    """The buffer ``array`` is a view of, and the offset of ``array`` in it"""
+    base = array.base
+    if (isinstance(base, np.ndarray) and base.ndim == 1 and base.dtype == array.dtype and
+            base.flags.c_contiguous and base.flags.writeable and array.flags.c_contiguous):
+        offset, rem = divmod(array.ctypes.data - base.ctypes.data, array.itemsize)
+        if rem == 0 and 0 <= offset and offset + len(array) <= len(base):
+            return base, offset
+
+    return array, 0
+
+
+def _next_ok(ok: np.ndarray) -> np.ndarray:
+    """Index of the first ``True`` at or after each position; ``len(ok)`` if there is none"""
+    n = len(ok)
+    idx = np.where(ok, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def _first_at_least(last_step: np.ndarray, prev_last_step: np.ndarray, step_gap: float,
+                    lo: np.ndarray) -> np.ndarray:
+    """First index ``j >= lo`` with ``last_step[j] - prev_last_step >= step_gap``"""
+    n = len(last_step)
+    j = np.maximum(np.searchsorted(last_step, prev_last_step + step_gap, 'left'), lo)
+
+    # ``searchsorted`` compares against ``prev_last_step + step_gap``, which can round differently
+    while True:
+        back = (j > lo) & (last_step[np.maximum(j - 1, 0)] - prev_last_step >= step_gap)
+        if back.any():
+            j[back] = np.maximum(np.searchsorted(last_step, last_step[j[back] - 1], 'left'), lo[back])
+            continue
+        forward = (j < n) & (last_step[np.minimum(j, n - 1)] - prev_last_step < step_gap)
+        if forward.any():
+            j[forward] = np.searchsorted(last_step, last_step[j[forward]], 'right')
+            continue
+
+        return j
+
+
+def merge_numpy(values: np.ndarray,
+                last_step: np.ndarray,
+                steps: np.ndarray,
+                step_gap: float,
+                prev_last_step: float,
+                i: int,  # from_step
+                ) -> int:
+    """
+    Vectorized equivalent of ``labml_fast_merge.merge``.
+
+    Expects ``last_step[i:]`` to be sorted.
+    Bucket boundaries are found with ``searchsorted`` and each bucket is reduced with a single
+     ``np.add.reduceat`` of the weights the sequential merge would have applied.
+    """
+    length = len(values)
+    if length - i <= 1:
+        return length
+
+    ls = last_step[i:].copy()
+    n = len(ls)
+
+    # points closer than 1e-3 to the previous point are always merged
+    ok = np.zeros(n, dtype=bool)
+    ok[1:] = ~(ls[1:] - ls[:-1] < 1e-3)
+    next_ok = np.append(_next_ok(ok), n)
+
+    # next bucket start for a bucket starting at ``b``, with the previous bucket ending at ``b - 1``
+    starts = np.arange(1, n)
+    next_start = next_ok[_first_at_least(ls, ls[:-1], step_gap, starts + 1)]
+
+    first = next_ok[_first_at_least(ls, np.array([prev_last_step]), step_gap, np.array([1]))[0]]
+    next_start = [n] + next_start.tolist()
+    bucket_starts = [0]
+    b = first
+    while b < n:
+        bucket_starts.append(b)
+        b = next_start[b]
+    bucket_starts = np.array(bucket_starts)
+    m = len(bucket_starts)
+
+    # last step of the previous bucket, for each point
+    bucket = np.zeros(n, dtype=np.int64)
+    bucket[bucket_starts[1:]] = 1
+    bucket = np.cumsum(bucket)
+    bucket_prev = np.empty(m)
+    bucket_prev[0] = prev_last_step
+    bucket_prev[1:] = ls[bucket_starts[1:] - 1]
+    prev = bucket_prev[bucket]
+
+    # weights of the sequential merge; ``(v * iw + x * jw) / (iw + jw)``
+    is_start = np.zeros(n, dtype=bool)
+    is_start[bucket_starts] = True
+    iw = np.ones(n)
+    jw = np.ones(n)
+    iw[1:] = np.maximum(1., ls[:-1] - prev[1:])
+    jw[1:] = np.maximum(1., ls[1:] - ls[:-1])
+    keep = np.where(is_start, 1., iw / (iw + jw))
+    add = np.where(is_start, 1., jw / (iw + jw))
+
+    # each point is scaled by ``add`` and by ``keep`` of all later points in its bucket
+    log_keep = np.cumsum(np.log(keep))
+    bucket_ends = np.append(bucket_starts[1:], n) - 1
+    weights = add * np.exp(log_keep[bucket_ends][bucket] - log_keep)
+
+    values[i:i + m] = np.add.reduceat(values[i:] * weights, bucket_starts)
+    steps[i:i + m] = np.add.reduceat(steps[i:] * weights, bucket_starts)
+    last_step[i:i + m] = ls[bucket_ends]
+
+    return i + m
 
-    # find index to break
-    break_index = left
 
-    return values[break_index:], steps[break_index:], last_steps[break_index:]
+class Series:
+    """
+    Series of ``step``, ``last_step`` and ``value``, merged to fit ``max_buffer_length``.
 
+    The three columns are views of buffers that double their capacity when full,
+     so that updates append in place, and removing old points only moves ``_start``.
+    Arrays given to ``load`` are shared with the caller, and are copied on the first write,
+     unless the series is loaded as their owner.
+    """
 
-class Series:
-    step: np.ndarray
-    last_step: np.ndarray
-    value: np.ndarray
     step_gap: float
     max_buffer_length: int
     keep_last_24h: bool
+    dirty_from: int
 
     def __init__(self, max_buffer_length: int = None, keep_last_24h: bool = False):
-        self.step = np.array([])
-        self.last_step = np.array([])
-        self.value = np.array([])
+        self._step = np.array([])
+        self._last_step = np.array([])
+        self._value = np.array([])
+        self._start = 0
+        self._size = 0
+        self._sum = 0.
+        # the buffers are shared with the data given to ``load``
+        self._is_shared = False
         self.step_gap = 0
+        self.dirty_from = 0
         self.keep_last_24h = keep_last_24h
         if max_buffer_length:
             self.max_buffer_length = max_buffer_length
         else:
             self.max_buffer_length = MAX_BUFFER_LENGTH
 
-        try:
-            import labml_fast_merge
-            self.labml_fast_merge = labml_fast_merge
+        self.labml_fast_merge = labml_fast_merge
 
-            self._merge = self._merge_new
-        except ImportError:
-            self._merge = self._merge_old
+    @property
+    def step(self) -> np.ndarray:
+        return self._step[self._start:self._start + self._size]
+
+    @property
+    def last_step(self) -> np.ndarray:
+        return self._last_step[self._start:self._start + self._size]
+
+    @property
+    def value(self) -> np.ndarray:
+        return self._value[self._start:self._start + self._size]
 
     @property
     def last_value(self) -> float:
         return self.value[-1]
 
+    def _reserve(self, size: int):
+        """Makes the buffers writable, with room for ``size`` points from ``_start``"""
+        buffers = (self._step, self._last_step, self._value)
+        if not self._is_shared and all(len(b) >= self._start + size for b in buffers):
+            return
+
+        capacity = max(size, 2 * self._size, MIN_CAPACITY)
+        self._step, self._last_step, self._value = [self._grow(b, capacity) for b in buffers]
+        self._start = 0
+        self._is_shared = False
+
+    def _grow(self, buffer: np.ndarray, capacity: int) -> np.ndarray:
+        res = np.empty(capacity)
+        res[:self._size] = buffer[self._start:self._start + self._size]
+
+        return res
+
+    def _append(self, step: np.ndarray, value: np.ndarray):
+        size = self._size + len(value)
+        self._reserve(size)
+
+        start = self._start + self._size
+        end = self._start + size
+        self._step[start:end] = step
+        self._last_step[start:end] = step
+        self._value[start:end] = value
+        self._size = size
+        self._sum += value.sum()
+
+    def _remove_first(self, n: int):
+        self._sum -= self.value[:n].sum()
+        self._start += n
+        self._size -= n
+
     def find_step_gap(self):
         if len(self) > 1:
             return max(1., (self.last_step[1] - self.last_step[0]).item())
@@ -97,27 +266,33 @@ class Series:
             'value': self.value,
             'last_step': self.last_step,
             'step_gap': self.step_gap,
-            'mean': np.mean(self.value),
+            'mean': self._sum / self._size if self._size > 0 else np.nan,
+            'sum': self._sum,
+            'dirty_from': self.dirty_from,
         }
 
     def __len__(self):
-        return len(self.last_step)
+        return self._size
 
     def update(self, step: List[float], value: List[float]) -> None:
-        prev_size = len(self.value)
+        prev_size = len(self)
 
-        value = np.array(value)
-        step = np.array(step)
-        last_step = np.array(step)
+        value = np.array(value, dtype=np.float64)
+        step = np.array(step, dtype=np.float64)
 
         self._remove_nan(value)
 
-        self.value = np.concatenate((self.value, value))
-        self.step = np.concatenate((self.step, step))
-        self.last_step = np.concatenate((self.last_step, last_step))
+        self._append(step, value)
+
+        # points before this index are left untouched by the merge
+        dirty_from = max(0, prev_size - 1)
 
         if self.keep_last_24h:
-            self.value, self.step, self.last_step = _remove_old(self.value, self.step, self.last_step)
+            n_old = _find_old(self.step)
+            if n_old > 0:
+                self._remove_first(n_old)
+                prev_size = max(0, prev_size - n_old)
+                dirty_from = 0
 
         self.step_gap = self.find_step_gap()
 
@@ -126,9 +301,12 @@ class Series:
 
         while len(self) > self.max_buffer_length:
             self.step_gap *= 2
+            dirty_from = 0
             # with monit.section('Merge'):
             self.merge()
 
+        self.dirty_from = min(self.dirty_from, dirty_from)
+
     def _remove_nan(self, values) -> None:
         infin = np.isfinite(values)
         np.bitwise_not(infin, out=infin)
@@ -139,6 +317,15 @@ class Series:
             if infin[i]:
                 values[i] = values[i - 1]
 
+    def _merge(self, values: np.ndarray, last_step: np.ndarray, steps: np.ndarray,
+               prev_last_step: int = 0, i: int = 0):
+        # not a bound method kept on the instance, which would be a reference cycle that keeps
+        #  the buffers alive until the garbage collector runs
+        if self.labml_fast_merge is not None:
+            return self._merge_new(values, last_step, steps, prev_last_step, i)
+        else:
+            return self._merge_numpy(values, last_step, steps, prev_last_step, i)
+
     def _merge_new(self,
                    values: np.ndarray,
                    last_step: np.ndarray,
@@ -148,6 +335,17 @@ class Series:
 
         return self.labml_fast_merge.merge(values, last_step, steps, float(self.step_gap), float(prev_last_step), i)
 
+    def _merge_numpy(self,
+                     values: np.ndarray,
+                     last_step: np.ndarray,
+                     steps: np.ndarray,
+                     prev_last_step: int = 0,
+                     i: int = 0):  # from_step
+        if len(values) - i < NUMPY_MERGE_MIN_LENGTH or np.any(last_step[i + 1:] < last_step[i:-1]):
+            return self._merge_old(values, last_step, steps, prev_last_step, i)
+
+        return merge_numpy(values, last_step, steps, float(self.step_gap), float(prev_last_step), i)
+
     def _merge_old(self,
                    values: np.ndarray,
                    last_step: np.ndarray,
@@ -185,11 +383,10 @@ class Series:
         else:
             prev_last_step = 0
 
-        n = self._merge(self.value, self.last_step, self.step, prev_last_step, from_step)
-
-        self.last_step = self.last_step[:n]
-        self.step = self.step[:n]
-        self.value = self.value[:n]
+        self._reserve(self._size)
+        head = self._sum - self.value[from_step:].sum() if from_step > 0 else 0.
+        self._size = self._merge(self.value, self.last_step, self.step, prev_last_step, from_step)
+        self._sum = head + self.value[from_step:].sum()
 
     def get_extent(self, is_remove_outliers: bool):
         if len(self.value) == 0:
@@ -215,9 +412,30 @@ class Series:
 
         return [values[start], values[end]]
 
-    def load(self, data):
-        self.step = data['step'].copy()
-        self.last_step = data['last_step'].copy()
-        self.value = data['value'].copy()
+    def load(self, data, is_owner: bool = False):
+        """
+        Loads ``data`` without copying the arrays.
+
+        ``is_owner`` should only be set when ``data`` is not used after this;
+         the series then writes to the arrays in place, and appends to the spare capacity
+         of the buffers they are views of (such as the arrays of an earlier ``to_data``).
+        """
+        arrays = [np.asarray(data[c], dtype=np.float64) for c in ('step', 'last_step', 'value')]
+        self._size = len(arrays[2])
+        self._start = 0
+        self._is_shared = not is_owner or not all(a.flags.writeable for a in arrays)
+        if not self._is_shared:
+            views = [_view_of(a) for a in arrays]
+            if len(set(offset for _, offset in views)) == 1:
+                arrays = [b for b, _ in views]
+                self._start = views[0][1]
+        self._step, self._last_step, self._value = arrays
+
+        if 'sum' in data:
+            self._sum = data['sum']
+        else:
+            # saved without the sum
+            self._sum = np.sum(self.value).item()
+        self.dirty_from = data.get('dirty_from', 0)
 
         return self
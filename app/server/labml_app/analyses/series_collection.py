@@ -1,10 +1,14 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from labml_db import Key
 
 from ..analyses.series import SeriesModel, Series
+from ..analyses.series_lod import SeriesLOD, SeriesLODChunkModel
 
 
 class SeriesCollection:
     tracking: Dict[str, SeriesModel]
+    lod: Dict[str, SeriesModel]
     indicators: set
     step: int
     max_buffer_length: int
@@ -12,6 +16,7 @@ class SeriesCollection:
     @classmethod
     def defaults(cls):
         return dict(tracking={},
+                    lod={},
                     step=0,
                     indicators=set(),
                     max_buffer_length=None,
@@ -31,23 +36,65 @@ class SeriesCollection:
 
         return res
 
-    def track(self, data: Dict[str, SeriesModel], keep_last_24h: bool = False) -> int:
+    def track(self, data: Dict[str, SeriesModel], keep_last_24h: bool = False, keep_lod: bool = False) -> int:
+        chunks = []
+        retired = []
         for ind, series in data.items():
             self.step = max(self.step, series['step'][-1])
             self._update_series(ind, series, keep_last_24h)
+            if keep_lod:
+                self._update_lod(ind, series, chunks, retired)
+
+        if chunks:
+            retired_keys = set(retired)
+            SeriesLODChunkModel.msave([c for c in chunks if str(c.key) not in retired_keys])
 
         self.save()
 
+        # deleted after the levels that refer to them are saved;
+        #  with ``db.write_back`` the deletes wait for ``db.flush``, and are sent together
+        for key in retired:
+            Key(key).delete()
+
         return self.step
 
     def _update_series(self, ind: str, series: SeriesModel, keep_last_24h: bool) -> None:
         if ind not in self.tracking:
             self.tracking[ind] = Series(self.max_buffer_length, keep_last_24h).to_data()
 
-        s = Series(self.max_buffer_length, keep_last_24h).load(self.tracking[ind])
+        # the arrays in ``tracking`` are replaced below, so the series can append to them in place
+        s = Series(self.max_buffer_length, keep_last_24h).load(self.tracking[ind], is_owner=True)
         s.update(series['step'], series['value'])
 
         self.tracking[ind] = s.to_data()
 
+    def _lod_levels(self, ind: str) -> List[SeriesModel]:
+        levels = []
+        while f'{ind}/{len(levels)}' in self.lod:
+            levels.append(self.lod[f'{ind}/{len(levels)}'])
+
+        return levels
+
+    def _get_lod(self, ind: str) -> SeriesLOD:
+        model_uuid = str(self.key).split(':', 1)[1]
+        return SeriesLOD(f'{model_uuid}_{ind}').load(self._lod_levels(ind))
+
+    def _update_lod(self, ind: str, series: SeriesModel,
+                    chunks: List[SeriesLODChunkModel], retired: List[str]) -> None:
+        lod = self._get_lod(ind)
+        lod.update(series['step'], series['value'], chunks, retired)
+
+        for level, data in enumerate(lod.levels):
+            self.lod[f'{ind}/{level}'] = data
+
+    def get_lod(self, ind: str, start: Optional[float], end: Optional[float], width: int) -> Optional[Dict[str, Any]]:
+        """Coarsest level of detail of an indicator with at least ``width`` points between ``start`` and ``end``"""
+        return self._get_lod(ind).get(start, end, width)
+
+    def delete_lod(self):
+        for ind in self.tracking:
+            for key in self._get_lod(ind).chunk_keys():
+                Key(key).delete()
+
     def save(self):
         raise NotImplementedError
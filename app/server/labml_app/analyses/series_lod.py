@@ -0,0 +1,302 @@
+import base64
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+from labml_db import Model
+from labml_db.serializer.pickle import PickleSerializer
+
+from .analysis import Analysis
+from .series import SeriesModel
+
+LOD_FACTOR = 4
+LOD_CHUNK_LENGTH = 64
+LOD_MAX_CHUNKS = 32
+COLUMNS = ('step', 'last_step', 'mean', 'min', 'max')
+
+Buckets = Dict[str, np.ndarray]
+
+
+@Analysis.db_model(PickleSerializer, 'series_lod_chunk')
+class SeriesLODChunkModel(Model['SeriesLODChunkModel']):
+    step: np.ndarray
+    last_step: np.ndarray
+    mean: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+
+def _empty_buckets() -> Buckets:
+    return {c: np.array([]) for c in COLUMNS}
+
+
+def _empty_pending() -> Dict[str, float]:
+    return dict(children=0, count=0., step=0., value=0., min=np.inf, max=-np.inf, last_step=0.)
+
+
+def _empty_level() -> SeriesModel:
+    level = _empty_buckets()
+    level.update(n_chunks=0,
+                 first_chunk=0,
+                 pending=_empty_pending(),
+                 dirty_from=0)
+
+    return level
+
+
+def _to_binary(values: np.ndarray) -> str:
+    return base64.b64encode(np.array(values, dtype=np.float32).tobytes()).decode('utf-8')
+
+
+class SeriesLOD:
+    """
+    Level of detail pyramid of a series.
+
+    Level ``k`` has buckets of ``LOD_FACTOR ** k`` points with the mean, min and max of each bucket.
+    Full chunks of ``LOD_CHUNK_LENGTH`` buckets are saved as ``SeriesLODChunkModel``
+     and only the last ``LOD_MAX_CHUNKS`` chunks are kept, except at the top level
+     which always covers the whole series.
+    Buckets of the unfinished chunk of each level (the tail) are kept with the ``SeriesCollection``.
+    """
+
+    levels: List[SeriesModel]
+
+    def __init__(self, chunk_prefix: str):
+        self.chunk_prefix = chunk_prefix
+        self.levels = []
+
+    def load(self, levels: List[SeriesModel]) -> 'SeriesLOD':
+        self.levels = levels
+
+        return self
+
+    def chunk_key(self, level: int, idx: int) -> str:
+        return f'SeriesLODChunkModel:{self.chunk_prefix}_{level}_{idx}'
+
+    def chunk_keys(self) -> List[str]:
+        keys = []
+        for level, lv in enumerate(self.levels):
+            for idx in range(lv['first_chunk'], lv['n_chunks']):
+                keys.append(self.chunk_key(level, idx))
+
+        return keys
+
+    def _length(self, level: int) -> int:
+        lv = self.levels[level]
+        return lv['n_chunks'] * LOD_CHUNK_LENGTH + len(lv['last_step'])
+
+    def update(self, step: List[float], value: List[float],
+               chunks: List[SeriesLODChunkModel], retired: List[str]) -> None:
+        """Adds points, collecting finished chunks to be saved and chunk keys to be deleted"""
+        step = np.asarray(step, dtype=np.float64)
+        value = np.asarray(value, dtype=np.float64)
+        is_finite = np.isfinite(step) & np.isfinite(value)
+        step, value = step[is_finite], value[is_finite]
+
+        if len(self.levels) == 0:
+            self.levels.append(_empty_level())
+
+        buckets = {'step': step, 'last_step': step, 'mean': value, 'min': value, 'max': value}
+        level = 0
+        while len(buckets['last_step']) > 0:
+            lv = self.levels[level]
+            has_parent = level + 1 < len(self.levels)
+            if not has_parent:
+                history = {c: np.concatenate((lv[c], buckets[c])) for c in COLUMNS}
+
+            self._append(level, buckets, chunks, retired)
+
+            if has_parent:
+                buckets = self._group(level + 1, buckets)
+            elif lv['n_chunks'] > 0:
+                # the top level got too long; start a coarser level with everything so far
+                self.levels.append(_empty_level())
+                buckets = self._group(level + 1, history)
+            else:
+                break
+
+            level += 1
+
+    def _append(self, level: int, buckets: Buckets, chunks: List[SeriesLODChunkModel], retired: List[str]):
+        lv = self.levels[level]
+        prev_size = len(lv['last_step'])
+        tail = {c: np.concatenate((lv[c], buckets[c])) for c in COLUMNS}
+
+        n_full = len(tail['last_step']) // LOD_CHUNK_LENGTH * LOD_CHUNK_LENGTH
+        for start in range(0, n_full, LOD_CHUNK_LENGTH):
+            chunk = {c: tail[c][start:start + LOD_CHUNK_LENGTH] for c in COLUMNS}
+            chunks.append(SeriesLODChunkModel(self.chunk_key(level, lv['n_chunks']), **chunk))
+            lv['n_chunks'] += 1
+
+        for c in COLUMNS:
+            lv[c] = tail[c][n_full:]
+        lv['dirty_from'] = 0 if n_full > 0 else min(lv['dirty_from'], prev_size)
+
+        while lv['n_chunks'] - lv['first_chunk'] > LOD_MAX_CHUNKS:
+            retired.append(self.chunk_key(level, lv['first_chunk']))
+            lv['first_chunk'] += 1
+
+    def _group(self, level: int, children: Buckets) -> Buckets:
+        """Groups buckets of ``level - 1`` into full buckets of ``level``"""
+        p = self.levels[level]['pending']
+        weight = LOD_FACTOR ** (level - 1)
+        n = len(children['last_step'])
+
+        first = min(LOD_FACTOR - p['children'], n)
+        self._add_pending(p, children, 0, first, weight)
+
+        buckets = []
+        if p['children'] == LOD_FACTOR:
+            buckets.append(self._pending_bucket(p))
+            self.levels[level]['pending'] = p = _empty_pending()
+
+        end = first + (n - first) // LOD_FACTOR * LOD_FACTOR
+        if end > first:
+            grouped = {c: children[c][first:end].reshape(-1, LOD_FACTOR) for c in COLUMNS}
+            buckets.append({'step': grouped['step'].mean(-1),
+                            'last_step': grouped['last_step'][:, -1],
+                            'mean': grouped['mean'].mean(-1),
+                            'min': grouped['min'].min(-1),
+                            'max': grouped['max'].max(-1),
+                            })
+        self._add_pending(p, children, end, n, weight)
+
+        if not buckets:
+            return _empty_buckets()
+
+        return {c: np.concatenate([b[c] for b in buckets]) for c in COLUMNS}
+
+    @staticmethod
+    def _add_pending(p: Dict[str, float], children: Buckets, start: int, end: int, weight: float):
+        if end <= start:
+            return
+
+        p['children'] += end - start
+        p['count'] += weight * (end - start)
+        p['step'] += weight * children['step'][start:end].sum()
+        p['value'] += weight * children['mean'][start:end].sum()
+        p['min'] = min(p['min'], children['min'][start:end].min())
+        p['max'] = max(p['max'], children['max'][start:end].max())
+        p['last_step'] = children['last_step'][end - 1]
+
+    @staticmethod
+    def _pending_bucket(p: Dict[str, float]) -> Buckets:
+        return {'step': np.array([p['step'] / p['count']]),
+                'last_step': np.array([p['last_step']]),
+                'mean': np.array([p['value'] / p['count']]),
+                'min': np.array([p['min']]),
+                'max': np.array([p['max']]),
+                }
+
+    def _partial(self, level: int) -> Buckets:
+        """Points that are not in a full bucket of ``level`` yet"""
+        partial = _empty_pending()
+        for lv in self.levels[1:level + 1]:
+            p = lv['pending']
+            if p['children'] == 0:
+                continue
+            if partial['count'] == 0:
+                partial['last_step'] = p['last_step']
+            partial['children'] += p['children']
+            partial['count'] += p['count']
+            partial['step'] += p['step']
+            partial['value'] += p['value']
+            partial['min'] = min(partial['min'], p['min'])
+            partial['max'] = max(partial['max'], p['max'])
+
+        if partial['count'] == 0:
+            return _empty_buckets()
+
+        return self._pending_bucket(partial)
+
+    def _refine(self, level: int, a: int, b: int, start: float, end: float):
+        """Narrows down ``[a, b)`` with the tail, which is the only part of a level that is not in chunks"""
+        lv = self.levels[level]
+        saved = lv['n_chunks'] * LOD_CHUNK_LENGTH
+        tail_last_step = lv['last_step']
+
+        t = np.searchsorted(tail_last_step, start, 'left')
+        if t > 0:
+            a = max(a, saved + t)
+        t = np.searchsorted(tail_last_step, end, 'left')
+        if t < len(tail_last_step):
+            b = min(b, saved + t + 1)
+
+        return a, b
+
+    def get(self, start: Optional[float], end: Optional[float], width: int) -> Optional[Dict[str, Any]]:
+        """
+        Buckets of the coarsest level with at least ``width`` buckets between ``start`` and ``end``,
+         or the finest level that still covers ``start``.
+        """
+        if not self.levels:
+            return None
+
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+
+        # ``a`` never overshoots and ``b`` never undershoots the buckets in range
+        level = len(self.levels) - 1
+        a, b = 0, self._length(level)
+        while True:
+            a, b = self._refine(level, a, b, start, end)
+            if level == 0 or b - a >= width:
+                break
+
+            child_a = a * LOD_FACTOR
+            if child_a < self.levels[level - 1]['first_chunk'] * LOD_CHUNK_LENGTH:
+                break
+            b = self._length(level - 1) if b == self._length(level) else b * LOD_FACTOR
+            a = child_a
+            level -= 1
+
+        buckets = self._load(level, a, b)
+        if b == self._length(level):
+            partial = self._partial(level)
+            buckets = {c: np.concatenate((buckets[c], partial[c])) for c in COLUMNS}
+
+        last_step = buckets['last_step']
+        i0 = np.searchsorted(last_step, start, 'left')
+        i1 = min(np.searchsorted(last_step, end, 'left') + 1, len(last_step))
+
+        return {'step': buckets['step'][i0:i1],
+                'last_step': last_step[i0:i1],
+                'value': buckets['mean'][i0:i1],
+                'min': buckets['min'][i0:i1],
+                'max': buckets['max'][i0:i1],
+                'level': level,
+                'factor': LOD_FACTOR ** level,
+                }
+
+    def _load(self, level: int, a: int, b: int) -> Buckets:
+        """Buckets ``[a, b)`` of ``level``"""
+        lv = self.levels[level]
+        saved = lv['n_chunks'] * LOD_CHUNK_LENGTH
+        if a >= saved:
+            return {c: lv[c][a - saved:b - saved] for c in COLUMNS}
+
+        first = a // LOD_CHUNK_LENGTH
+        last = min(b - 1, saved - 1) // LOD_CHUNK_LENGTH
+        chunks = [c for c in SeriesLODChunkModel.mload([self.chunk_key(level, idx)
+                                                        for idx in range(first, last + 1)])
+                  if c is not None]
+        offset = a - first * LOD_CHUNK_LENGTH
+
+        buckets = {}
+        for c in COLUMNS:
+            values = np.concatenate([getattr(chunk, c) for chunk in chunks] + [lv[c]])
+            buckets[c] = values[offset:offset + b - a]
+
+        return buckets
+
+    @staticmethod
+    def detail(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'step': _to_binary(data['step']),
+            'last_step': _to_binary(data['last_step']),
+            'value': _to_binary(data['value']),
+            'min': _to_binary(data['min']),
+            'max': _to_binary(data['max']),
+            'mean': np.mean(data['value']) if len(data['value']) > 0 else 0.,
+            'level': data['level'],
+            'factor': data['factor'],
+        }
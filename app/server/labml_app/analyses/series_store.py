@@ -0,0 +1,126 @@
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+from labml_db.model import ModelDict
+
+from .series import SeriesModel
+from . import series_lod
+
+SEGMENT_LENGTH = 64
+SEGMENT_DTYPE = np.float64
+COLUMNS = ('step', 'last_step', 'value')
+FIELD_COLUMNS = {'tracking': COLUMNS, 'lod': series_lod.COLUMNS}
+
+Segment = Dict[str, Any]
+
+
+def segment_id(model_key: str, field: str, ind: str, idx: int) -> str:
+    return f'{model_key}/{field}/{ind}/{idx}'
+
+
+class SeriesStore:
+    """
+    Columnar layout for the ``tracking`` and ``lod`` of a ``SeriesCollection``.
+
+    Each series is split into fixed length segments of its columns (``FIELD_COLUMNS``)
+     stored as raw arrays, and only the segments from ``dirty_from`` onwards are written on save.
+    The model itself only keeps a small header per series.
+    """
+
+    def __init__(self, segment_length: int = SEGMENT_LENGTH, dtype: np.dtype = SEGMENT_DTYPE):
+        self.segment_length = segment_length
+        self.dtype = np.dtype(dtype)
+
+    def _segment(self, model_key: str, field: str, ind: str, idx: int, series: SeriesModel) -> Segment:
+        start = idx * self.segment_length
+        end = start + self.segment_length
+
+        segment = {'_id': segment_id(model_key, field, ind, idx),
+                   'model_key': model_key,
+                   'field': field,
+                   'ind': ind,
+                   'idx': idx,
+                   'dtype': self.dtype.str,
+                   }
+        for c in FIELD_COLUMNS[field]:
+            segment[c] = np.asarray(series[c][start:end], dtype=self.dtype).tobytes()
+
+        return segment
+
+    def dump(self, model_key: str, data: ModelDict) -> Tuple[ModelDict, List[Segment], List[Tuple[str, str, int]]]:
+        """
+        Returns the model data without the series arrays, the segments that need to be written
+         and ``(field, indicator, number of segments)`` for series whose trailing segments might be stale.
+        """
+        data = data.copy()
+        segments = []
+        trims = []
+        for field, columns in FIELD_COLUMNS.items():
+            series_dict: Dict[str, SeriesModel] = data.get(field, None)
+            if not series_dict:
+                continue
+
+            headers = {}
+            for ind, series in series_dict.items():
+                length = len(series['last_step'])
+                dirty_from = series.get('dirty_from', 0)
+
+                header = {k: v for k, v in series.items() if k not in columns and k != 'dirty_from'}
+                header['length'] = length
+                headers[ind] = header
+
+                n_segments = (length + self.segment_length - 1) // self.segment_length
+                if dirty_from < length:
+                    for idx in range(dirty_from // self.segment_length, n_segments):
+                        segments.append(self._segment(model_key, field, ind, idx, series))
+                if dirty_from == 0:
+                    # a full merge can shrink the series
+                    trims.append((field, ind, n_segments))
+
+            data[field] = headers
+
+        return data, segments, trims
+
+    @staticmethod
+    def mark_clean(data: ModelDict):
+        for field in FIELD_COLUMNS:
+            for series in data.get(field, {}).values():
+                series['dirty_from'] = len(series['last_step'])
+
+    @staticmethod
+    def has_segments(data: ModelDict) -> bool:
+        return any('length' in header for field in FIELD_COLUMNS for header in data.get(field, {}).values())
+
+    def load(self, data: ModelDict, segments: List[Segment]) -> ModelDict:
+        series_segments: Dict[Tuple[str, str], List[Segment]] = {}
+        for s in segments:
+            series_segments.setdefault((s['field'], s['ind']), []).append(s)
+
+        data = data.copy()
+        for field, columns in FIELD_COLUMNS.items():
+            headers = data.get(field, None)
+            if not headers:
+                continue
+
+            res = {}
+            for ind, header in headers.items():
+                if 'length' not in header:  # saved before series were split into segments
+                    res[ind] = header
+                    continue
+
+                length = header['length']
+                n_segments = (length + self.segment_length - 1) // self.segment_length
+                ind_segments = sorted(series_segments.get((field, ind), []), key=lambda s: s['idx'])[:n_segments]
+
+                series = {k: v for k, v in header.items() if k != 'length'}
+                for c in columns:
+                    values = [np.frombuffer(s[c], dtype=s['dtype']) for s in ind_segments]
+                    series[c] = np.concatenate([np.array([])] + values)[:length]
+                series['dirty_from'] = len(series['last_step'])
+
+                res[ind] = series
+
+            data[field] = res
+
+        return data
@@ -1,5 +1,7 @@
 import os
-from typing import List, Type, Optional
+import threading
+from contextlib import contextmanager
+from typing import List, Type, Optional, Tuple, Dict, Set
 import pickle as pkl
 
 from labml_db.model import ModelDict
@@ -7,7 +9,7 @@ from labml_db import Model, Index
 from labml_db.driver.mongo import MongoDbDriver
 from labml_db.index_driver.mongo import MongoIndexDbDriver
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne, DeleteMany
 from pymongo.errors import ConnectionFailure
 
 from .. import settings
@@ -19,11 +21,53 @@ from . import run
 from . import session
 from . import computer
 from .. import analyses
+from ..analyses.series_collection import SeriesCollection
+from ..analyses.series_store import SeriesStore
+from .cache import LRUCache, MISSING
+
+# dumps of models, by model key
+model_cache = LRUCache('models')
+# segments of series collections, by model key
+segment_cache = LRUCache('segments', max_size=1_000)
+# model keys, by index name and index key
+index_cache = LRUCache('indexes')
+
+_write_back = threading.local()
+
+# segments written and trims ``(field, ind, n)`` of a save of a series collection
+SegmentUpdate = Tuple[List[Dict], List[Tuple[str, str, int]]]
+
+
+@contextmanager
+def write_back():
+    """
+    Keeps the models saved by this thread in memory until ``flush``.
+
+    Buffered models are visible to loads from all threads.
+    Models deleted by this thread are deleted after the buffered models are written,
+     so that a model is not deleted before the models that referred to it are updated.
+    """
+    _write_back.enabled = True
+    try:
+        yield
+    finally:
+        _write_back.enabled = False
+
+
+def _is_write_back() -> bool:
+    return getattr(_write_back, 'enabled', False)
 
 
 class MongoPickleDbDriver(MongoDbDriver):
     def __init__(self, model_cls: Type['Model'], db: 'pymongo.mongo_client.database.Database'):
         super().__init__(model_cls, db)
+        self._lock = threading.RLock()
+        # key -> dump of the models saved with ``write_back``
+        self._pending: Dict[str, 'ModelDict'] = {}
+        # keys of the models deleted with ``write_back``
+        self._pending_deletes: Set[str] = set()
+        # incremented on writes, so that a value read before a write is not cached
+        self._generation = 0
 
     @staticmethod
     def _from_dump(data: pkl.BINBYTES) -> 'ModelDict':
@@ -36,24 +80,324 @@ class MongoPickleDbDriver(MongoDbDriver):
     def _to_dump(data: 'ModelDict'):
         return {'data': pkl.dumps(data)}
 
+    def _cache(self, cache: LRUCache, generation: int, keys: List[str], values: list):
+        with self._lock:
+            if generation != self._generation:
+                return
+            for k, v in zip(keys, values):
+                cache.set(k, v)
+
+    def _read(self, keys: List[str]) -> List[Optional['ModelDict']]:
+        """Dumps from the ``write_back`` buffer, the cache or the database"""
+        with self._lock:
+            generation = self._generation
+            dumps = [None if k in self._pending_deletes else self._pending.get(k, MISSING) for k in keys]
+        dumps = [model_cache.get(k) if d is MISSING else d for k, d in zip(keys, dumps)]
+
+        missing = [k for k, d in zip(keys, dumps) if d is MISSING]
+        if not missing:
+            return dumps
+
+        if len(missing) == 1:
+            loaded = [super().load_dict(missing[0])]
+        else:
+            loaded = super().mload_dict(missing)
+        self._cache(model_cache, generation, missing, loaded)
+
+        loaded = iter(loaded)
+
+        return [next(loaded) if d is MISSING else d for d in dumps]
+
+    def _write(self, keys: List[str], dumps: List['ModelDict']):
+        with self._lock:
+            self._generation += 1
+            self._pending_deletes.difference_update(keys)
+            if _is_write_back():
+                self._pending.update(zip(keys, dumps))
+                return
+
+            for k in keys:
+                self._pending.pop(k, None)
+            if len(keys) == 1:
+                super().save_dict(keys[0], dumps[0])
+            elif keys:
+                super().msave_dict(keys, dumps)
+
+            for k, d in zip(keys, dumps):
+                model_cache.set(k, d)
+
     def save_dict(self, key: str, data: 'ModelDict'):
-        data = self._to_dump(data)
-        return super().save_dict(key, data)
+        self._write([key], [self._to_dump(data)])
+
+    def load_dict(self, key: str) -> Optional[ModelDict]:
+        return self._from_dump(self._read([key])[0])
+
+    def mload_dict(self, keys: List[str]) -> List[Optional[ModelDict]]:
+        return [self._from_dump(d) for d in self._read(keys)]
+
+    def msave_dict(self, keys: List[str], data: List[ModelDict]):
+        self._write(keys, [self._to_dump(d) for d in data])
+
+    def delete(self, key: str):
+        with self._lock:
+            self._generation += 1
+            self._pending.pop(key, None)
+            if _is_write_back():
+                self._pending_deletes.add(key)
+                return
+
+            super().delete(key)
+            model_cache.delete(key)
+
+    def flush(self):
+        """Writes the models buffered with ``write_back`` in a single batch"""
+        with self._lock:
+            if not self._pending:
+                return
+
+            keys = list(self._pending.keys())
+            dumps = list(self._pending.values())
+            self._pending = {}
+            MongoDbDriver.msave_dict(self, keys, dumps)
+
+            self._generation += 1
+            for k, d in zip(keys, dumps):
+                model_cache.set(k, d)
+
+    def _delete_many(self, keys: List[str]):
+        self._collection.delete_many({'_id': {'$in': [self._to_obj_id(k) for k in keys]}})
+
+    def flush_deletes(self):
+        """Deletes the models deleted with ``write_back``, with a single request"""
+        with self._lock:
+            if not self._pending_deletes:
+                return
+
+            keys = list(self._pending_deletes)
+            self._pending_deletes = set()
+            self._delete_many(keys)
+
+            self._generation += 1
+            for k in keys:
+                model_cache.delete(k)
+
+
+class MongoSeriesDbDriver(MongoPickleDbDriver):
+    """Keeps the series of a ``SeriesCollection`` as columnar segments in a separate collection"""
+
+    def __init__(self, model_cls: Type['Model'], db: 'pymongo.mongo_client.database.Database'):
+        super().__init__(model_cls, db)
+        self._store = SeriesStore()
+        self._segments = db[f'{self.model_name}_segments']
+        self._segments.create_index('model_key')
+        # key -> segment updates saved with ``write_back``, in order
+        self._pending_segments: Dict[str, List[SegmentUpdate]] = {}
+
+    @staticmethod
+    def _apply_updates(segments: Dict[str, Dict], updates: List['SegmentUpdate']) -> Dict[str, Dict]:
+        for written, trims in updates:
+            segments = {**segments, **{s['_id']: s for s in written}}
+            for field, ind, n in trims:
+                segments = {i: s for i, s in segments.items()
+                            if s['field'] != field or s['ind'] != ind or s['idx'] < n}
+
+        return segments
+
+    @staticmethod
+    def _segment_ops(key: str, updates: List['SegmentUpdate']) -> list:
+        ops = []
+        for written, trims in updates:
+            ops += [ReplaceOne({'_id': s['_id']}, s, True) for s in written]
+            ops += [DeleteMany({'model_key': key, 'field': field, 'ind': ind, 'idx': {'$gte': n}})
+                    for field, ind, n in trims]
+
+        return ops
+
+    def _bulk_write_segments(self, updates: Dict[str, List['SegmentUpdate']]):
+        ops = []
+        for key, u in updates.items():
+            ops += self._segment_ops(key, u)
+        if not ops:
+            return
+
+        # ordered, so that a segment written after a trim is not deleted by it
+        self._segments.bulk_write(ops, True)
+        self._generation += 1
+
+        for key, u in updates.items():
+            cached = segment_cache.peek(key)
+            if cached is not MISSING:
+                segment_cache.set(key, self._apply_updates(cached, u))
+
+    def _write_segments(self, keys: List[str], data: List['ModelDict']) -> List['ModelDict']:
+        """
+        Writes the dirty segments and returns the headers.
+
+        With ``write_back`` the segments are kept with the headers until ``flush``,
+         so that the segments in the database always match the saved headers.
+        """
+        headers = []
+        updates = {}
+        for key, d in zip(keys, data):
+            header, segments, trims = self._store.dump(key, d)
+            headers.append(header)
+            if segments or trims:
+                updates.setdefault(key, []).append((segments, trims))
+
+        with self._lock:
+            self._generation += 1
+            if _is_write_back():
+                for key, u in updates.items():
+                    self._pending_segments.setdefault(key, []).extend(u)
+                return headers
+
+            # segments saved earlier with ``write_back`` are written first
+            for key in keys:
+                if key in self._pending_segments:
+                    updates[key] = self._pending_segments.pop(key) + updates.get(key, [])
+            self._bulk_write_segments(updates)
+
+        return headers
+
+    def _load_segments(self, keys: List[str]) -> Dict[str, List[Dict]]:
+        segments = {}
+        missing = []
+        for k in keys:
+            cached = segment_cache.get(k)
+            if cached is MISSING:
+                missing.append(k)
+            else:
+                segments[k] = cached
+
+        if missing:
+            generation = self._generation
+            loaded = {k: {} for k in missing}
+            for s in self._segments.find({'model_key': {'$in': missing}}):
+                loaded[s['model_key']][s['_id']] = s
+            self._cache(segment_cache, generation, missing, [loaded[k] for k in missing])
+            segments.update(loaded)
+
+        with self._lock:
+            pending = {k: list(self._pending_segments[k]) for k in keys if k in self._pending_segments}
+        for k, u in pending.items():
+            segments[k] = self._apply_updates(segments[k], u)
+
+        return {k: list(s.values()) for k, s in segments.items()}
+
+    def flush(self):
+        """Writes the segments buffered with ``write_back``, and then the headers"""
+        with self._lock:
+            updates = self._pending_segments
+            self._pending_segments = {}
+            self._bulk_write_segments(updates)
+
+            super().flush()
+
+    def save_dict(self, key: str, data: 'ModelDict'):
+        header = self._write_segments([key], [data])[0]
+
+        res = super().save_dict(key, header)
+        self._store.mark_clean(data)
+
+        return res
 
     def load_dict(self, key: str) -> Optional[ModelDict]:
         data = super().load_dict(key)
+        if data is None or not self._store.has_segments(data):
+            return data
 
-        return self._from_dump(data)
+        return self._store.load(data, self._load_segments([key])[key])
 
     def mload_dict(self, keys: List[str]) -> List[Optional[ModelDict]]:
         data = super().mload_dict(keys)
+        segment_keys = [k for k, d in zip(keys, data) if d is not None and self._store.has_segments(d)]
+        if not segment_keys:
+            return data
+
+        segments = self._load_segments(segment_keys)
 
-        return [self._from_dump(d) for d in data]
+        return [self._store.load(d, segments.get(k, [])) if d is not None else None
+                for k, d in zip(keys, data)]
 
     def msave_dict(self, keys: List[str], data: List[ModelDict]):
-        data = [self._to_dump(d) for d in data]
+        headers = self._write_segments(keys, data)
+
+        res = super().msave_dict(keys, headers)
+        for d in data:
+            self._store.mark_clean(d)
+
+        return res
+
+    def delete(self, key: str):
+        with self._lock:
+            self._pending_segments.pop(key, None)
+            super().delete(key)
+            if _is_write_back():
+                return
+
+            self._segments.delete_many({'model_key': key})
+            segment_cache.delete(key)
+
+    def _delete_many(self, keys: List[str]):
+        super()._delete_many(keys)
+        self._segments.delete_many({'model_key': {'$in': keys}})
+        for k in keys:
+            segment_cache.delete(k)
 
-        return super().msave_dict(keys, data)
+
+class CachedMongoIndexDbDriver(MongoIndexDbDriver):
+    """Index driver with a write-through cache of the model keys"""
+
+    def __init__(self, index_cls: Type['Index'], db: 'pymongo.mongo_client.database.Database'):
+        super().__init__(index_cls, db)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _cache_key(self, index_key: str) -> str:
+        return f'{self.index_name}:{index_key}'
+
+    def get(self, index_key: str) -> Optional[str]:
+        return self.mget([index_key])[0]
+
+    def mget(self, index_key: List[str]) -> List[Optional[str]]:
+        res = [index_cache.get(self._cache_key(k)) for k in index_key]
+        missing = [k for k, v in zip(index_key, res) if v is MISSING]
+        if not missing:
+            return res
+
+        generation = self._generation
+        if len(missing) == 1:
+            loaded = [super().get(missing[0])]
+        else:
+            loaded = super().mget(missing)
+
+        with self._lock:
+            if generation == self._generation:
+                for k, v in zip(missing, loaded):
+                    index_cache.set(self._cache_key(k), v)
+
+        loaded = iter(loaded)
+
+        return [next(loaded) if v is MISSING else v for v in res]
+
+    def set(self, index_key: str, model_key: str):
+        with self._lock:
+            self._generation += 1
+            super().set(index_key, model_key)
+            index_cache.set(self._cache_key(index_key), model_key)
+
+    def delete(self, index_key: str):
+        with self._lock:
+            self._generation += 1
+            super().delete(index_key)
+            index_cache.delete(self._cache_key(index_key))
+
+
+def _create_db_driver(model_cls: Type['Model'], db: 'pymongo.mongo_client.database.Database') -> MongoPickleDbDriver:
+    if issubclass(model_cls, SeriesCollection):
+        return MongoSeriesDbDriver(model_cls, db)
+
+    return MongoPickleDbDriver(model_cls, db)
 
 
 models = [user.User,
@@ -77,6 +421,21 @@ indexes = [project.ProjectIndex,
            computer.ComputerIndex] + [m for s, m, p in analyses.AnalysisManager.get_db_indexes()]
 
 
+_db_drivers: List[MongoPickleDbDriver] = []
+
+
+def flush():
+    """Writes the models buffered with ``write_back``, and then deletes the models deleted with it"""
+    for d in _db_drivers:
+        d.flush()
+    for d in _db_drivers:
+        d.flush_deletes()
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    return {c.name: c.stats for c in [model_cache, segment_cache, index_cache]}
+
+
 def init_mongo_db(mongo_address: str = '', port: int = 27017):
     if not mongo_address:
         if 'MONGO_HOST' in os.environ:
@@ -97,8 +456,11 @@ def init_mongo_db(mongo_address: str = '', port: int = 27017):
 
     db = mongo_client['labml']
 
-    Model.set_db_drivers([MongoPickleDbDriver(m, db) for m in models])
-    Index.set_db_drivers([MongoIndexDbDriver(m, db) for m in indexes])
+    _db_drivers.clear()
+    _db_drivers.extend(_create_db_driver(m, db) for m in models)
+
+    Model.set_db_drivers(_db_drivers)
+    Index.set_db_drivers([CachedMongoIndexDbDriver(m, db) for m in indexes])
 
     project.create_project(settings.FLOAT_PROJECT_TOKEN, 'float project')
     project.create_project(settings.SAMPLES_PROJECT_TOKEN, 'samples project')
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+# number of entries kept in each cache
+CACHE_SIZE = 10_000
+# seconds an entry is served before it is read again from the database
+CACHE_TTL = 300.
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded least recently used cache with a time to live.
+
+    Used by the database drivers as a write-through cache, so entries are updated on saves
+     and dropped on deletes. The time to live bounds how stale an entry can be if the
+     database is changed by another process.
+    """
+
+    def __init__(self, name: str, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        """Returns ``MISSING`` if the key is not cached"""
+        with self._lock:
+            entry = self._data.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            if time.time() - entry[0] > self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return MISSING
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def peek(self, key: str) -> Any:
+        """Like ``get``, without counting the lookup or updating the recency"""
+        with self._lock:
+            entry = self._data.get(key, None)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                return MISSING
+
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.,
+        }
@@ -1,3 +1,4 @@
+import threading
 import time
 from typing import List, Dict, Set
 
@@ -7,6 +8,9 @@ JobResponse = Dict[str, str]
 
 ONLINE_TIME_GAP = 60
 
+# runs are added by the ingest workers, which run in parallel
+_runs_lock = threading.Lock()
+
 
 class Computer(Model['Computer']):
     computer_uuid: str
@@ -84,19 +88,21 @@ def add_run(computer_uuid: str, run_uuid: str) -> None:
     if not computer_uuid:
         return
 
-    c = get_or_create(computer_uuid)
+    with _runs_lock:
+        c = get_or_create(computer_uuid)
 
-    c.active_runs.add(run_uuid)
-    c.save()
+        c.active_runs.add(run_uuid)
+        c.save()
 
 
 def remove_run(computer_uuid: str, run_uuid: str) -> None:
     if not computer_uuid:
         return
 
-    c = get_or_create(computer_uuid)
+    with _runs_lock:
+        c = get_or_create(computer_uuid)
 
-    if run_uuid in c.active_runs:
-        c.active_runs.remove(run_uuid)
-        c.deleted_runs.add(run_uuid)
-        c.save()
+        if run_uuid in c.active_runs:
+            c.active_runs.remove(run_uuid)
+            c.deleted_runs.add(run_uuid)
+            c.save()
@@ -14,6 +14,8 @@ from starlette.responses import JSONResponse
 
 from labml_app import db
 from labml_app import handlers
+from labml_app import wire
+from labml_app.ingest import stop_ingest_queue
 from labml_app.logger import logger
 from labml_app.settings import WEB_URL, IS_LOCAL_SETUP, IS_DEBUG
 
@@ -73,10 +75,17 @@ app.add_middleware(
     allow_headers=["*"],
     allow_credentials=True,
 )
+app.add_middleware(wire.DecompressRequestMiddleware)
 
 handlers.add_handlers(app)
 
 
+@app.on_event('shutdown')
+def shutdown():
+    # pushes that were acknowledged are saved before the server exits
+    stop_ingest_queue()
+
+
 @app.get('/')
 def index():
     file_path = str(STATIC_PATH) + '/' + 'index.html'
@@ -6,10 +6,10 @@ from typing import Callable, Dict, Any, Optional
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from .analyses.experiments import stdout, stderr, stdlogger
 from .logger import logger
 from . import settings
 from . import auth
+from . import db
 from .db import run
 from .db import computer
 from .db import session
@@ -18,6 +18,9 @@ from .db import project
 from .db import status
 from . import utils
 from . import analyses
+from . import wire
+from .rate_control import get_rate_controller
+from .ingest import get_ingest_queue, validate_packets
 
 try:
     import requests
@@ -77,27 +80,31 @@ async def _update_run(request: Request, labml_token: str, labml_version: str, ru
     if world_size > 1 and rank > 0:
         run_uuid = f'{run_uuid}_{rank}'
 
-    r = run.get_or_create(request, run_uuid, rank, world_size, main_rank, token)
-    s = r.status.load()
-
-    json = await request.json()
+    try:
+        json = await wire.get_json(request)
+    except ValueError as e:
+        errors.append({'error': 'invalid_data',
+                       'message': f'Failed to decode the request: {e}'})
+        return {'errors': errors}
     if isinstance(json, list):
         data = json
     else:
         data = [json]
 
-    for d in data:
-        r.update_run(d)
-        if 'track' in d:
-            last_step = analyses.AnalysisManager.track(run_uuid, d['track'])
-            s.update_time_status(d, last_step)
+    error = validate_packets(data)
+    if error is not None:
+        errors.append({'error': 'invalid_data',
+                       'message': error})
+        return {'errors': errors}
+
+    r = run.get_or_create(request, run_uuid, rank, world_size, main_rank, token)
 
-        if 'stdout' in d and d['stdout']:
-            stdout.update_stdout(run_uuid, d['stdout'])
-        if 'stderr' in d and d['stderr']:
-            stderr.update_stderr(run_uuid, d['stderr'])
-        if 'logger' in d and d['logger']:
-            stdlogger.update_std_logger(run_uuid, d['logger'])
+    ingest_queue = get_ingest_queue()
+    ingest_queue.put(run_uuid, data)
+    n_failed = ingest_queue.pop_failed(run_uuid)
+    if n_failed:
+        errors.append({'warning': 'ingest_failed',
+                       'message': f'{n_failed} updates of this run could not be saved on the server'})
 
     hp_values = analyses.AnalysisManager.get_experiment_analysis('HyperParamsAnalysis', run_uuid)
     if hp_values is not None:
@@ -111,7 +118,8 @@ async def _update_run(request: Request, labml_token: str, labml_version: str, ru
 
     app_url = str(request.url).split('api')[0]
 
-    return {'errors': errors, 'url': f'{app_url}{run_uuid}', 'dynamic': hp_values}
+    return {'errors': errors, 'url': f'{app_url}{run_uuid}', 'dynamic': hp_values,
+            'formats': wire.get_formats(), 'encodings': wire.get_encodings()}
 
 
 async def update_run(request: Request) -> EndPointRes:
@@ -125,7 +133,14 @@ async def update_run(request: Request) -> EndPointRes:
 
     res = await _update_run(request, labml_token, labml_version, run_uuid, rank, world_size, main_rank)
 
-    await asyncio.sleep(3)
+    if world_size > 1 and rank > 0:
+        run_uuid = f'{run_uuid}_{rank}'
+    push_interval = get_rate_controller().get_push_interval(run_uuid)
+    res['push_interval'] = push_interval
+
+    # older clients push again as soon as they get a response
+    if 'rate_control' not in request.query_params:
+        await asyncio.sleep(push_interval)
 
     return res
 
@@ -175,7 +190,7 @@ async def _update_session(request: Request, labml_token: str, session_uuid: str,
     c = session.get_or_create(request, session_uuid, computer_uuid, token)
     s = c.status.load()
 
-    json = await request.json()
+    json = await wire.get_json(request)
     if isinstance(json, list):
         data = json
     else:
@@ -192,7 +207,8 @@ async def _update_session(request: Request, labml_token: str, session_uuid: str,
 
     app_url = str(request.url).split('api')[0]
 
-    return {'errors': errors, 'url': f'{app_url}session/{session_uuid}'}
+    return {'errors': errors, 'url': f'{app_url}session/{session_uuid}',
+            'formats': wire.get_formats(), 'encodings': wire.get_encodings()}
 
 
 async def update_session(request: Request) -> EndPointRes:
@@ -477,6 +493,14 @@ async def get_user(request: Request):
                         headers={'Authorization': session_token})
 
 
+@auth.login_required
+async def get_server_stats(request: Request, token: Optional[str] = None) -> EndPointRes:
+    return {'cache': db.cache_stats(),
+            'ingest': get_ingest_queue().stats,
+            'rate_control': get_rate_controller().stats,
+            'compression': wire.compression_stats.stats}
+
+
 def _add_server(app: FastAPI, method: str, func: Callable, url: str):
     if not inspect.iscoroutinefunction(func):
         raise ValueError(f'{func.__name__} is not a async function')
@@ -494,6 +518,9 @@ def _add_ui(app: FastAPI, method: str, func: Callable, url: str):
 def add_handlers(app: FastAPI):
     _add_server(app, 'POST', update_run, '{labml_token}/track')
     _add_server(app, 'POST', update_session, '{labml_token}/computer')
+    # cache, ingest and rate control counters of this server, for debugging
+    if settings.IS_DEBUG:
+        _add_ui(app, 'GET', get_server_stats, 'internal/stats')
 
     _add_ui(app, 'GET', get_runs, 'runs/{labml_token}/{tag}')
     _add_ui(app, 'GET', get_runs, 'runs/{labml_token}')
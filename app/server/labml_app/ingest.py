@@ -0,0 +1,296 @@
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from . import db
+from . import analyses
+from .analyses.experiments import stdout, stderr, stdlogger
+from .analyses.series import SeriesModel
+from .db import run
+from .logger import logger
+from .rate_control import get_rate_controller
+
+# number of worker threads; runs are processed inline by the handler when this is ``0``
+N_WORKERS = 4
+# maximum number of pushes a worker takes off its queue at once
+MAX_BATCH_SIZE = 256
+
+OUTPUTS = {'stdout': stdout.update_stdout,
+           'stderr': stderr.update_stderr,
+           'logger': stdlogger.update_std_logger}
+
+Packet = Dict[str, Any]
+
+
+def validate_packets(data: List[Any]) -> Optional[str]:
+    """Checks the structure of the pushed packets, and returns what's wrong with them, if anything"""
+    for d in data:
+        if not isinstance(d, dict):
+            return 'Packets should be objects'
+
+        track = d.get('track', {})
+        if not isinstance(track, dict):
+            return '`track` should be an object'
+        for ind, s in track.items():
+            if not isinstance(s, dict) or 'step' not in s or 'value' not in s:
+                return f'Indicator {ind} should have `step` and `value`'
+            try:
+                step = np.asarray(s['step'], dtype=np.float64)
+                value = np.asarray(s['value'], dtype=np.float64)
+            except (TypeError, ValueError):
+                return f'`step` and `value` of indicator {ind} should be numbers'
+            if step.ndim != 1 or step.shape != value.shape or len(step) == 0:
+                return f'`step` and `value` of indicator {ind} should be lists of the same length'
+
+        for k in OUTPUTS:
+            if d.get(k, None) and not isinstance(d[k], str):
+                return f'`{k}` should be a string'
+
+        for k in ['configs', 'status']:
+            if k in d and not isinstance(d[k], dict):
+                return f'`{k}` should be an object'
+        for k, v in d.get('configs', {}).items():
+            if not isinstance(v, dict) or 'computed' not in v or 'name' not in v:
+                return f'Config {k} should have `computed` and `name`'
+
+    return None
+
+
+def _can_merge_track(track: Dict[str, SeriesModel], new: Dict[str, SeriesModel]) -> bool:
+    for ind, s in new.items():
+        if ind not in track or len(s['step']) == 0 or len(track[ind]['step']) == 0:
+            continue
+        if s['step'][0] <= track[ind]['step'][-1]:
+            return False
+
+    return True
+
+
+def _merge_track(track: Dict[str, SeriesModel], new: Dict[str, SeriesModel]):
+    for ind, s in new.items():
+        if ind in track:
+            track[ind] = {'step': np.concatenate((track[ind]['step'], s['step'])),
+                          'value': np.concatenate((track[ind]['value'], s['value']))}
+        else:
+            track[ind] = s
+
+
+def ingest_run(run_uuid: str, data: List[Packet]) -> None:
+    """
+    Updates the run with the pushed data.
+
+    Tracking data and outputs of consecutive packets are merged,
+     so that analyses are loaded and saved once for all the packets.
+    """
+    r = run.get(run_uuid)
+    if r is None:
+        return
+
+    s = r.status.load()
+
+    track = {}
+    status = []
+    outputs = {k: [] for k in OUTPUTS}
+
+    def _track():
+        last_step = analyses.AnalysisManager.track(run_uuid, track)
+        for d in status:
+            s.update_time_status(d, last_step)
+
+        track.clear()
+        status.clear()
+
+    for d in data:
+        r.update_run(d)
+        if 'track' in d:
+            if not _can_merge_track(track, d['track']):
+                _track()
+            _merge_track(track, d['track'])
+            status.append(d)
+
+        for k in OUTPUTS:
+            if k in d and d[k]:
+                outputs[k].append(d[k])
+
+    if status:
+        _track()
+
+    for k, content in outputs.items():
+        if content:
+            OUTPUTS[k](run_uuid, ''.join(content))
+
+
+def _ingest(batch: List[Tuple[str, List[Packet]]]) -> Dict[str, int]:
+    """Processes a batch of pushes, and returns the number of pushes that failed, by run"""
+    runs: Dict[str, List[Packet]] = {}
+    pushes: Dict[str, int] = {}
+    for run_uuid, data in batch:
+        runs.setdefault(run_uuid, []).extend(data)
+        pushes[run_uuid] = pushes.get(run_uuid, 0) + 1
+
+    processing_time = {}
+    failed = {}
+    with db.write_back():
+        for run_uuid, data in runs.items():
+            start = time.perf_counter()
+            try:
+                ingest_run(run_uuid, data)
+            except Exception:
+                logger.error(f'Failed to ingest run {run_uuid}\n{traceback.format_exc()}')
+                failed[run_uuid] = pushes[run_uuid]
+            processing_time[run_uuid] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    db.flush()
+    flush_time = (time.perf_counter() - start) / len(batch)
+
+    rate_controller = get_rate_controller()
+    for run_uuid, t in processing_time.items():
+        rate_controller.record(run_uuid, t / pushes[run_uuid] + flush_time)
+
+    return failed
+
+
+def _ingest_batch(batch: List[Tuple[str, List[Packet]]]) -> Dict[str, int]:
+    """``_ingest``, with the pushes of all the runs failed if the batch can't be written"""
+    try:
+        return _ingest(batch)
+    except Exception:
+        failed = {}
+        for run_uuid, _ in batch:
+            failed[run_uuid] = failed.get(run_uuid, 0) + 1
+        logger.error(f'Failed to ingest runs {", ".join(failed.keys())}\n{traceback.format_exc()}')
+
+        return failed
+
+
+class IngestWorker(threading.Thread):
+    def __init__(self, on_failed: Callable[[Dict[str, int]], None]):
+        super().__init__(daemon=True)
+        # ``None`` stops the worker, after the pushes queued before it
+        self.queue: 'queue.Queue[Optional[Tuple[str, List[Packet]]]]' = queue.Queue()
+        self.on_failed = on_failed
+        self.n_batches = 0
+        self.n_pushes = 0
+        # pushes that were accepted but could not be ingested
+        self.n_failed = 0
+
+    def run(self):
+        is_stopped = False
+        while not is_stopped:
+            batch = [self.queue.get()]
+            while len(batch) < MAX_BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            n_items = len(batch)
+            if batch[-1] is None:
+                is_stopped = True
+                batch.pop()
+
+            if batch:
+                failed = _ingest_batch(batch)
+                if failed:
+                    self.n_failed += sum(failed.values())
+                    self.on_failed(failed)
+
+                self.n_batches += 1
+                self.n_pushes += len(batch)
+
+            for _ in range(n_items):
+                self.queue.task_done()
+
+
+class IngestQueue:
+    """
+    Processes the pushes of runs in background worker threads.
+
+    Each run is assigned to a single worker, so the pushes of a run are processed in order.
+    A worker takes all the pushes waiting in its queue, merges the pushes of each run,
+     and writes the updated models with a single ``msave_dict`` per model type.
+
+    Pushes that fail are counted by run, so that the next response to the run can report them.
+    """
+
+    def __init__(self, n_workers: int = N_WORKERS):
+        self._lock = threading.Lock()
+        # number of failed pushes by run, that are not reported yet
+        self._failed: Dict[str, int] = {}
+        self.n_failed = 0
+        self.is_stopped = False
+        self.workers = [IngestWorker(self._on_failed) for _ in range(n_workers)]
+        for w in self.workers:
+            w.start()
+
+    def _on_failed(self, failed: Dict[str, int]):
+        with self._lock:
+            for run_uuid, n in failed.items():
+                self._failed[run_uuid] = self._failed.get(run_uuid, 0) + n
+
+    def pop_failed(self, run_uuid: str) -> int:
+        """Number of failed pushes of the run since the last call"""
+        with self._lock:
+            return self._failed.pop(run_uuid, 0)
+
+    def put(self, run_uuid: str, data: List[Packet]):
+        if self.is_stopped:
+            raise RuntimeError('Ingestion is stopped')
+
+        if not self.workers:
+            failed = _ingest_batch([(run_uuid, data)])
+            if failed:
+                self.n_failed += sum(failed.values())
+                self._on_failed(failed)
+            return
+
+        self.workers[hash(run_uuid) % len(self.workers)].queue.put((run_uuid, data))
+
+    def join(self):
+        """Waits until all the queued pushes are processed"""
+        for w in self.workers:
+            w.queue.join()
+
+    def stop(self):
+        """Stops taking pushes, and waits until the workers process the queued pushes"""
+        self.is_stopped = True
+        for w in self.workers:
+            w.queue.put(None)
+        for w in self.workers:
+            w.join()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        n_batches = sum(w.n_batches for w in self.workers)
+        n_pushes = sum(w.n_pushes for w in self.workers)
+
+        return {
+            'queued': sum(w.queue.qsize() for w in self.workers),
+            'batches': n_batches,
+            'pushes': n_pushes,
+            'batch_size': n_pushes / max(1, n_batches),
+            'failed': self.n_failed + sum(w.n_failed for w in self.workers),
+        }
+
+
+_ingest_queue = None
+
+
+def get_ingest_queue() -> IngestQueue:
+    global _ingest_queue
+
+    if _ingest_queue is None:
+        _ingest_queue = IngestQueue()
+
+    return _ingest_queue
+
+
+def stop_ingest_queue():
+    """Processes the queued pushes and stops the workers, on shutdown"""
+    if _ingest_queue is not None:
+        _ingest_queue.stop()
@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+MIN_PUSH_INTERVAL = 3.
+MAX_PUSH_INTERVAL = 60.
+# fraction of the server time to spend on ingesting tracking data
+TARGET_UTILIZATION = 0.5
+# runs that have not pushed for this long are not counted
+ACTIVE_RUN_TIMEOUT = 120.
+DECAY = 0.8
+
+
+class RateController:
+    """
+    Recommends how long each run should wait before its next push.
+
+    Keeps a moving average of the time taken to process a push of each active run.
+    If run ``r`` takes ``t_r`` per push and waits ``t_r * n / TARGET_UTILIZATION``
+     between pushes, where ``n`` is the number of active runs,
+     the server spends ``TARGET_UTILIZATION`` of its time on ingestion.
+    """
+
+    def __init__(self):
+        # run uuid -> (last push time, average processing time)
+        self.runs: Dict[str, Tuple[float, float]] = {}
+        self.last_cleanup = time.time()
+        self.lock = threading.Lock()
+
+    def record(self, run_uuid: str, processing_time: float):
+        """Called by the ingest workers with the time taken to process a push of the run"""
+        now = time.time()
+        with self.lock:
+            if run_uuid in self.runs:
+                processing_time = DECAY * self.runs[run_uuid][1] + (1 - DECAY) * processing_time
+            self.runs[run_uuid] = (now, processing_time)
+
+            if now - self.last_cleanup > ACTIVE_RUN_TIMEOUT / 10:
+                self._cleanup(now)
+
+    def _cleanup(self, now: float):
+        self.last_cleanup = now
+        self.runs = {r: v for r, v in self.runs.items() if now - v[0] < ACTIVE_RUN_TIMEOUT}
+
+    def get_push_interval(self, run_uuid: str) -> float:
+        run = self.runs.get(run_uuid, None)
+        if run is None:
+            return MIN_PUSH_INTERVAL
+
+        interval = run[1] * len(self.runs) / TARGET_UTILIZATION
+
+        return min(MAX_PUSH_INTERVAL, max(MIN_PUSH_INTERVAL, interval))
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return {
+            'active_runs': len(self.runs),
+            'utilization': sum(t / self.get_push_interval(r) for r, (_, t) in list(self.runs.items())),
+        }
+
+
+_rate_controller = RateController()
+
+
+def get_rate_controller() -> RateController:
+    return _rate_controller
@@ -0,0 +1,19 @@
+import re
+from typing import Tuple
+
+# text of a line up to its last carriage return, that is not part of a ``\r\n``, and
+#  carriage returns followed by a new line
+_OVERWRITTEN_LINE = re.compile(r'^[^\n]*\r(?!\n)|\r(?=\n)', re.MULTILINE)
+
+
+def split_console_lines(output: str) -> Tuple[str, str]:
+    r"""
+    Applies carriage returns to console output.
+
+    Returns the completed lines, and the last line which has no ``\n`` yet.
+    A ``\r`` that is not followed by a ``\n`` clears the line.
+    """
+    output = _OVERWRITTEN_LINE.sub('', output)
+    end = output.rfind('\n') + 1
+
+    return output[:end], output[end:]
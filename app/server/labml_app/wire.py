@@ -0,0 +1,150 @@
+"""
+Decoding of the request bodies sent by the labml client.
+
+Besides JSON, the client can send packets as msgpack with numpy arrays as raw buffers,
+ once the server lists ``msgpack`` in the ``formats`` of its response.
+Similarly, it compresses large bodies once the server lists ``gzip`` in the ``encodings``.
+"""
+
+import threading
+import zlib
+from typing import Any, List, Dict
+
+import numpy as np
+from fastapi import Request
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+# msgpack extension type of numpy arrays; the payload is the length of the dtype string,
+#  the dtype string and the array buffer
+NDARRAY_EXT = 1
+
+ENCODINGS = ['gzip', 'deflate']
+# decompressed request bodies larger than this are rejected
+MAX_DECOMPRESSED_SIZE = 256 * 1024 * 1024
+
+
+def get_formats() -> List[str]:
+    """Formats that the server can decode, besides JSON"""
+    if msgpack is None:
+        return []
+
+    return ['msgpack']
+
+
+def get_encodings() -> List[str]:
+    """Content encodings of request bodies that the server can decompress"""
+    return ENCODINGS
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code != NDARRAY_EXT:
+        return msgpack.ExtType(code, data)
+
+    n = data[0]
+    dtype = data[1:1 + n].decode('ascii')
+
+    return np.frombuffer(data, dtype=dtype, offset=1 + n)
+
+
+def decode_msgpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook)
+
+
+async def get_json(request: Request) -> Any:
+    """Decoded request body, in the format given by the ``Content-Type``"""
+    if request.headers.get('content-type', '').startswith(MSGPACK_CONTENT_TYPE):
+        if msgpack is None:
+            raise RuntimeError('msgpack is not installed')
+
+        return decode_msgpack(await request.body())
+
+    return await request.json()
+
+
+class CompressionStats:
+    def __init__(self):
+        self.requests = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.lock = threading.Lock()
+
+    def record(self, compressed: int, decompressed: int):
+        with self.lock:
+            self.requests += 1
+            self.compressed_bytes += compressed
+            self.decompressed_bytes += decompressed
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return {
+            'requests': self.requests,
+            'compressed_bytes': self.compressed_bytes,
+            'decompressed_bytes': self.decompressed_bytes,
+            'ratio': self.decompressed_bytes / max(1, self.compressed_bytes),
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def decompress(data: bytes) -> bytes:
+    # ``wbits`` of ``32 + 15`` detects gzip and zlib headers
+    d = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    res = d.decompress(data, MAX_DECOMPRESSED_SIZE)
+    if d.unconsumed_tail:
+        raise ValueError('Decompressed request body is too large')
+
+    return res
+
+
+class DecompressRequestMiddleware:
+    """Decompresses request bodies sent with a ``gzip`` or ``deflate`` ``Content-Encoding``"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        encoding = Headers(scope=scope).get('content-encoding', '').lower()
+        if encoding not in ENCODINGS:
+            return await self.app(scope, receive, send)
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body = b''.join(chunks)
+
+        try:
+            data = decompress(body)
+        except (zlib.error, ValueError) as e:
+            response = JSONResponse(status_code=400, content={'error': 'invalid_encoding', 'message': str(e)})
+            return await response(scope, receive, send)
+
+        compression_stats.record(len(body), len(data))
+
+        headers = [(k, v) for k, v in scope['headers'] if k not in (b'content-encoding', b'content-length')]
+        headers.append((b'content-length', str(len(data)).encode('latin-1')))
+        scope = {**scope, 'headers': headers}
+
+        is_sent = False
+
+        async def _receive():
+            nonlocal is_sent
+            if is_sent:
+                return await receive()
+            is_sent = True
+            return {'type': 'http.request', 'body': data, 'more_body': False}
+
+        await self.app(scope, _receive, send)
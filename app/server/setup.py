@@ -22,6 +22,7 @@ setuptools.setup(
                       'fastapi>=0.111.0',
                       'uvicorn>=0.30.1',
                       'pymongo>=4.8.0',
+                      'msgpack',
                       ],
     packages=['labml_app'],
     include_package_data=True,
@@ -0,0 +1,54 @@
+import time
+
+from labml import logger
+from labml.logger import Text
+
+from labml_app.db.cache import LRUCache, MISSING
+
+
+def check_lru():
+    cache = LRUCache('test', max_size=3)
+    for k in 'abc':
+        cache.set(k, k.upper())
+
+    assert cache.get('a') == 'A'
+    cache.set('d', 'D')
+
+    # ``b`` is the least recently used
+    assert cache.get('b') is MISSING
+    assert [cache.get(k) for k in 'acd'] == ['A', 'C', 'D']
+
+    cache.delete('c')
+    assert cache.get('c') is MISSING
+
+    stats = cache.stats
+    assert stats['hits'] == 4 and stats['misses'] == 2 and stats['evictions'] == 1, stats
+
+
+def check_ttl():
+    cache = LRUCache('test', ttl=0.05)
+    cache.set('a', None)
+    assert cache.get('a') is None
+
+    time.sleep(0.1)
+    assert cache.peek('a') is MISSING
+    assert cache.get('a') is MISSING
+    assert len(cache) == 0
+
+
+def benchmark(n: int = 100_000, size: int = 10_000):
+    cache = LRUCache('test', max_size=size)
+    start = time.time()
+    for i in range(n):
+        key = str(i % (2 * size))
+        if cache.get(key) is MISSING:
+            cache.set(key, i)
+    t = (time.time() - start) / n
+
+    logger.log('Lookup and set: ', (f'{t * 1e6:,.2f}us', Text.value))
+
+
+if __name__ == '__main__':
+    check_lru()
+    check_ttl()
+    benchmark()
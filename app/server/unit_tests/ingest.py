@@ -0,0 +1,81 @@
+import threading
+import time
+
+import numpy as np
+from labml import logger
+from labml.logger import Text
+
+from labml_app import ingest
+
+
+def check_validate():
+    step = np.arange(10, dtype=np.float64)
+    valid = [{'track': {'loss': {'step': step, 'value': np.random.random(10)}},
+              'stdout': 'step 1\n',
+              'configs': {'lr': {'name': 'lr', 'computed': 0.1}},
+              'status': {'status': 'in progress'}},
+             {'track': {'loss': {'step': [10, 11], 'value': [0.5, float('nan')]}}}]
+    assert ingest.validate_packets(valid) is None
+
+    invalid = [
+        ['loss'],
+        [{'track': [1, 2]}],
+        [{'track': {'loss': {'step': [1, 2]}}}],
+        [{'track': {'loss': {'step': [1, 2], 'value': ['a', 'b']}}}],
+        [{'track': {'loss': {'step': [1, 2], 'value': [1.]}}}],
+        [{'track': {'loss': {'step': [], 'value': []}}}],
+        [{'stdout': ['step 1']}],
+        [{'configs': {'lr': 0.1}}],
+        [{'status': 'in progress'}],
+    ]
+    for data in invalid:
+        assert ingest.validate_packets(data) is not None, data
+
+
+def check_failed_and_stop(n_runs: int = 10, n_pushes: int = 20):
+    """Failed pushes are reported once per run, and ``stop`` processes the queued pushes"""
+    ingested = []
+    lock = threading.Lock()
+
+    def _ingest(batch):
+        time.sleep(0.01)
+        with lock:
+            ingested.extend(batch)
+        return {run_uuid: 1 for run_uuid, _ in batch if run_uuid == 'run_0'}
+
+    original = ingest._ingest
+    ingest._ingest = _ingest
+    try:
+        q = ingest.IngestQueue(n_workers=2)
+        for i in range(n_pushes):
+            for r in range(n_runs):
+                q.put(f'run_{r}', [{'step': i}])
+        q.stop()
+    finally:
+        ingest._ingest = original
+
+    assert len(ingested) == n_runs * n_pushes
+    for r in range(n_runs):
+        steps = [d[0]['step'] for run_uuid, d in ingested if run_uuid == f'run_{r}']
+        assert steps == list(range(n_pushes)), steps
+
+    # failed pushes are counted by the runs in each batch that failed
+    n_failed = q.pop_failed('run_0')
+    assert 0 < n_failed <= n_pushes, n_failed
+    assert q.pop_failed('run_0') == 0
+    assert q.pop_failed('run_1') == 0
+    assert q.stats['failed'] == n_failed
+
+    try:
+        q.put('run_0', [{'step': n_pushes}])
+        assert False
+    except RuntimeError:
+        pass
+    assert all(not w.is_alive() for w in q.workers)
+
+
+if __name__ == '__main__':
+    check_validate()
+    check_failed_and_stop()
+
+    logger.log('Ingest: ', ('OK', Text.success))
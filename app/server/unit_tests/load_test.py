@@ -0,0 +1,183 @@
+"""
+Load test of the track endpoint.
+
+Starts the app server locally (needs MongoDB) and simulated runs that push tracking data,
+ waiting for the ``push_interval`` recommended by the server between pushes.
+
+    python -m unit_tests.load_test --runs 200 --duration 60
+
+Runs pushing every second, with pushes processed inline by the handler (``--ingest-workers 0``)
+ or by the ingest workers,
+
+    python -m unit_tests.load_test --runs 200 --duration 60 --push-every 1
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from typing import List, Dict, Any
+from uuid import uuid4
+
+import numpy as np
+import uvicorn
+from labml import logger
+from labml.logger import Text
+
+
+class SimulatedRun(threading.Thread):
+    def __init__(self, url: str, *, n_indicators: int, points_per_push: int, duration: float,
+                 interval_scale: float, rate_control: bool, push_every: float):
+        super().__init__(daemon=True)
+        self.run_uuid = uuid4().hex
+        self.url = f'{url}?run_uuid={self.run_uuid}&labml_version=0.5.3'
+        self.rate_control = rate_control
+        if rate_control:
+            self.url += '&rate_control=true'
+        self.n_indicators = n_indicators
+        self.points_per_push = points_per_push
+        self.duration = duration
+        self.interval_scale = interval_scale
+        self.push_every = push_every
+        self.step = 0
+
+        self.latencies: List[float] = []
+        self.push_intervals: List[float] = []
+        self.errors = 0
+
+    def _data(self) -> Dict[str, Any]:
+        steps = list(range(self.step, self.step + self.points_per_push))
+        self.step += self.points_per_push
+        track = {f'loss.{i}': {'step': steps, 'value': np.random.random(len(steps)).tolist()}
+                 for i in range(self.n_indicators)}
+
+        return {'track': track, 'time': time.time()}
+
+    def _send(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        data = json.dumps([data]).encode('utf-8')
+        req = urllib.request.Request(self.url)
+        req.add_header('Content-Type', 'application/json; charset=utf-8')
+        req.add_header('Content-Length', str(len(data)))
+        with urllib.request.urlopen(req, data, timeout=120) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def run(self):
+        end = time.time() + self.duration
+        while time.time() < end:
+            start = time.time()
+            try:
+                res = self._send(self._data())
+            except Exception:
+                self.errors += 1
+                time.sleep(1)
+                continue
+            self.latencies.append(time.time() - start)
+
+            push_interval = res.get('push_interval', 0.)
+            self.push_intervals.append(push_interval)
+            if self.push_every:
+                wait = self.push_every - (time.time() - start)
+            elif self.rate_control:
+                wait = push_interval * self.interval_scale
+            else:
+                wait = 0.
+            time.sleep(max(0., min(wait, end - time.time())))
+
+
+def start_server(port: int) -> uvicorn.Server:
+    config = uvicorn.Config('labml_app.flask_app:app', host='127.0.0.1', port=port, log_level='error')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError('Failed to start the server')
+        time.sleep(0.1)
+
+    return server
+
+
+def load_test(n_runs: int, duration: float, *, n_indicators: int = 20, points_per_push: int = 10,
+              interval_scale: float = 1., rate_control: bool = True, push_every: float = 0.,
+              ingest_workers: int = 4, port: int = 5095):
+    from labml_app import ingest
+    ingest_queue = ingest.IngestQueue(ingest_workers)
+    ingest._ingest_queue = ingest_queue
+
+    server = start_server(port)
+
+    runs = [SimulatedRun(f'http://127.0.0.1:{port}/api/v1/load_test/track',
+                         n_indicators=n_indicators,
+                         points_per_push=points_per_push,
+                         duration=duration,
+                         interval_scale=interval_scale,
+                         rate_control=rate_control,
+                         push_every=push_every) for _ in range(n_runs)]
+    start = time.time()
+    for r in runs:
+        r.start()
+    for r in runs:
+        r.join()
+    total_time = time.time() - start
+
+    start = time.time()
+    ingest_queue.join()
+    drain_time = time.time() - start
+
+    server.should_exit = True
+
+    latencies = np.array([t for r in runs for t in r.latencies])
+    push_intervals = np.array([t for r in runs for t in r.push_intervals])
+    n_pushes = len(latencies)
+    n_points = n_pushes * n_indicators * points_per_push
+
+    from labml_app.rate_control import get_rate_controller
+    stats = get_rate_controller().stats
+
+    logger.log('Pushes: ', (f'{n_pushes:,}', Text.value),
+               ' (', (f'{n_pushes / total_time:,.1f}/s', Text.value), '), errors: ',
+               (f'{sum(r.errors for r in runs):,}', Text.value))
+    logger.log('Points: ', (f'{n_points / total_time:,.0f}/s', Text.value))
+    if n_pushes > 0:
+        logger.log('Latency: p50 ', (f'{np.percentile(latencies, 50) * 1000:,.1f}ms', Text.value),
+                   ' p99 ', (f'{np.percentile(latencies, 99) * 1000:,.1f}ms', Text.value))
+        logger.log('Push interval: mean ', (f'{push_intervals.mean():,.2f}s', Text.value),
+                   ' max ', (f'{push_intervals.max():,.2f}s', Text.value))
+    ingest_stats = ingest_queue.stats
+    logger.log('Ingest: ', (f'{ingest_stats["batch_size"]:,.1f}', Text.value), ' pushes per batch, ',
+               (f'{drain_time:,.2f}s', Text.value), ' to drain the queue, failed: ',
+               (f'{ingest_stats["failed"]:,}', Text.value))
+    logger.log('Active runs: ', (f'{stats["active_runs"]}', Text.value),
+               ', utilization: ', (f'{stats["utilization"]:.2f}', Text.value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the track endpoint')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30.)
+    parser.add_argument('--indicators', type=int, default=20)
+    parser.add_argument('--points', type=int, default=10, help='Points per indicator per push')
+    parser.add_argument('--interval-scale', type=float, default=1.,
+                        help='Scale the recommended push interval, to push more often than recommended')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Simulate clients that do not wait between pushes')
+    parser.add_argument('--push-every', type=float, default=0.,
+                        help='Push at a fixed interval (seconds), ignoring the recommended push interval')
+    parser.add_argument('--ingest-workers', type=int, default=4,
+                        help='Number of ingest workers; pushes are processed by the handler if 0')
+    parser.add_argument('--port', type=int, default=5095)
+    args = parser.parse_args()
+
+    load_test(args.runs, args.duration,
+              n_indicators=args.indicators,
+              points_per_push=args.points,
+              interval_scale=args.interval_scale,
+              rate_control=not args.legacy,
+              push_every=args.push_every,
+              ingest_workers=args.ingest_workers,
+              port=args.port)
+
+
+if __name__ == '__main__':
+    main()
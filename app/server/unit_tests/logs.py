@@ -0,0 +1,269 @@
+import random
+import time
+from typing import List, Optional
+
+from labml import logger
+from labml.logger import Text
+from labml_db import Model
+from labml_db.driver import DbDriver
+from labml_db.serializer.pickle import PickleSerializer
+
+from labml_app.db import analyses
+from labml_app.analyses.experiments.stdout import StdOutModel
+from labml_app.analyses import logs as logs_module
+from labml_app.analyses.logs import Logs, LogPageModel, LogChunkModel, LogPageType, LOG_CHUNK_PAGES, \
+    get_logs, search_logs
+from labml_app.utils.console import split_console_lines
+
+LINES_PER_SECOND = 10
+
+
+class MemoryDbDriver(DbDriver):
+    """Keeps the serialized models in memory, and counts the bytes written"""
+
+    def __init__(self, model_cls):
+        super().__init__(PickleSerializer(), model_cls)
+        self.data = {}
+        self.bytes_written = 0
+
+    def load_dict(self, key: str):
+        data = self.data.get(key, None)
+        return self._serializer.from_string(data) if data is not None else None
+
+    def mload_dict(self, key: List[str]):
+        return [self.load_dict(k) for k in key]
+
+    def save_dict(self, key: str, data):
+        data = self._serializer.to_string(data)
+        self.bytes_written += len(data)
+        self.data[key] = data
+
+    def msave_dict(self, key: List[str], data):
+        for k, d in zip(key, data):
+            self.save_dict(k, d)
+
+    def delete(self, key: str):
+        del self.data[key]
+
+    def get_all(self):
+        return list(self.data.keys())
+
+
+class UnchunkedLogs(Logs):
+    """Keeps all the pages in ``log_pages``, as before chunks"""
+
+    def _chunk_pages(self):
+        pass
+
+
+class UnchunkedStdOutModel(Model['UnchunkedStdOutModel'], UnchunkedLogs):
+    pass
+
+
+def _init_drivers():
+    drivers = [MemoryDbDriver(m) for m in [StdOutModel, UnchunkedStdOutModel, LogPageModel, LogChunkModel]]
+    Model.set_db_drivers(drivers)
+
+    return drivers
+
+
+def _output(second: int):
+    lines = [f'step {second * LINES_PER_SECOND + i:>9,} loss {1 / (second + i + 1):.6f} accuracy {i / 10:.2f}'
+             for i in range(LINES_PER_SECOND)]
+    if second % 10 == 0:
+        # progress bar
+        lines[-1] = 'validation\r' + '\r'.join(f'{p}%' for p in range(0, 101, 25))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _expected(output: str):
+    return ''.join(line.split('\r')[-1] + '\n' for line in output.split('\n')[:-1])
+
+
+def _split_console_lines_loop(output: str):
+    """Character by character implementation, from earlier versions of ``LogPage``"""
+    res = []
+    temp = ''
+    for i, c in enumerate(output):
+        if c == '\n':
+            temp += '\n'
+            res.append(temp)
+            temp = ''
+        elif c == '\r' and len(output) > i + 1 and output[i + 1] == '\n':
+            pass
+        elif c == '\r':
+            temp = ''
+        else:
+            temp += c
+
+    return ''.join(res), temp
+
+
+def check_console_lines():
+    rng = random.Random(0)
+    for _ in range(10_000):
+        s = ''.join(rng.choice('ab\r\n') for _ in range(rng.randint(0, 20)))
+        assert split_console_lines(s) == _split_console_lines_loop(s), repr(s)
+
+
+def check():
+    _init_drivers()
+    std_out = StdOutModel()
+    std_out.save()
+    unchunked = UnchunkedStdOutModel()
+    unchunked.save()
+
+    output = ''
+    for second in range(3_000):
+        content = _output(second)
+        output += content
+        for m in [std_out, unchunked]:
+            m = m.key.load()
+            m.update_logs(content)
+            m.save()
+
+    std_out = std_out.key.load()
+    unchunked = unchunked.key.load()
+    assert len(std_out.log_chunks) > 2
+    assert len(std_out.log_pages) <= LOG_CHUNK_PAGES + 1
+    assert std_out.n_pages == len(unchunked.log_pages)
+
+    pages = std_out.get_data(LogPageType.ALL.value)
+    assert pages == unchunked.get_data(LogPageType.ALL.value)
+    assert ''.join(pages['pages'][str(i)] for i in range(pages['page_length'])) == _expected(output)
+
+    for page_no in [0, LOG_CHUNK_PAGES - 1, LOG_CHUNK_PAGES, std_out.n_pages - 2, LogPageType.LAST.value]:
+        data = std_out.get_data(page_no)
+        assert data == unchunked.get_data(page_no)
+        assert str(std_out.n_pages - 1) in data['pages']
+        if page_no >= 0:
+            assert data['pages'][str(page_no)] == pages['pages'][str(page_no)]
+
+
+def check_chunk_deletes():
+    """Pages moved to a chunk are deleted after the chunk and the model are saved"""
+    drivers = _init_drivers()
+    std_out_driver, pages_driver, chunks_driver = drivers[0], drivers[2], drivers[3]
+    std_out = StdOutModel()
+    std_out.save()
+
+    delete = pages_driver.delete
+    deleted = []
+
+    def checked_delete(key: str):
+        saved = std_out_driver.load_dict(str(std_out.key))
+        assert key not in [str(k) for k in saved['log_pages']], key
+        assert all(str(k) in chunks_driver.data for k in saved['log_chunks'])
+        deleted.append(key)
+        delete(key)
+
+    pages_driver.delete = checked_delete
+    for second in range(3_000):
+        std_out = std_out.key.load()
+        std_out.update_logs(_output(second))
+        std_out.save()
+
+    assert len(deleted) == std_out.n_chunked_pages
+
+
+def check_lines():
+    _init_drivers()
+    std_out = StdOutModel()
+    output = ''.join(_output(second) for second in range(3_000))
+    for i in range(0, len(output), 1_000):
+        std_out.update_logs(output[i:i + 1_000])
+    std_out.save()
+    lines = _expected(output).split('\n')[:-1]
+    assert len(std_out.log_chunks) > 2
+
+    for start, end in [(0, 10), (100, 5_000), (len(lines) - 5, len(lines) + 5), (len(lines) + 1, None)]:
+        data = std_out.get_lines(start, end)
+        assert data['n_lines'] == len(lines)
+        assert data['lines'] == lines[start:end]
+    assert std_out.get_lines(tail=15)['lines'] == lines[-15:]
+    assert std_out.get_lines(tail=15)['start'] == len(lines) - 15
+
+    res = std_out.search('step 20,00', context=2)
+    expected = [i for i, line in enumerate(lines) if 'step 20,00' in line]
+    assert [m['line'] for m in res['matches']] == expected
+    for m in res['matches']:
+        assert m['text'] == lines[m['line']]
+        assert m['before'] == lines[m['line'] - 2:m['line']]
+        assert m['after'] == lines[m['line'] + 1:m['line'] + 3]
+    assert not res['is_truncated']
+
+    res = std_out.search(r'^validation|100%$', is_regex=True, limit=5)
+    assert [m['text'] for m in res['matches']] == ['100%'] * 5
+    assert res['is_truncated']
+
+    # requests
+    assert get_logs(std_out, {'tail': '15'})['lines'] == lines[-15:]
+    assert get_logs(std_out, {'start': 10, 'end': 20})['lines'] == lines[10:20]
+    for json in [{'tail': 'x'}, {'start': 0, 'end': [1]}, {'page': 'last'}, {'tail': True}]:
+        assert get_logs(std_out, json).status_code == 400, json
+    for json in [{'query': '(a+)+$', 'is_regex': True}, {'query': '((\\w+\\s?)*)$', 'is_regex': True},
+                 {'query': '(', 'is_regex': True}, {'query': 'a' * 1_000, 'is_regex': True},
+                 {'query': 'step', 'limit': 'all'}, {'query': 12}]:
+        assert search_logs(std_out, json).status_code == 400, json
+    assert len(search_logs(std_out, {'query': 'step 20,00', 'context': '2'})['matches']) == len(expected)
+
+    # searches stop after the time limit
+    time_limit = logs_module.SEARCH_TIME_LIMIT
+    logs_module.SEARCH_TIME_LIMIT = -1
+    res = std_out.search('step')
+    logs_module.SEARCH_TIME_LIMIT = time_limit
+    assert res['is_truncated'] and not res['matches']
+
+
+def benchmark(model_cls, hours: List[int]):
+    drivers = _init_drivers()
+    logs: Optional[Logs] = model_cls()
+    logs.save()
+    key = logs.key
+
+    start = time.time()
+    last_bytes = 0
+    second = 0
+    for h in range(1, max(hours) + 1):
+        for second in range(second, h * 3600):
+            logs = key.load()
+            logs.update_logs(_output(second))
+            logs.save()
+        second += 1
+
+        if h in hours:
+            bytes_written = sum(d.bytes_written for d in drivers)
+            size = sum(len(v) for d in drivers for v in d.data.values())
+            logger.log(f'{model_cls.__name__:<20} {h:>2}h: ',
+                       (f'{(time.time() - start) / 3600 * 1e3:,.2f}ms', Text.value), ' per update ',
+                       (f'{(bytes_written - last_bytes) / 3600 / 1e3:,.1f}KB', Text.value), ' written per update ',
+                       (f'{size / 1e6:,.1f}MB', Text.subtle), ' stored')
+        start = time.time()
+        last_bytes = sum(d.bytes_written for d in drivers)
+
+    start = time.time()
+    pages = key.load().get_data(LogPageType.ALL.value)
+    logger.log(f'{model_cls.__name__:<20} read {pages["page_length"]:,} pages: ',
+               (f'{(time.time() - start) * 1e3:,.0f}ms', Text.value),
+               ' ', (f'{sum(len(p) for p in pages["pages"].values()) / 1e6:,.1f}M', Text.subtle), ' characters')
+
+    start = time.time()
+    lines = key.load().get_lines(tail=100)
+    logger.log(f'{model_cls.__name__:<20} last 100 of {lines["n_lines"]:,} lines: ',
+               (f'{(time.time() - start) * 1e3:,.1f}ms', Text.value))
+
+    start = time.time()
+    res = key.load().search('step   500,00', context=3)
+    logger.log(f'{model_cls.__name__:<20} search: ',
+               (f'{(time.time() - start) * 1e3:,.0f}ms', Text.value),
+               ' ', (f'{len(res["matches"])}', Text.subtle), ' matches')
+
+
+if __name__ == '__main__':
+    check_console_lines()
+    check()
+    check_chunk_deletes()
+    check_lines()
+    benchmark(UnchunkedStdOutModel, [1, 3])
+    benchmark(StdOutModel, [1, 3, 24])
@@ -1,4 +1,8 @@
-from labml import monit
+import time
+
+import numpy as np
+from labml import monit, logger
+from labml.logger import Text
 from numpy.random import random, randint
 
 from labml_app.db import analyses
@@ -159,7 +163,101 @@ def update_equal_and_diff_gaps_diff_sizes(prev: int = 0, size=5, gap: int = 1, m
     print(data['step'].tolist())
 
 
+def check_shared_data():
+    """Updates don't change the data of an earlier ``to_data``"""
+    s = analyses.series.Series(max_buffer_length=100)
+    s.update(list(range(90)), random(90).tolist())
+    data = s.to_data()
+    copy = {k: np.copy(data[k]) for k in ['step', 'last_step', 'value']}
+
+    # two series loaded from the same data
+    a = analyses.series.Series(max_buffer_length=100).load(data)
+    b = analyses.series.Series(max_buffer_length=100).load(data)
+    a.update(list(range(90, 120)), [1.] * 30)
+    b.update(list(range(90, 120)), [2.] * 30)
+
+    for k, v in copy.items():
+        assert np.array_equal(data[k], v), k
+    assert np.all(a.value[-5:] == 1.) and np.all(b.value[-5:] == 2.)
+
+
+def check_owner(n_updates: int = 2_000, size: int = 10):
+    """A series loaded as the owner of the data appends in place, and gives the same results"""
+    day = 24 * 60 * 60
+    shared = owned = analyses.series.Series().to_data()
+    t = 0.
+    for _ in range(n_updates):
+        # 200 points a day, so that points older than a day are removed
+        step = (t + np.arange(size) * day / 200).tolist()
+        value = random(size).tolist()
+        t += size * day / 200
+
+        s = analyses.series.Series(max_buffer_length=500, keep_last_24h=True).load(shared)
+        s.update(step, value)
+        shared = s.to_data()
+
+        s = analyses.series.Series(max_buffer_length=500, keep_last_24h=True).load(owned, is_owner=True)
+        buffer = s._value
+        s.update(step, value)
+        owned = s.to_data()
+
+    assert np.shares_memory(buffer, owned['value'])
+    for k in ['step', 'last_step', 'value']:
+        assert np.array_equal(shared[k], owned[k]), k
+    assert np.isclose(owned['mean'], np.mean(owned['value']), rtol=1e-12), (owned['mean'], np.mean(owned['value']))
+
+
+def check_mean(n_updates: int = 10_000, size: int = 10):
+    data = analyses.series.Series().to_data()
+    prev = 0
+    for _ in range(n_updates):
+        s = analyses.series.Series().load(data, is_owner=True)
+        s.update(list(range(prev, prev + size)), (random(size) * 1e6).tolist())
+        data = s.to_data()
+        prev += size
+
+    assert np.isclose(data['mean'], np.mean(data['value']), rtol=1e-12), (data['mean'], np.mean(data['value']))
+
+
+def benchmark_update(lengths=(1_000, 10_000, 100_000, 1_000_000), n_updates: int = 1_000, size: int = 10):
+    """Time per update (``load``, ``update`` and ``to_data``) for series of different lengths"""
+    update_times = []
+    for length in lengths:
+        s = analyses.series.Series(max_buffer_length=2 * length)
+        s.update(list(range(length)), random(length).tolist())
+        data = s.to_data()
+
+        prev = length
+        start = time.time()
+        for _ in range(n_updates):
+            s = analyses.series.Series(max_buffer_length=2 * length).load(data, is_owner=True)
+            s.update(list(range(prev, prev + size)), random(size).tolist())
+            data = s.to_data()
+            prev += size
+        update_time = (time.time() - start) / n_updates
+        update_times.append(update_time)
+
+        # appending with ``np.concatenate``, which copies the whole series
+        values = data['value']
+        start = time.time()
+        for _ in range(n_updates):
+            values = np.concatenate((values, random(size)))
+        concatenate_time = (time.time() - start) / n_updates
+
+        logger.log(f'{length:>9,}: ',
+                   (f'{update_time * 1e6:,.1f}us', Text.value), ' per update, ',
+                   (f'{concatenate_time * 1e6:,.1f}us', Text.value), ' per concatenate')
+
+    # the time per update doesn't depend on the length of the series
+    assert max(update_times) < 3 * min(update_times), update_times
+
+
 if __name__ == "__main__":
+    check_shared_data()
+    check_owner()
+    check_mean()
+    benchmark_update()
+
     with monit.section("Equal gap"):
         update_equal_gap_equal_sizes(size=10000, max_step=1_000_000, gap=1)
 
@@ -0,0 +1,95 @@
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from labml import logger, monit
+from labml.logger import Text
+from labml_db import Model
+from labml_db.driver.file import FileDbDriver
+from labml_db.serializer.pickle import PickleSerializer
+
+from labml_app.db import analyses
+from labml_app.analyses.series_lod import SeriesLOD, SeriesLODChunkModel, LOD_FACTOR
+
+
+def set_chunk_driver(path: Path):
+    Model.set_db_drivers([FileDbDriver(PickleSerializer(), SeriesLODChunkModel, path)])
+
+
+def build(values: np.ndarray, rng: np.random.Generator) -> SeriesLOD:
+    lod = SeriesLOD('test')
+    i = 0
+    while i < len(values):
+        n = int(rng.integers(1, 500))
+        chunks, retired = [], []
+        lod.update(list(range(i, min(i + n, len(values)))), values[i:i + n], chunks, retired)
+        retired = set(retired)
+        SeriesLODChunkModel.msave([c for c in chunks if str(c.key) not in retired])
+        i += n
+
+    return lod
+
+
+def check(lod: SeriesLOD, values: np.ndarray, start: int, end: int, width: int):
+    data = lod.get(start, end, width)
+    factor = data['factor']
+
+    last_step = data['last_step'].astype(int)
+    assert last_step[0] >= start and last_step[0] - factor < start
+    assert last_step[-1] >= min(end, len(values) - 1)
+
+    for i, ls in enumerate(last_step):
+        if ls == len(values) - 1 and (ls + 1) % factor != 0:
+            first = ls - ls % factor
+        else:
+            first = ls - factor + 1
+        bucket = values[first:ls + 1]
+        assert np.isclose(data['value'][i], bucket.mean()), (i, data['level'])
+        assert data['min'][i] == bucket.min() and data['max'][i] == bucket.max()
+
+    if data['level'] != len(lod.levels) - 1 and len(last_step) >= 2:
+        assert len(last_step) < width * LOD_FACTOR + 2
+
+
+def compare(n: int = 300_000, n_queries: int = 200, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=n).cumsum()
+
+    with tempfile.TemporaryDirectory() as path:
+        set_chunk_driver(Path(path))
+        lod = build(values, rng)
+
+        for _ in monit.iterate('Compare', n_queries):
+            width = int(rng.integers(1, 2000))
+            if rng.random() < 0.5:
+                start = int(rng.integers(0, n))
+                end = int(rng.integers(start, n))
+            else:
+                start = int(rng.integers(n - 5000, n))
+                end = n - 1
+            check(lod, values, start, end, width)
+
+    logger.log('Levels: ', (f'{len(lod.levels)}', Text.value), ' ', ('OK', Text.success))
+
+
+def benchmark(n: int = 1_000_000, width: int = 1_000):
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=n)
+
+    with tempfile.TemporaryDirectory() as path:
+        set_chunk_driver(Path(path))
+        lod = build(values, rng)
+
+        for name, (start, end) in {'last 1k steps': (n - 1_000, n),
+                                   'all steps': (None, None)}.items():
+            start_time = time.time()
+            data = lod.get(start, end, width)
+            logger.log(f'{name}: ',
+                       (f'{(time.time() - start_time) * 1000:,.2f}ms', Text.value),
+                       f' level {data["level"]}, {len(data["step"])} points')
+
+
+if __name__ == "__main__":
+    compare()
+    benchmark()
@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+from labml import logger, monit
+from labml.logger import Text
+
+from labml_app.db import analyses
+from labml_app.analyses.series import Series, merge_numpy
+
+
+def get_merge_functions(s: Series):
+    def numpy_merge(values, last_step, steps, prev_last_step, i):
+        return merge_numpy(values, last_step, steps, float(s.step_gap), float(prev_last_step), i)
+
+    merges = {'old': s._merge_old, 'numpy': numpy_merge}
+    try:
+        import labml_fast_merge
+        s.labml_fast_merge = labml_fast_merge
+        merges['cython'] = s._merge_new
+    except ImportError:
+        logger.log('labml_fast_merge is not installed', Text.warning)
+
+    return merges
+
+
+def random_stream(rng: np.random.Generator, n: int):
+    gaps = rng.choice([0., 1e-4, 0.5, 1., 2., 10.], size=n, p=[0.1, 0.05, 0.1, 0.5, 0.2, 0.05])
+    gaps *= rng.integers(1, 4, size=n)
+    last_step = np.cumsum(gaps) + rng.integers(0, 100)
+    steps = last_step - rng.random(n) * gaps
+    values = rng.normal(size=n)
+
+    return values, last_step, steps
+
+
+def compare(n_cases: int = 2_000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    s = Series()
+    merges = get_merge_functions(s)
+
+    for _ in monit.iterate('Compare', n_cases):
+        n = int(rng.integers(1, 200))
+        values, last_step, steps = random_stream(rng, n)
+        i = int(rng.integers(0, n))
+        prev_last_step = float(last_step[i - 1]) if i > 0 else 0.
+        s.step_gap = float(rng.choice([1., 2., 3.5, 8., 64.]))
+
+        results = {}
+        for name, merge in merges.items():
+            v, ls, st = values.copy(), last_step.copy(), steps.copy()
+            size = merge(v, ls, st, prev_last_step, i)
+            results[name] = (size, v[:size], ls[:size], st[:size])
+
+        size, v, ls, st = results['old']
+        for name, res in results.items():
+            assert res[0] == size, (name, res[0], size)
+            assert np.array_equal(res[2], ls), name
+            assert np.allclose(res[1], v, rtol=1e-9, atol=1e-12), name
+            assert np.allclose(res[3], st, rtol=1e-9, atol=1e-12), name
+
+    logger.log(f'{", ".join(merges.keys())}: ', ('equivalent', Text.success))
+
+
+def benchmark(n: int = 100_000, step_gap: float = 8.):
+    s = Series()
+    s.step_gap = step_gap
+    merges = get_merge_functions(s)
+    values, last_step, steps = random_stream(np.random.default_rng(1), n)
+
+    for name, merge in merges.items():
+        v, ls, st = values.copy(), last_step.copy(), steps.copy()
+        start = time.time()
+        merge(v, ls, st, 0, 0)
+        logger.log(f'{name}: ', (f'{(time.time() - start) * 1000:,.2f}ms', Text.value))
+
+
+if __name__ == "__main__":
+    compare()
+    benchmark()
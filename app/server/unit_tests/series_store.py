@@ -0,0 +1,82 @@
+import pickle as pkl
+
+import bson
+from labml import logger
+from labml.logger import Text
+from numpy.random import random
+
+from labml_app.db import analyses
+from labml_app.analyses.experiments.metrics import MetricsModel
+from labml_app.analyses.series_store import SeriesStore
+
+
+def pickled_size(key: str, data) -> int:
+    return len(bson.encode({'_id': key, 'data': pkl.dumps(data)}))
+
+
+def segments_size(key: str, store: SeriesStore, data) -> int:
+    header, segments, trims = store.dump(key, data)
+    size = pickled_size(key, header)
+    for s in segments:
+        size += len(bson.encode(s))
+
+    return size
+
+
+def bytes_written_per_update(n_indicators: int = 300, n_updates: int = 200, size: int = 10):
+    m = MetricsModel()
+    store = SeriesStore()
+
+    step = 0
+    pickled = 0
+    segmented = 0
+    for i in range(n_updates):
+        data = {}
+        for j in range(n_indicators):
+            data[f'loss.{j}'] = {'step': list(range(step, step + size)), 'value': random(size).tolist()}
+        step += size
+
+        for ind, series in data.items():
+            m.step = max(m.step, series['step'][-1])
+            m._update_series(ind, series, False)
+
+        d = m.to_dict()
+        pickled += pickled_size(m._key, d)
+        segmented += segments_size(m._key, store, d)
+        store.mark_clean(d)
+
+    logger.log('Pickled model: ', (f'{pickled / n_updates / 1024:,.1f}KB', Text.value), ' per update')
+    logger.log('Series segments: ', (f'{segmented / n_updates / 1024:,.1f}KB', Text.value), ' per update')
+
+
+def load_dump(n_indicators: int = 10, n_updates: int = 200, size: int = 7):
+    m = MetricsModel()
+    store = SeriesStore(segment_length=16)
+    saved = {}
+
+    step = 0
+    for i in range(n_updates):
+        for j in range(n_indicators):
+            series = {'step': list(range(step, step + size)), 'value': random(size).tolist()}
+            m._update_series(f'loss.{j}', series, False)
+        step += size
+
+        d = m.to_dict()
+        header, segments, trims = store.dump(m._key, d)
+        for field, ind, n in trims:
+            saved = {k: s for k, s in saved.items() if (s['field'], s['ind']) != (field, ind) or s['idx'] < n}
+        for s in segments:
+            saved[s['_id']] = s
+        store.mark_clean(d)
+
+        loaded = store.load(header, list(saved.values()))
+        for ind, series in d['tracking'].items():
+            for c in ['step', 'last_step', 'value']:
+                assert (loaded['tracking'][ind][c] == series[c]).all(), (ind, c)
+
+    logger.log('Load and dump: ', ('OK', Text.success))
+
+
+if __name__ == "__main__":
+    load_dump()
+    bytes_written_per_update()
@@ -0,0 +1,97 @@
+import json
+import time
+import zlib
+
+import numpy as np
+from labml import logger
+from labml.internal.app import wire as client_wire
+from labml.logger import Text
+
+from labml_app import wire
+
+
+def packets(n_indicators: int, n_points: int):
+    track = {}
+    for i in range(n_indicators):
+        step = np.arange(1_000_000_000, 1_000_000_000 + n_points, dtype=np.float64)
+        track[f'loss.{i}'] = {'step': step, 'value': np.random.random(n_points)}
+
+    return [{'track': track, 'time': time.time(), 'stdout': 'step 1\n'}]
+
+
+def check_round_trip():
+    data = packets(3, 10)
+    decoded = wire.decode_msgpack(client_wire.encode_msgpack(data))
+    from_json = json.loads(client_wire.encode_json(data))
+
+    assert decoded[0]['stdout'] == from_json[0]['stdout']
+    for ind, s in from_json[0]['track'].items():
+        assert np.array_equal(decoded[0]['track'][ind]['step'], s['step'])
+        assert np.array_equal(decoded[0]['track'][ind]['value'], s['value'])
+
+
+def check_precision():
+    track = {
+        'process.1.create_time': {'step': np.array([1760750123.45]), 'value': np.array([1760750123.45])},
+        'net.recv': {'step': np.array([1760750123.45]), 'value': np.array([123_456_789_123])},
+        'loss': {'step': np.array([1., 2.]), 'value': np.array([0.5, np.nan])},
+    }
+    body = client_wire.encode_msgpack([{'track': track}])
+    decoded = wire.decode_msgpack(body)[0]['track']
+    for ind, s in track.items():
+        assert np.array_equal(decoded[ind]['value'], s['value'], equal_nan=True), ind
+    # values that are exact in ``float32`` are sent as ``float32``
+    assert decoded['loss']['value'].dtype == np.float32
+    assert decoded['process.1.create_time']['value'].dtype == np.float64
+
+
+def check_compression():
+    body = client_wire.encode_json(packets(3, 10))
+    assert wire.decompress(client_wire.compress(body)) == body
+
+    try:
+        wire.decompress(b'not compressed')
+        assert False
+    except zlib.error:
+        pass
+
+
+def _gzip(encode):
+    return lambda data: client_wire.compress(encode(data))
+
+
+def _gunzip(decode):
+    return lambda body: decode(wire.decompress(body))
+
+
+def benchmark(n_indicators: int = 1_000, n_points: int = 100, repeat: int = 10):
+    data = packets(n_indicators, n_points)
+    for name, encode, decode in [('json', client_wire.encode_json, json.loads),
+                                 ('json+gzip', _gzip(client_wire.encode_json), _gunzip(json.loads)),
+                                 ('msgpack', client_wire.encode_msgpack, wire.decode_msgpack),
+                                 ('msgpack+gzip', _gzip(client_wire.encode_msgpack), _gunzip(wire.decode_msgpack))]:
+        start = time.time()
+        for _ in range(repeat):
+            body = encode(data)
+        encode_time = (time.time() - start) / repeat
+
+        start = time.time()
+        for _ in range(repeat):
+            decode(body)
+        decode_time = (time.time() - start) / repeat
+
+        logger.log(f'{name:>12}: ', (f'{len(body) / 1024:,.0f}KB', Text.value),
+                   ' encode ', (f'{encode_time * 1000:,.1f}ms', Text.value),
+                   ' decode ', (f'{decode_time * 1000:,.1f}ms', Text.value))
+
+
+if __name__ == '__main__':
+    check_round_trip()
+    check_precision()
+    check_compression()
+    benchmark()
+
+    logs = ''.join(f'Epoch {i}: loss 0.{i:04d} accuracy 0.9{i:03d}\n' for i in range(1_000))
+    body = client_wire.encode_json([{'stdout': logs}])
+    logger.log('stdout: ', (f'{len(body) / len(client_wire.compress(body)):,.1f}', Text.value),
+               ' compression ratio')
@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from labml.internal.metrics.compare import Comparison
+
+
+def get_run_path(run_uuid: str) -> Path:
+    r"""
+    Get the path of a run
+
+    Arguments:
+        run_uuid (str): UUID of the run
+    """
+    from labml import lab
+    from labml.internal.manage.runs import get_run_by_uuid
+
+    run_path = get_run_by_uuid(lab.get_experiments_path(), run_uuid)
+    if run_path is None:
+        raise ValueError(f'Could not find run {run_uuid}')
+
+    return run_path
+
+
+def indicators(run_uuid: str) -> List[str]:
+    r"""
+    Get the names of the indicators tracked in a run
+
+    Arguments:
+        run_uuid (str): UUID of the run
+    """
+    from labml.internal.metrics.reader import RunMetrics
+
+    with RunMetrics(get_run_path(run_uuid)) as metrics:
+        return metrics.keys()
+
+
+def load(run_uuid: str, *names: str,
+         start_step: Optional[int] = None,
+         end_step: Optional[int] = None,
+         max_points: Optional[int] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    r"""
+    Load indicators of a run as numpy arrays
+
+    The mean of the values tracked at each step is returned,
+    as a tuple of ``(step, value)`` arrays for each indicator.
+    Indicators in ``log.jsonl`` of runs from earlier versions are read
+    through an index, that is saved next to the log the first time it is read.
+
+    Arguments:
+        run_uuid (str): UUID of the run
+        names (str): names of the indicators
+
+    Keyword Arguments:
+        start_step (int, optional): load values from this step
+        end_step (int, optional): load values before this step
+        max_points (int, optional): average consecutive steps so that there are
+            at most ``max_points`` values
+    """
+    from labml.internal.metrics.reader import RunMetrics, downsample
+
+    res = {}
+    with RunMetrics(get_run_path(run_uuid)) as metrics:
+        for name in names:
+            values = metrics.get(name, start_step, end_step)
+            step, value = values.step.copy(), values.mean()
+            if max_points is not None:
+                step, value = downsample(step, value, max_points)
+            res[name] = (step, value)
+
+    return res
+
+
+def compare(run_uuids: List[str], name: str, *,
+            start_step: Optional[int] = None,
+            end_step: Optional[int] = None,
+            n_points: int = 1_000,
+            is_higher_better: bool = False,
+            processes: Optional[int] = None) -> 'Comparison':
+    r"""
+    Compare an indicator across runs
+
+    The indicator is loaded from the runs in parallel processes,
+    and each run is downsampled to ``n_points`` and interpolated on a common grid of steps.
+    The returned comparison has ``step``, the ``values`` of each run,
+    ``mean`` and ``std`` across runs, and the ``ranking`` of the runs by their last value.
+
+    Arguments:
+        run_uuids (List[str]): UUIDs of the runs
+        name (str): name of the indicator
+
+    Keyword Arguments:
+        start_step (int, optional): compare values from this step
+        end_step (int, optional): compare values before this step
+        n_points (int, optional): number of steps to align the runs on
+        is_higher_better (bool, optional): whether runs with higher values rank better
+        processes (int, optional): number of processes to load the runs.
+            Defaults to the number of CPUs
+    """
+    from labml import lab
+    from labml.internal.manage.runs import get_runs
+    from labml.internal.metrics.compare import compare as _compare
+
+    run_paths = {p.name: p for p in get_runs(lab.get_experiments_path())}
+    missing = [u for u in run_uuids if u not in run_paths]
+    if missing:
+        raise ValueError(f'Could not find runs {", ".join(missing)}')
+
+    return _compare([run_paths[u] for u in run_uuids], name,
+                    start_step=start_step, end_step=end_step, n_points=n_points,
+                    is_higher_better=is_higher_better, processes=processes)
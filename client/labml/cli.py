@@ -4,6 +4,7 @@ import subprocess
 import sys
 import threading
 import time
+from pathlib import Path
 from typing import List
 
 from labml import logger, experiment
@@ -21,6 +22,7 @@ COMMAND_LAUNCH = 'launch'
 COMMAND_MONITOR = 'monitor'
 COMMAND_SERVICE = 'service'
 COMMAND_SERVICE_RUN = 'service-run'
+COMMAND_CONVERT_LOG = 'convert-log'
 
 
 def _start_app_server(ip: str, port: int):
@@ -193,6 +195,22 @@ def _service_run():
     monitoring_process.run(True, False)
 
 
+def _convert_log(paths: List[str]):
+    from labml.internal.metrics.log_file import convert_jsonl
+
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            path = path / 'log.jsonl'
+        metrics_path = path.parent / 'metrics.bin'
+        if metrics_path.exists():
+            logger.log([('Skipping ', Text.warning), (str(path), Text.value), ' metrics.bin exists'])
+            continue
+
+        convert_jsonl(path, metrics_path)
+        logger.log(['Converted ', (str(path), Text.value)])
+
+
 def main():
     parser = argparse.ArgumentParser(description='labml.ai CLI', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     subparser = parser.add_subparsers(title='command', dest='command', required=True)
@@ -211,6 +229,10 @@ def main():
     subparser.add_parser(COMMAND_SERVICE, help='Setup and start a service for hardware monitoring')
     subparser.add_parser(COMMAND_SERVICE_RUN, help='Start hardware monitoring (for internal use)')
 
+    convert_log_parser = subparser.add_parser(COMMAND_CONVERT_LOG,
+                                              help='Convert log.jsonl files of runs to binary metrics logs')
+    convert_log_parser.add_argument('paths', nargs='+', help='Run folders or log.jsonl files')
+
     args = parser.parse_args()
 
     if args.command == COMMAND_APP_SERVER:
@@ -225,6 +247,8 @@ def main():
         _service()
     elif args.command == COMMAND_SERVICE_RUN:
         _service_run()
+    elif args.command == COMMAND_CONVERT_LOG:
+        _convert_log(args.paths)
     else:
         raise ValueError('Unknown command', args.command)
 
@@ -3,7 +3,6 @@ import socket
 import threading
 import time
 import urllib.error
-import urllib.request
 from dataclasses import dataclass
 from queue import Queue
 from typing import Dict, Optional, Set, List
@@ -12,6 +11,8 @@ import labml
 from labml import logger
 from labml.logger import Text
 from labml.utils.notice import labml_notice
+from . import wire
+from .connection import get_connection_pool
 
 UPDATING_APP_MESSAGE = 'Updating App. Please wait'
 
@@ -51,12 +52,19 @@ class _AppTrackThread(threading.Thread):
         self.is_stopped = False
         self.errored = False
         self.handlers: List[AppTrackResponseHandler] = []
+        # the server tells how long to wait before the next push
+        self.next_push_time = 0.
+        self.stop_event = threading.Event()
+        # switch to msgpack and compression once the server says it can decode them
+        self.use_msgpack = False
+        self.use_gzip = False
 
     def push_data_source(self, data_source: AppTrackDataSource):
         self.queue.put(data_source)
 
     def stop(self):
         self.is_stopped = True
+        self.stop_event.set()
         logger.log('Still updating labml server, please wait for it to complete...', Text.highlight)
         self.please_wait_count = 1
 
@@ -93,8 +101,14 @@ class _AppTrackThread(threading.Thread):
         packets = [s.get_data_packet() for s in sources]
         return [p for p in packets if not self._is_updating_notification(p)]
 
+    def _wait_for_next_push(self):
+        delay = self.next_push_time - time.time()
+        if delay > 0 and not self.is_stopped:
+            self.stop_event.wait(delay)
+
     def run(self):
         while True:
+            self._wait_for_next_push()
             packets = self._get_packets()
             if self.is_stopped:
                 if not packets:
@@ -135,6 +149,9 @@ class _AppTrackThread(threading.Thread):
         try:
             response = self._send(data)
         except urllib.error.HTTPError as e:
+            # the server might not decode msgpack or gzip anymore, retry with plain JSON
+            self.use_msgpack = False
+            self.use_gzip = False
             labml_notice([
                 (str(e.reason), Text.key),
                 ' ',
@@ -163,6 +180,10 @@ class _AppTrackThread(threading.Thread):
             ], is_lite=True)
             return False
 
+        self.next_push_time = time.time() + response.get('push_interval', 0.)
+        self.use_msgpack = 'msgpack' in response.get('formats', []) and wire.is_msgpack_available()
+        self.use_gzip = 'gzip' in response.get('encodings', [])
+
         for h in self.handlers:
             if h.handle(response):
                 break
@@ -170,16 +191,21 @@ class _AppTrackThread(threading.Thread):
         return True
 
     def _send(self, data: List[Dict[str, any]]) -> Dict:
-        req = urllib.request.Request(self.url)
-        req.add_header('Content-Type', 'application/json; charset=utf-8')
-        data_json = json.dumps(data)
-        data_json = data_json.encode('utf-8')
-        req.add_header('Content-Length', str(len(data_json)))
+        headers = {}
+        if self.use_msgpack:
+            headers['Content-Type'] = wire.MSGPACK_CONTENT_TYPE
+            body = wire.encode_msgpack(data)
+        else:
+            headers['Content-Type'] = wire.JSON_CONTENT_TYPE
+            body = wire.encode_json(data)
+        if self.use_gzip and len(body) >= wire.COMPRESSION_THRESHOLD:
+            headers['Content-Encoding'] = 'gzip'
+            body = wire.compress(body)
+        headers['Content-Length'] = str(len(body))
 
-        # print('Data size', len(data_json))
-        response = urllib.request.urlopen(req, data_json, timeout=self.timeout_seconds)
-        content = response.read().decode('utf-8')
-        result = json.loads(content)
+        # print('Data size', len(body))
+        content = get_connection_pool().post(self.url, body, headers, timeout=self.timeout_seconds)
+        result = json.loads(content.decode('utf-8'))
 
         for e in result.get('errors', []):
             if 'error' in e:
@@ -212,6 +238,7 @@ class AppTracker:
         self.daemon = daemon
         params.copy()
         params['labml_version'] = labml.__version__
+        params['rate_control'] = 'true'
         params = '&'.join([f'{k}={v}' for k, v in params.items()])
 
         self.app_track_url = f'{app_track_url}{params}'
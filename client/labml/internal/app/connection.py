@@ -0,0 +1,165 @@
+import http.client
+import io
+import select
+import socket
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Tuple, Optional
+
+# idle connections kept per server
+MAX_IDLE_CONNECTIONS = 4
+
+_ServerKey = Tuple[str, str]
+
+
+class ConnectionPool:
+    """
+    Keep-alive connections to labml servers.
+
+    Connections are reused across requests to the same server.
+    Idle connections that the server has closed are dropped before they are reused.
+    A request is retried on a new connection only if sending it fails on a reused connection;
+     once it is sent, the server might have handled it, and it is not sent again.
+    Errors are raised as the same exceptions as ``urllib.request.urlopen``,
+     and requests that go through a proxy or get redirected are sent with ``urllib``.
+    """
+
+    def __init__(self, max_idle: int = MAX_IDLE_CONNECTIONS):
+        self.max_idle = max_idle
+        self._idle: Dict[_ServerKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.requests = 0
+
+    @staticmethod
+    def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+        """Whether the server has closed an idle connection; it's readable if it did"""
+        if conn.sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+
+        return bool(readable)
+
+    def _get(self, key: _ServerKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        while True:
+            with self._lock:
+                idle = self._idle.get(key, [])
+                conn = idle.pop() if idle else None
+                if conn is None:
+                    self.opened += 1
+                    break
+
+            if self._is_dropped(conn):
+                conn.close()
+                continue
+
+            conn.timeout = timeout
+            conn.sock.settimeout(timeout)
+            return conn, True
+
+        scheme, netloc = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=timeout), False
+        else:
+            return http.client.HTTPConnection(netloc, timeout=timeout), False
+
+    def _put(self, key: _ServerKey, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    @staticmethod
+    def _is_proxied(url: urllib.parse.SplitResult) -> bool:
+        return url.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(url.hostname)
+
+    @staticmethod
+    def _urlopen(url: str, body: Optional[bytes], headers: Dict[str, str], timeout: float) -> bytes:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, body, timeout=timeout) as response:
+            return response.read()
+
+    def request(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str], *,
+                timeout: float) -> bytes:
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ('http', 'https') or self._is_proxied(parsed):
+            return self._urlopen(url, body, headers, timeout)
+
+        key = (parsed.scheme, parsed.netloc)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+
+        self.requests += 1
+        while True:
+            conn, is_reused = self._get(key, timeout)
+            try:
+                conn.request(method, path, body, headers)
+            except (ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # the server closed the connection before the request was sent
+                if is_reused:
+                    continue
+                raise
+            except socket.timeout:
+                conn.close()
+                raise
+            except OSError as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+            except Exception:
+                conn.close()
+                raise
+
+            try:
+                response = conn.getresponse()
+                content = response.read()
+            except (socket.timeout, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                raise
+            except OSError as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+            except Exception:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._put(key, conn)
+
+            if 300 <= response.status < 400:
+                return self._urlopen(url, body, headers, timeout)
+            if response.status >= 400:
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers,
+                                             io.BytesIO(content))
+
+            return content
+
+    def post(self, url: str, body: bytes, headers: Dict[str, str], *, timeout: float) -> bytes:
+        return self.request('POST', url, body, headers, timeout=timeout)
+
+
+_pool = ConnectionPool()
+
+
+def get_connection_pool() -> ConnectionPool:
+    return _pool
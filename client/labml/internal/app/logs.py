@@ -5,6 +5,7 @@ from io import StringIO
 from typing import Optional
 
 from labml.internal.app import AppTracker, AppTrackDataSource, Packet
+from labml.internal.util.strings import remove_overwritten_output
 
 WARMUP_COMMITS = 5
 
@@ -42,29 +43,6 @@ class AppConsoleLogs(AppTrackDataSource):
             self.commits_count += 1
             self.app_tracker.has_data(self)
 
-    def _clean(self, data: str):
-        last_newline = None
-        remove = []
-        for i in range(len(data)):
-            if data[i] == '\r':
-                if i + 1 < len(data) and data[i + 1] == '\n':
-                    remove.append((i, i))
-                elif last_newline is not None:
-                    remove.append((last_newline + 1, i))
-                last_newline = i
-            elif data[i] == '\n':
-                last_newline = i
-
-        res = []
-        offset = 0
-        for r in remove:
-            if offset < r[0]:
-                res.append(data[offset: r[0]])
-            offset = r[1] + 1
-
-        res.append(data[offset:])
-        return ''.join(res)
-
     def get_data_packet(self) -> Packet:
         with self.lock:
             self.last_committed = time.time()
@@ -72,7 +50,7 @@ class AppConsoleLogs(AppTrackDataSource):
             for type_ in ['stdout', 'logger']:
                 if type_ not in self.data:
                     continue
-                self.data[type_] = self._clean(self.data[type_])
+                self.data[type_] = remove_overwritten_output(self.data[type_])
             packet = Packet(self.data)
             self.data = {}
             return packet
@@ -0,0 +1,88 @@
+import gzip
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+# msgpack extension type of numpy arrays; the payload is the length of the dtype string,
+#  the dtype string and the array buffer
+NDARRAY_EXT = 1
+
+# bodies smaller than this are sent uncompressed
+COMPRESSION_THRESHOLD = 1024
+COMPRESSION_LEVEL = 1
+
+Packets = List[Dict[str, Any]]
+
+
+def is_msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def encode_json(data: Packets) -> bytes:
+    return json.dumps(data, default=_json_default).encode('utf-8')
+
+
+def _msgpack_default(o: Any) -> Any:
+    if isinstance(o, np.ndarray):
+        dtype = o.dtype.str.encode('ascii')
+        return msgpack.ExtType(NDARRAY_EXT, bytes([len(dtype)]) + dtype + np.ascontiguousarray(o).tobytes())
+    if isinstance(o, np.generic):
+        return o.item()
+
+    raise TypeError(f'Object of type {type(o).__name__} is not msgpack serializable')
+
+
+def _to_array(values: Any) -> Any:
+    array = np.asarray(values)
+    if array.ndim != 1 or array.dtype.kind not in 'iuf':
+        return values
+
+    return array.astype(np.float64, copy=False)
+
+
+def _downcast(array: Any) -> Any:
+    """``float32`` if the values survive the round trip unchanged"""
+    if not isinstance(array, np.ndarray):
+        return array
+
+    downcast = array.astype(np.float32)
+    if np.array_equal(downcast.astype(np.float64), array, equal_nan=True):
+        return downcast
+
+    return array
+
+
+def _encode_track(track: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # values are ``float64``, so that timestamps and large counters of the computer monitor are exact
+    return {k: {**s,
+                'step': _to_array(s['step']),
+                'value': _downcast(_to_array(s['value']))}
+            for k, s in track.items()}
+
+
+def encode_msgpack(data: Packets) -> bytes:
+    """Encodes the packets with the tracked steps and values as raw buffers"""
+    data = [{**d, 'track': _encode_track(d['track'])} if 'track' in d else d for d in data]
+
+    return msgpack.packb(data, default=_msgpack_default)
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=COMPRESSION_LEVEL, mtime=0)
@@ -69,6 +69,7 @@ class Computer:
 
         self.uuid = config['uuid']
         self.name = config['name']
+        self.monitor_intervals = config['monitor_intervals'] or {}
 
         app_url = get_app_url_for_handle('', base_url=config['app_url'])
 
@@ -95,7 +96,9 @@ class Computer:
             app_url=None,
             app_track_frequency=0,
             app_open_browser=True,
-            name='computer_name'
+            name='computer_name',
+            # seconds between samples of each probe, e.g. ``{'processes': 30, 'cpu': 1}``
+            monitor_intervals={},
         )
 
     def get_projects(self) -> Set[str]:
@@ -13,7 +13,7 @@ class MonitorComputer:
                                 daemon=True)
         self.writer = Writer(app_tracker, frequency=computer_singleton().app_configs.frequency)
         self.header = Header(app_tracker, open_browser=open_browser)
-        self.scanner = Scanner()
+        self.scanner = Scanner(computer_singleton().monitor_intervals)
 
     def start(self):
         self.header.start(self.scanner.configs())
@@ -21,3 +21,6 @@ class MonitorComputer:
 
     def track(self):
         self.writer.track(self.scanner.track())
+
+    def wait_time(self):
+        return self.scanner.wait_time()
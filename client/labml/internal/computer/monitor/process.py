@@ -1,7 +1,45 @@
-from typing import Dict, List
+import os
+import time
+from typing import Dict, List, Optional, Tuple
 
 import psutil
 
+PROC_PATH = '/proc'
+# ``/proc/[pid]/stat`` fields after the name, from ``state``
+_STAT_PPID = 1
+_STAT_UTIME = 11
+_STAT_STIME = 12
+_STAT_NUM_THREADS = 17
+_STAT_START_TIME = 19
+_STAT_VSIZE = 20
+_STAT_RSS = 21
+_STAT_BLKIO_TICKS = 39
+_STAT_FIELDS = [_STAT_PPID, _STAT_UTIME, _STAT_STIME, _STAT_NUM_THREADS, _STAT_START_TIME, _STAT_VSIZE, _STAT_RSS]
+# ``comm`` is truncated to this length
+_COMM_LENGTH = 15
+
+
+def is_proc_available():
+    return os.path.exists(f'{PROC_PATH}/self/stat')
+
+
+def _parse_stat(stat: bytes) -> Tuple[str, Dict[int, int]]:
+    """Name and the numeric fields of ``/proc/[pid]/stat``; raises ``ValueError`` if it's incomplete"""
+    name_start = stat.find(b'(')
+    name_end = stat.rfind(b')')
+    if name_start < 0 or name_end < name_start:
+        raise ValueError('Incomplete stat')
+    name = stat[name_start + 1:name_end].decode('utf-8', 'replace')
+    fields = stat[name_end + 2:].split()
+    if len(fields) <= max(_STAT_FIELDS):
+        raise ValueError('Incomplete stat')
+
+    values = {i: int(fields[i]) for i in _STAT_FIELDS}
+    if len(fields) > _STAT_BLKIO_TICKS:
+        values[_STAT_BLKIO_TICKS] = int(fields[_STAT_BLKIO_TICKS])
+
+    return name, values
+
 
 class ProcessInfo:
     key: int
@@ -21,21 +59,38 @@ class ProcessInfo:
         self.cpu_percent = 0
         self.n_cpu_percent = 0
 
+        # total CPU time and when it was read, to calculate CPU percentage from ``/proc``
+        self.cpu_total = None
+        self.cpu_time = None
+
         self.alive = True
         self.active = True
 
 
 class ProcessMonitor:
+    """
+    Tracks the processes that use the most CPU, and processes that use GPUs.
+
+    On Linux, all processes are scanned by reading ``/proc/[pid]/stat``,
+     and the other details are read only for tracked processes.
+    Elsewhere, ``psutil`` is used.
+    """
     pids: Dict[int, int]
     processes: List[ProcessInfo]
 
-    def __init__(self, nvml):
+    def __init__(self, nvml, *, use_proc: Optional[bool] = None):
         self.pids = {}
         self.processes = []
         self.data = {}
         self.nvml = nvml
         self.n_tracking = 0
 
+        self.use_proc = is_proc_available() if use_proc is None else use_proc
+        if self.use_proc:
+            self.clock_ticks = os.sysconf('SC_CLK_TCK')
+            self.page_size = os.sysconf('SC_PAGE_SIZE')
+            self.boot_time = psutil.boot_time()
+
     def _track_gpu(self, idx: int):
         handle = self.nvml.nvmlDeviceGetHandleByIndex(idx)
 
@@ -95,20 +150,23 @@ class ProcessMonitor:
         p.is_tracked = False
         self.n_tracking -= 1
 
+    def _get_key(self, pid: int, name: str):
+        key = None
+        if pid in self.pids:
+            key = self.pids[pid]
+            if self.processes[key].name != name:
+                key = None
+
+        if key is None:
+            key = len(self.processes)
+            self.processes.append(ProcessInfo(key, pid, name))
+            self.pids[pid] = key
+
+        return key
+
     def track_process(self, p: psutil.Process):
         with p.oneshot():
-            key = None
-            if p.pid in self.pids:
-                key = self.pids[p.pid]
-                if self.processes[key].name != p.name():
-                    key = None
-
-            if key is None:
-                key = len(self.processes)
-                self.processes.append(ProcessInfo(key,
-                                                  p.pid,
-                                                  p.name()))
-                self.pids[p.pid] = key
+            key = self._get_key(p.pid, p.name())
 
             proc = self.processes[key]
             proc.active = True
@@ -187,14 +245,118 @@ class ProcessMonitor:
             except (psutil.AccessDenied, psutil.ZombieProcess):
                 pass
 
+    def _read_proc(self, pid: int, name: str):
+        path = f'{PROC_PATH}/{pid}'
+        try:
+            with open(f'{path}/cmdline', 'rb') as f:
+                cmdline = f.read().decode('utf-8', 'replace').rstrip('\0').split('\0')
+        except OSError:
+            cmdline = None
+
+        # same as ``psutil``, since ``comm`` is truncated
+        if len(name) >= _COMM_LENGTH and cmdline and cmdline[0]:
+            exe_name = os.path.basename(cmdline[0])
+            if exe_name.startswith(name):
+                name = exe_name
+
+        data = {'name': name}
+        if cmdline is not None:
+            data['cmdline'] = '\n'.join(cmdline)
+        try:
+            data['exe'] = os.readlink(f'{path}/exe')
+        except OSError:
+            pass
+
+        return data
+
+    def track_proc_stat(self, pid: int, stat: bytes, t: float):
+        """
+        Tracks a process from the contents of ``/proc/[pid]/stat``.
+
+        Raises ``ValueError`` if the contents are incomplete, which happens when the process exits
+         while it's read.
+        """
+        name, fields = _parse_stat(stat)
+
+        key = self._get_key(pid, name)
+        proc = self.processes[key]
+        proc.active = True
+
+        user = fields[_STAT_UTIME] / self.clock_ticks
+        system = fields[_STAT_STIME] / self.clock_ticks
+        rss = fields[_STAT_RSS] * self.page_size
+
+        # same as ``psutil.Process.cpu_percent``
+        cpu_total = user + system
+        if proc.cpu_time is None or t <= proc.cpu_time:
+            cpu_percent = 0.
+        else:
+            cpu_percent = round((cpu_total - proc.cpu_total) / (t - proc.cpu_time) * 100, 1)
+        proc.cpu_total = cpu_total
+        proc.cpu_time = t
+
+        proc.rss = rss
+        proc.cpu_user = user
+        proc.cpu_percent = cpu_percent
+        proc.n_cpu_percent += 1
+
+        if not proc.is_tracked and self._should_track(key):
+            self._start_tracking(key)
+
+            info = self._read_proc(pid, name)
+            self.data.update({f'process.{key}.{k}': v for k, v in info.items()})
+            self.data.update({
+                f'process.{key}.pid': pid,
+                f'process.{key}.ppid': fields[_STAT_PPID],
+                f'process.{key}.create_time': self.boot_time + fields[_STAT_START_TIME] / self.clock_ticks,
+            })
+
+        if proc.is_tracked:
+            self.data.update({
+                f'process.{key}.rss': rss,
+                f'process.{key}.vms': fields[_STAT_VSIZE],
+                f'process.{key}.user': user,
+                f'process.{key}.system': system,
+                f'process.{key}.cpu': cpu_percent,
+                f'process.{key}.threads': fields[_STAT_NUM_THREADS],
+            })
+            if _STAT_BLKIO_TICKS in fields:
+                self.data.update({
+                    f'process.{key}.iowait': fields[_STAT_BLKIO_TICKS] / self.clock_ticks,
+                })
+
+    def _track_proc(self):
+        for pid in os.listdir(PROC_PATH):
+            if not pid.isdigit():
+                continue
+            try:
+                # unbuffered, since the file is read at once
+                fd = os.open(f'{PROC_PATH}/{pid}/stat', os.O_RDONLY)
+                try:
+                    stat = os.read(fd, 4096)
+                finally:
+                    os.close(fd)
+            except OSError:
+                # the process has exited
+                continue
+
+            try:
+                self.track_proc_stat(int(pid), stat, time.monotonic())
+            except ValueError:
+                # the process has exited while it was read
+                continue
+
     def track(self):
         self.data = {}
 
         for p in self.processes:
             p.active = False
 
-        for p in psutil.process_iter():
-            self.track_process(p)
+        if self.use_proc:
+            self._track_proc()
+        else:
+            for p in psutil.process_iter():
+                self.track_process(p)
 
         for p in self.processes:
             if not p.active and p.alive:
@@ -1,17 +1,31 @@
 import time
 from pathlib import Path
+from typing import Dict, Optional
 
 import psutil
 
 from labml import logger
 from labml.internal.computer.configs import computer_singleton
 from labml.internal.computer.monitor.process import ProcessMonitor
+from labml.internal.computer.monitor.schedule import Probe, Schedule
 from labml.logger import Text
 from labml.utils.notice import labml_notice
 
+# name: (interval, budget) in seconds
+PROBES = {
+    'net': (1., 0.05),
+    'memory': (1., 0.05),
+    'cpu': (1., 0.1),
+    'disk': (60., 0.1),
+    'sensors': (10., 0.2),
+    'battery': (30., 0.1),
+    'processes': (30., 1.),
+    'gpu': (1., 0.2),
+}
+
 
 class Scanner:
-    def __init__(self):
+    def __init__(self, intervals: Optional[Dict[str, float]] = None):
         self.data = {}
         self.cache = {}
         self.nvml = None
@@ -34,6 +48,22 @@ class Scanner:
 
         self.process_monitor = ProcessMonitor(self.nvml)
 
+        funcs = {
+            'net': self.track_net_io_counters,
+            'memory': self.track_memory,
+            'cpu': self.track_cpu,
+            'disk': self.track_disk,
+            'sensors': self.track_sensors,
+            'battery': self.track_battery,
+            'processes': self.track_processes,
+            'gpu': self.track_gpu,
+        }
+        self.schedule = Schedule([Probe(name, funcs[name], interval=interval, budget=budget,
+                                        is_required=name == 'cpu')
+                                  for name, (interval, budget) in PROBES.items()])
+        if intervals:
+            self.schedule.set_intervals(intervals)
+
     def configs(self):
         configs = {
             'name': computer_singleton().name,
@@ -189,50 +219,15 @@ class Scanner:
         })
 
     def track(self):
+        """Runs the probes that are due, and returns their samples merged"""
         self.data = {}
-        try:
-            self.track_net_io_counters()
-        except Exception as e:
-            print(f'track_net_io_counters: {e}')
-
-        try:
-            self.track_memory()
-        except Exception as e:
-            print(f'track_memory: {e}')
-
-        try:
-            self.track_cpu()
-        except Exception as e:
-            print(f'track_cpu: {e}')
-            raise e
-
-        try:
-            self.track_disk()
-        except Exception as e:
-            print(f'track_disk: {e}')
-
-        try:
-            self.track_sensors()
-        except Exception as e:
-            print(f'track_sensors: {e}')
-
-        try:
-            self.track_battery()
-        except Exception as e:
-            print(f'track_battery: {e}')
-
-        try:
-            self.track_processes()
-        except Exception as e:
-            print(f'track_processes: {e}')
-
-        try:
-            self.track_gpu()
-        except Exception as e:
-            print(f'track_gpu: {e}')
+        self.schedule.run()
 
         return self.data
 
+    def wait_time(self):
+        return self.schedule.wait_time()
+
     def first(self):
         self.data = {}
         self.first_gpu()
@@ -0,0 +1,80 @@
+"""
+Sampling schedule of the computer monitor.
+
+Each probe runs at its own ``interval``.
+``budget`` is the time in seconds a probe is expected to take;
+ if it takes longer, its interval is stretched by the same ratio,
+ so that a slow probe (e.g. scanning processes on a busy machine)
+ doesn't take over the monitor.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+# weight of the latest measurement in the moving average of the cost of a probe
+COST_SMOOTHING = 0.25
+
+
+class Probe:
+    def __init__(self, name: str, func: Callable[[], None], *,
+                 interval: float, budget: float, is_required: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.budget = budget
+        # exceptions of required probes are not caught
+        self.is_required = is_required
+
+        self.cost: Optional[float] = None
+        self.next_time = 0.
+
+    @property
+    def effective_interval(self) -> float:
+        if self.cost is None or self.cost <= self.budget:
+            return self.interval
+        return self.interval * self.cost / self.budget
+
+    def is_due(self, t: float) -> bool:
+        return self.next_time <= t
+
+    def run(self, t: float):
+        start = time.perf_counter()
+        try:
+            self.func()
+        except Exception as e:
+            print(f'{self.name}: {e}')
+            if self.is_required:
+                raise e
+        finally:
+            cost = time.perf_counter() - start
+            if self.cost is None:
+                self.cost = cost
+            else:
+                self.cost += COST_SMOOTHING * (cost - self.cost)
+            self.next_time = t + self.effective_interval
+
+
+class Schedule:
+    def __init__(self, probes: List[Probe], *, clock: Callable[[], float] = time.monotonic):
+        self.probes = probes
+        self.clock = clock
+
+    def set_intervals(self, intervals: Dict[str, float]):
+        probes = {p.name: p for p in self.probes}
+        for name, interval in intervals.items():
+            if name not in probes:
+                raise ValueError(f'Unknown probe {name}. Probes: {", ".join(probes.keys())}')
+            probes[name].interval = float(interval)
+
+    def run(self) -> List[str]:
+        """Runs the probes that are due, and returns their names"""
+        t = self.clock()
+        due = [p for p in self.probes if p.is_due(t)]
+        for p in due:
+            p.run(t)
+
+        return [p.name for p in due]
+
+    def wait_time(self) -> float:
+        """Seconds until the next probe is due"""
+        return max(0., min(p.next_time for p in self.probes) - self.clock())
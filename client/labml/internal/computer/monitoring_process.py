@@ -82,12 +82,10 @@ def run(is_check_process: bool = True, open_browser: bool = True):
 
     # _sync_thread()
 
-    i = 0
     while True:
         with monit.section('Track', is_new_line=False):
             m.track()
-        time.sleep(min(60.0, max(1.0, i / 5.0)))
-        i += 1
+        time.sleep(m.wait_time())
 
 
 if __name__ == '__main__':
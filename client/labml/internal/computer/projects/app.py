@@ -1,10 +1,10 @@
 import json
 import socket
 import urllib.error
-import urllib.request
 from typing import Dict, List, Any
 
 import labml
+from labml.internal.app.connection import get_connection_pool
 from labml.logger import Text
 from labml.utils.notice import labml_notice
 
@@ -43,15 +43,13 @@ class DirectAppCaller:
         return response
 
     def _send(self, data: List[Dict[str, any]]) -> Dict:
-        req = urllib.request.Request(self.url)
-        req.add_header('Content-Type', 'application/json; charset=utf-8')
         data_json = json.dumps(data)
         data_json = data_json.encode('utf-8')
-        req.add_header('Content-Length', str(len(data)))
+        headers = {'Content-Type': 'application/json; charset=utf-8',
+                   'Content-Length': str(len(data_json))}
 
-        response = urllib.request.urlopen(req, data_json, timeout=self.timeout_seconds)
-        content = response.read().decode('utf-8')
-        result = json.loads(content)
+        content = get_connection_pool().post(self.url, data_json, headers, timeout=self.timeout_seconds)
+        result = json.loads(content.decode('utf-8'))
 
         for e in result.get('errors', []):
             if 'error' in e:
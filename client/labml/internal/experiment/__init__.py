@@ -210,7 +210,7 @@ class Experiment:
 
         if 'file' in self.writers:
             from labml.internal.tracker.writers import file
-            tracker().add_writer(file.Writer(self.run.log_file))
+            tracker().add_writer(file.Writer(self.run.metrics_file))
 
         if 'app' in self.writers:
             app_conf = lab_singleton().app_configs
@@ -85,6 +85,7 @@ class RunInfo:
 
         self.artifacts_folder = self.run_path / "artifacts"
         self.log_file = self.run_path / 'log.jsonl'
+        self.metrics_file = self.run_path / 'metrics.bin'
 
         self.info_path = self.run_path / "run.yaml"
         self.indicators_path = self.run_path / "indicators.yaml"
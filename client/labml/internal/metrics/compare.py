@@ -0,0 +1,108 @@
+"""
+Comparison of an indicator across runs.
+
+The indicator of each run is read and downsampled in a worker process,
+ so that only ``n_points`` values of each run are returned.
+The runs are then interpolated on a common grid of steps.
+"""
+
+import multiprocessing as mp
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .reader import RunMetrics, downsample
+
+Curve = Optional[Tuple[np.ndarray, np.ndarray]]
+
+
+def load_curve(run_path: Path, name: str,
+               start_step: Optional[int], end_step: Optional[int], max_points: int) -> Curve:
+    """Downsampled means of indicator ``name`` of a run, or ``None`` if it's not tracked"""
+    try:
+        with RunMetrics(run_path) as metrics:
+            if name not in metrics:
+                return None
+            values = metrics.get(name, start_step, end_step)
+            if len(values) == 0:
+                return None
+            step, value = downsample(values.step.astype(np.float64), values.mean(), max_points)
+            # keep the range of the run, so that the runs are aligned up to their first and last steps
+            step[0], step[-1] = values.step[0], values.step[-1]
+    except (FileNotFoundError, ValueError):
+        return None
+
+    return step, value
+
+
+def _load_curve(args):
+    return load_curve(*args)
+
+
+class Comparison:
+    """
+    An indicator of a set of runs, aligned on ``step``.
+
+    ``values[i]`` are the values of ``runs[i]``, and are ``nan`` at steps outside the run
+     or if the run has not tracked the indicator.
+    ``ranking`` has the indices of the runs from best to worst by ``scores``,
+     the last value of each run.
+    """
+
+    def __init__(self, runs: List[str], step: np.ndarray, values: np.ndarray, is_higher_better: bool):
+        self.runs = runs
+        self.step = step
+        self.values = values
+
+        self.count = np.sum(~np.isnan(values), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = np.nansum(values, axis=0) / self.count
+            self.std = np.sqrt(np.nansum((values - self.mean) ** 2, axis=0) / self.count)
+
+        self.scores = np.full(len(runs), np.nan)
+        if len(step) > 0:
+            has_values = ~np.isnan(values)
+            is_tracked = has_values.any(axis=1)
+            last = len(step) - 1 - np.argmax(has_values[:, ::-1], axis=1)
+            self.scores[is_tracked] = values[is_tracked, last[is_tracked]]
+
+        order = -self.scores if is_higher_better else self.scores
+        # ``argsort`` puts ``nan`` last
+        self.ranking = np.argsort(order, kind='stable')
+
+    def best(self, n: int = 1) -> List[str]:
+        """Names of the ``n`` best runs"""
+        return [self.runs[i] for i in self.ranking[:n] if not np.isnan(self.scores[i])]
+
+
+def compare(run_paths: List[Path], name: str, *,
+            start_step: Optional[int] = None,
+            end_step: Optional[int] = None,
+            n_points: int = 1_000,
+            is_higher_better: bool = False,
+            processes: Optional[int] = None) -> Comparison:
+    args = [(p, name, start_step, end_step, n_points) for p in run_paths]
+    if processes is None:
+        processes = min(mp.cpu_count(), len(args))
+
+    if processes > 1:
+        with mp.Pool(processes) as pool:
+            curves = pool.map(_load_curve, args, chunksize=max(1, len(args) // (4 * processes)))
+    else:
+        curves = [_load_curve(a) for a in args]
+
+    loaded = [c for c in curves if c is not None]
+    if loaded:
+        first = min(step[0] for step, _ in loaded)
+        last = max(step[-1] for step, _ in loaded)
+        step = np.linspace(first, last, n_points) if last > first else np.array([first])
+    else:
+        step = np.zeros(0)
+
+    values = np.full((len(curves), len(step)), np.nan)
+    for i, c in enumerate(curves):
+        if c is not None:
+            values[i] = np.interp(step, c[0], c[1], left=np.nan, right=np.nan)
+
+    return Comparison([p.name for p in run_paths], step, values, is_higher_better)
@@ -0,0 +1,212 @@
+"""
+Index of the ``log.jsonl`` files written by earlier versions of the file writer.
+
+Each line has the values tracked between two flushes,
+ as ``{"track": {name: [[step, values], ...], ...}, "time": ...}``.
+The index has the byte range of the values of each indicator in each line, and the first and last steps,
+ so that an indicator is read without parsing the rest of the log.
+It is saved next to the log, and is updated with the lines appended after it was built.
+"""
+
+import itertools
+import json
+import os
+import re
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .log_file import IndicatorValues
+
+INDEX_SUFFIX = '.index.npz'
+INDEX_VERSION = 1
+
+_TRACK = re.compile(r'\s*\{\s*"track"\s*:\s*\{')
+_WHITESPACE = re.compile(r'\s*')
+_BRACKET = re.compile(r'[\[\]]')
+_NUMBER = re.compile(r'\s*(-?[0-9][0-9.eE+\-]*)')
+
+_COLUMNS = ['name', 'offset', 'length', 'first_step', 'last_step', 'is_line']
+
+
+def _scan_value(s: str, pos: int) -> Tuple[int, int, int]:
+    """
+    Finds the end of the ``[[step, values], ...]`` list that starts at ``pos``.
+
+    The lists only have numbers, so the brackets are matched without parsing the values.
+    """
+    depth = 0
+    first = last = -1
+    for m in _BRACKET.finditer(s, pos):
+        if m.group() == '[':
+            depth += 1
+            if depth == 2:
+                if first == -1:
+                    first = m.end()
+                last = m.end()
+        else:
+            depth -= 1
+            if depth == 0:
+                return m.end(), first, last
+
+    raise ValueError('Unterminated list')
+
+
+def _parse_step(s: str, pos: int) -> int:
+    return int(float(_NUMBER.match(s, pos).group(1)))
+
+
+def _scan_line(s: str) -> Dict[str, Tuple[int, int, int, int]]:
+    """Byte range, first step and last step of each indicator in a line"""
+    m = _TRACK.match(s)
+    if m is None:
+        raise ValueError('Unknown line format')
+
+    res = {}
+    pos = m.end()
+    while True:
+        pos = _WHITESPACE.match(s, pos).end()
+        if s[pos] == '}':
+            return res
+        if s[pos] == ',':
+            pos += 1
+            continue
+
+        name, pos = scanstring(s, pos + 1)
+        pos = _WHITESPACE.match(s, s.index(':', pos) + 1).end()
+        end, first, last = _scan_value(s, pos)
+        if first != -1:
+            res[name] = (pos, end - pos, _parse_step(s, first), _parse_step(s, last))
+        pos = end
+
+
+class JsonlIndex:
+    def __init__(self, log_path: Path):
+        self.log_path = log_path
+        self.index_path = log_path.parent / (log_path.name + INDEX_SUFFIX)
+        self._reset()
+
+    def _reset(self):
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.columns: Dict[str, np.ndarray] = {c: np.zeros(0, dtype=np.int64) for c in _COLUMNS}
+        self.indexed_size = 0
+
+    def _load(self) -> bool:
+        try:
+            with np.load(str(self.index_path), allow_pickle=False) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    return False
+                self.names = [str(n) for n in data['names']]
+                self.columns = {c: data[c] for c in _COLUMNS}
+                self.indexed_size = int(data['indexed_size'])
+        except (OSError, KeyError, ValueError):
+            return False
+
+        self._name_ids = {n: i for i, n in enumerate(self.names)}
+
+        return True
+
+    def _save(self):
+        tmp_path = self.index_path.parent / (self.index_path.name + '.tmp')
+        try:
+            with open(str(tmp_path), 'wb') as f:
+                np.savez(f, version=INDEX_VERSION, indexed_size=self.indexed_size,
+                         names=np.array(self.names, dtype=str), **self.columns)
+            os.replace(str(tmp_path), str(self.index_path))
+        except OSError:
+            # the index is only a cache
+            pass
+
+    def _name_id(self, name: str):
+        if name not in self._name_ids:
+            self._name_ids[name] = len(self.names)
+            self.names.append(name)
+
+        return self._name_ids[name]
+
+    def _index_lines(self):
+        rows = []
+        offset = self.indexed_size
+        with open(str(self.log_path), 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # the line is still being written
+                    break
+
+                # ``latin-1`` maps each byte to a character, so that string positions are byte offsets
+                s = line.decode('latin-1')
+                try:
+                    spans = _scan_line(s)
+                    for name, (start, length, first, last) in spans.items():
+                        rows.append((self._name_id(name), offset + start, length, first, last, 0))
+                except (ValueError, IndexError):
+                    # read the whole line, if it is not in the usual format
+                    try:
+                        track = json.loads(line).get('track', {})
+                    except json.JSONDecodeError:
+                        track = {}
+                    for name, points in track.items():
+                        if points:
+                            rows.append((self._name_id(name), offset, len(line),
+                                         int(points[0][0]), int(points[-1][0]), 1))
+
+                offset += len(line)
+
+        if rows:
+            new = np.array(rows, dtype=np.int64)
+            self.columns = {c: np.concatenate((self.columns[c], new[:, i])) for i, c in enumerate(_COLUMNS)}
+
+        is_updated = offset != self.indexed_size
+        self.indexed_size = offset
+
+        return is_updated
+
+    def update(self):
+        """Loads the saved index, and indexes the lines appended to the log"""
+        if not self._load() or self.indexed_size > self.log_path.stat().st_size:
+            self._reset()
+
+        if self._index_lines():
+            self._save()
+
+    def keys(self) -> List[str]:
+        return list(self.names)
+
+    def __contains__(self, name: str):
+        return name in self._name_ids
+
+    def get(self, name: str, start_step: Optional[int] = None, end_step: Optional[int] = None) -> IndicatorValues:
+        mask = self.columns['name'] == self._name_ids[name]
+        if start_step is not None:
+            mask &= self.columns['last_step'] >= start_step
+        if end_step is not None:
+            mask &= self.columns['first_step'] < end_step
+
+        points = []
+        with open(str(self.log_path), 'rb') as f:
+            for offset, length, is_line in zip(self.columns['offset'][mask],
+                                               self.columns['length'][mask],
+                                               self.columns['is_line'][mask]):
+                f.seek(offset)
+                data = json.loads(f.read(length))
+                if is_line:
+                    data = data['track'][name]
+                points += data
+
+        step = np.array([p[0] for p in points], dtype=np.int64)
+        values = [p[1] if isinstance(p[1], list) else [p[1]] for p in points]
+        count = np.fromiter(map(len, values), dtype=np.uint32, count=len(values))
+        values = np.fromiter(itertools.chain.from_iterable(values), dtype=np.float32, count=int(count.sum()))
+
+        return IndicatorValues(step, count, values).between(start_step, end_step)
+
+
+def load_index(log_path: Path) -> JsonlIndex:
+    index = JsonlIndex(log_path)
+    index.update()
+
+    return index
@@ -0,0 +1,220 @@
+"""
+Binary log of the tracked indicators of a run.
+
+The file starts with ``MAGIC``, followed by blocks that are appended on each flush.
+A block has the values of one indicator over a number of steps:
+
+* header: length of the name (``uint16``), number of steps (``uint32``), number of values (``uint64``)
+* name, ``utf-8`` encoded and padded with zeros to a multiple of 8 bytes
+* steps (``int64``), number of values at each step (``uint32``) and the values (``float32``),
+  padded with zeros to a multiple of 8 bytes
+
+Scalars have a value for each time they were added between two saves,
+ and histograms have all the values of the tracked tensors.
+"""
+
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Iterator
+
+import numpy as np
+
+MAGIC = b'LABMLM\x00\x01'
+_HEADER = struct.Struct('<HxxIQ')
+
+# lines of ``log.jsonl`` converted before the blocks are written
+CONVERT_LINES = 1_000
+
+Points = List[Tuple[int, np.ndarray]]
+
+
+def _padding(n: int):
+    return -n % 8
+
+
+def encode_block(name: str, points: Points) -> bytes:
+    name_bytes = name.encode('utf-8')
+    step = np.array([s for s, _ in points], dtype=np.int64)
+    values = [np.asarray(v, dtype=np.float32).ravel() for _, v in points]
+    count = np.array([len(v) for v in values], dtype=np.uint32)
+    values = np.concatenate(values) if values else np.zeros(0, dtype=np.float32)
+
+    data = step.tobytes() + count.tobytes() + values.tobytes()
+
+    return b''.join([_HEADER.pack(len(name_bytes), len(step), len(values)),
+                     name_bytes, bytes(_padding(len(name_bytes))),
+                     data, bytes(_padding(len(data)))])
+
+
+class MetricsLogWriter:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def append(self, data: Dict[str, Points]):
+        with open(str(self.path), 'ab') as f:
+            if f.tell() == 0:
+                f.write(MAGIC)
+            for name, points in data.items():
+                if points:
+                    f.write(encode_block(name, points))
+
+
+class IndicatorValues:
+    """
+    Values of an indicator.
+
+    ``values[offsets[i]:offsets[i + 1]]`` are the values tracked at ``step[i]``.
+    """
+
+    def __init__(self, step: np.ndarray, count: np.ndarray, values: np.ndarray):
+        self.step = step
+        self.count = count
+        self.values = values
+        self.offsets = np.zeros(len(count) + 1, dtype=np.int64)
+        np.cumsum(count, out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.step)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def between(self, start_step: Optional[int] = None, end_step: Optional[int] = None) -> 'IndicatorValues':
+        """Values at steps in ``[start_step, end_step)``"""
+        mask = np.ones(len(self.step), dtype=bool)
+        if start_step is not None:
+            mask &= self.step >= start_step
+        if end_step is not None:
+            mask &= self.step < end_step
+        if mask.all():
+            return self
+
+        return IndicatorValues(self.step[mask], self.count[mask], self.values[np.repeat(mask, self.count)])
+
+    def mean(self) -> np.ndarray:
+        """Mean of the values at each step"""
+        total = np.zeros(len(self.values) + 1, dtype=np.float64)
+        np.cumsum(self.values, dtype=np.float64, out=total[1:])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (total[self.offsets[1:]] - total[self.offsets[:-1]]) / self.count
+
+
+class MetricsLogReader:
+    """
+    Reads the binary log of a run.
+
+    The file is memory mapped, and the values of indicators written in a single block
+     are returned without copying.
+    A block that was not completely written is ignored.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._blocks: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._mmap: Optional[mmap.mmap] = None
+
+        with open(str(path), 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'Not a metrics log: {path}')
+            f.seek(0, 2)
+            if f.tell() > len(MAGIC):
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap is not None:
+            self._scan()
+
+    def _scan(self):
+        size = len(self._mmap)
+        offset = len(MAGIC)
+        while offset + _HEADER.size <= size:
+            name_len, n_steps, n_values = _HEADER.unpack_from(self._mmap, offset)
+            name_start = offset + _HEADER.size
+            data_start = name_start + name_len + _padding(name_len)
+            data_len = 12 * n_steps + 4 * n_values
+            end = data_start + data_len + _padding(data_len)
+            if end > size:
+                break
+
+            name = self._mmap[name_start:name_start + name_len].decode('utf-8')
+            self._blocks.setdefault(name, []).append((data_start, n_steps, n_values))
+            offset = end
+
+    def keys(self) -> List[str]:
+        return list(self._blocks.keys())
+
+    def __contains__(self, name: str):
+        return name in self._blocks
+
+    def _read_block(self, offset: int, n_steps: int, n_values: int):
+        step = np.frombuffer(self._mmap, dtype=np.int64, count=n_steps, offset=offset)
+        offset += 8 * n_steps
+        count = np.frombuffer(self._mmap, dtype=np.uint32, count=n_steps, offset=offset)
+        offset += 4 * n_steps
+        values = np.frombuffer(self._mmap, dtype=np.float32, count=n_values, offset=offset)
+
+        return step, count, values
+
+    def get(self, name: str) -> IndicatorValues:
+        blocks = [self._read_block(*b) for b in self._blocks[name]]
+        if len(blocks) == 1:
+            return IndicatorValues(*blocks[0])
+
+        return IndicatorValues(*(np.concatenate(parts) for parts in zip(*blocks)))
+
+    def close(self):
+        if self._mmap is None:
+            return
+        try:
+            self._mmap.close()
+        except BufferError:
+            # arrays returned by ``get`` still refer to the memory map
+            pass
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _read_jsonl(path: Path) -> Iterator[Dict[str, Points]]:
+    with open(str(path), 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line might be incomplete
+                continue
+
+            yield {name: [(int(step), np.asarray(v, dtype=np.float32).ravel()) for step, v in points]
+                   for name, points in data.get('track', {}).items()}
+
+
+def convert_jsonl(jsonl_path: Path, metrics_path: Path):
+    """
+    Converts a ``log.jsonl`` file written by earlier versions to a binary log.
+
+    Lines are converted in batches, so that each block has the values from many lines.
+    """
+    if metrics_path.exists():
+        raise FileExistsError(metrics_path)
+
+    writer = MetricsLogWriter(metrics_path)
+    data: Dict[str, Points] = {}
+    n_lines = 0
+    for track in _read_jsonl(jsonl_path):
+        for name, points in track.items():
+            data.setdefault(name, []).extend(points)
+        n_lines += 1
+        if n_lines == CONVERT_LINES:
+            writer.append(data)
+            data = {}
+            n_lines = 0
+
+    writer.append(data)
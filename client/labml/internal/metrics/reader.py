@@ -0,0 +1,93 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .jsonl_index import JsonlIndex, load_index
+from .log_file import IndicatorValues, MetricsLogReader
+
+
+class RunMetrics:
+    """
+    Tracked indicators of a run.
+
+    It reads ``metrics.bin``, and the indexed ``log.jsonl`` written by earlier versions.
+    A run that was started before ``metrics.bin`` has both, and the values from ``log.jsonl``
+     come first.
+    Values of ``log.jsonl`` at or after the first step of an indicator in ``metrics.bin``
+     are left out, since ``labml convert-log`` copies them to ``metrics.bin``.
+    """
+
+    def __init__(self, run_path: Path):
+        self.run_path = run_path
+        metrics_path = run_path / 'metrics.bin'
+        log_path = run_path / 'log.jsonl'
+
+        self._reader: Optional[MetricsLogReader] = None
+        self._index: Optional[JsonlIndex] = None
+        if log_path.exists():
+            self._index = load_index(log_path)
+        if metrics_path.exists():
+            self._reader = MetricsLogReader(metrics_path)
+        if self._reader is None and self._index is None:
+            raise FileNotFoundError(f'No metrics in {run_path}')
+
+    def keys(self) -> List[str]:
+        keys = self._index.keys() if self._index is not None else []
+        if self._reader is not None:
+            legacy = set(keys)
+            keys += [k for k in self._reader.keys() if k not in legacy]
+
+        return keys
+
+    def __contains__(self, name: str):
+        return ((self._index is not None and name in self._index) or
+                (self._reader is not None and name in self._reader))
+
+    def get(self, name: str, start_step: Optional[int] = None, end_step: Optional[int] = None) -> IndicatorValues:
+        """Values of indicator ``name`` at steps in ``[start_step, end_step)``"""
+        values = None
+        legacy_end = end_step
+        if self._reader is not None and name in self._reader:
+            values = self._reader.get(name)
+            if len(values) > 0:
+                legacy_end = values.step[0] if end_step is None else min(end_step, values.step[0])
+            values = values.between(start_step, end_step)
+
+        if self._index is None or name not in self._index:
+            if values is None:
+                raise KeyError(name)
+            return values
+
+        legacy = self._index.get(name, start_step, legacy_end)
+        if values is None or len(values) == 0:
+            return legacy
+        if len(legacy) == 0:
+            return values
+
+        return IndicatorValues(*(np.concatenate(parts) for parts in [(legacy.step, values.step),
+                                                                    (legacy.count, values.count),
+                                                                    (legacy.values, values.values)]))
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def downsample(step: np.ndarray, value: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Averages consecutive points, so that there are at most ``max_points``"""
+    n = len(step)
+    if n <= max_points:
+        return step, value
+
+    edges = np.linspace(0, n, max_points + 1).astype(np.int64)[:-1]
+    count = np.diff(np.append(edges, n))
+
+    return (np.add.reduceat(step.astype(np.float64), edges) / count,
+            np.add.reduceat(value.astype(np.float64), edges) / count)
@@ -1,3 +1,5 @@
+import queue
+import threading
 from pathlib import PurePath
 from typing import Dict, List, Optional, Callable, Union, Tuple
 
@@ -15,6 +17,54 @@ from ..util import strings
 from ..util.colors import StyleCode
 
 
+class _WriterThread(threading.Thread):
+    """
+    Calls the writers with snapshots of the indicators, in the background.
+
+    An exception raised by a writer is raised again in the training thread,
+     on the next call to ``Tracker.write``.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.queue: 'queue.Queue[Optional[Tuple[List[Writer], int, Dict[str, Indicator]]]]' = queue.Queue()
+        self.exception: Optional[BaseException] = None
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+
+                writers, global_step, indicators = item
+                for w in writers:
+                    w.write(global_step=global_step, indicators=indicators)
+            except BaseException as e:
+                self.exception = e
+            finally:
+                self.queue.task_done()
+
+    def push(self, writers: List[Writer], global_step: int, indicators: Dict[str, Indicator]):
+        self.raise_exception()
+        self.queue.put((writers, global_step, indicators))
+
+    def join_queue(self):
+        self.queue.join()
+        self.raise_exception()
+
+    def raise_exception(self):
+        if self.exception is not None:
+            e = self.exception
+            self.exception = None
+            raise e
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
+        self.raise_exception()
+
+
 class Tracker:
     __loop_counter: int
     __set_looping_indicators: Optional[Callable[[List[Union[str, Tuple[str, Optional[StyleCode]]]]], None]]
@@ -33,9 +83,11 @@ class Tracker:
 
         self.__set_looping_indicators = None
         self.__loop_counter = 0
+        self.__writer_thread: Optional[_WriterThread] = None
 
         self.indicators = {}
         self.dot_indicators = {}
+        self.__pattern_matcher: Optional[strings.PatternMatcher] = None
         self.__indicators_file = None
         self.namespaces = []
         self.is_indicators_updated = True
@@ -69,6 +121,37 @@ class Tracker:
         for k, v in self.indicators.items():
             v.clear()
 
+    def set_background_write(self, is_background: bool):
+        if is_background and self.__writer_thread is None:
+            self.__writer_thread = _WriterThread()
+            self.__writer_thread.start()
+        elif not is_background and self.__writer_thread is not None:
+            writer_thread = self.__writer_thread
+            self.__writer_thread = None
+            writer_thread.stop()
+
+    def join_writers(self):
+        """Waits until the background thread has written all the saved indicators"""
+        if self.__writer_thread is not None:
+            self.__writer_thread.join_queue()
+
+    def _write_background(self, global_step: int):
+        indicators = {k: ind.snapshot() for k, ind in self.indicators.items()}
+
+        indicators_print = None
+        writers = []
+        for w in self.__writers:
+            # the screen writer is called here so that the output is in order with other logs
+            if isinstance(w, ScreenWriter):
+                indicators_print = w.write(global_step=global_step, indicators=indicators)
+            else:
+                writers.append(w)
+
+        if writers:
+            self.__writer_thread.push(writers, global_step, indicators)
+
+        return indicators_print
+
     def write(self):
         global_step = self.global_step
 
@@ -76,12 +159,15 @@ class Tracker:
 
         indicators_print = None
 
-        for w in self.__writers:
-            if isinstance(w, ScreenWriter):
-                indicators_print = self._write_writer(w, global_step)
-            else:
-                self._write_writer(w, global_step)
-        self.clear()
+        if self.__writer_thread is not None:
+            indicators_print = self._write_background(global_step)
+        else:
+            for w in self.__writers:
+                if isinstance(w, ScreenWriter):
+                    indicators_print = self._write_writer(w, global_step)
+                else:
+                    self._write_writer(w, global_step)
+            self.clear()
 
         if indicators_print is not None:
             if self.__is_looping:
@@ -111,6 +197,7 @@ class Tracker:
     def reset_store(self):
         self.indicators = {}
         self.dot_indicators = {}
+        self.__pattern_matcher = None
         self.__indicators_file = None
         self.namespaces = []
         self.is_indicators_updated = True
@@ -122,6 +209,7 @@ class Tracker:
 
     def add_indicator(self, indicator: Indicator):
         self.dot_indicators[indicator.name] = indicator
+        self.__pattern_matcher = None
         self.is_indicators_updated = True
 
     def save_indicators(self, file: Optional[PurePath] = None):
@@ -148,7 +236,9 @@ class Tracker:
         if key in self.indicators:
             return
 
-        ind_key, ind_score = strings.find_best_pattern(key, self.dot_indicators.keys())
+        if self.__pattern_matcher is None:
+            self.__pattern_matcher = strings.PatternMatcher(self.dot_indicators.keys())
+        ind_key, ind_score = self.__pattern_matcher.find(key)
         if ind_key is None:
             raise ValueError(f"Cannot find matching indicator for {key}")
         if ind_score == 0:
@@ -213,6 +303,7 @@ class Tracker:
     def finish_loop(self):
         self.__last_global_step = self.global_step
         self.__set_looping_indicators = None
+        self.join_writers()
         for w in self.__writers:
             w.finish()
 
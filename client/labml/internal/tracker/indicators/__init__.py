@@ -15,6 +15,20 @@ class Indicator:
     def clear(self):
         pass
 
+    def snapshot(self) -> 'Indicator':
+        """
+        Returns a copy of the indicator with the collected values, and clears them from this indicator.
+
+        ``clear`` should assign new buffers instead of emptying the existing ones,
+         since the copy shares them.
+        """
+        # shallow copy, which is faster than ``copy.copy``
+        snapshot = object.__new__(type(self))
+        snapshot.__dict__.update(self.__dict__)
+        self.clear()
+
+        return snapshot
+
     def is_empty(self) -> bool:
         raise NotImplementedError()
 
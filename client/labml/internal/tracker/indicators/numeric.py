@@ -1,10 +1,170 @@
 from abc import ABC
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 import numpy as np
 
 from . import Indicator
-from ...util.values import to_numpy
+from ...util.values import to_numpy, is_torch_tensor
+
+# number of values buffered before they are added to the running statistics, in streaming mode
+STREAMING_BUFFER_SIZE = 1024
+
+
+class StreamingStats:
+    """Count, sum, sum of squares, minimum and maximum of the values seen so far"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.
+        self.sum_sq = 0.
+        self.min = float('inf')
+        self.max = -float('inf')
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+
+        values = values.astype(np.float64, copy=False)
+        self.add(len(values), float(np.sum(values)), float(np.dot(values, values)),
+                 float(np.min(values)), float(np.max(values)))
+
+    def add(self, count: int, total: float, total_sq: float, min_value: float, max_value: float):
+        """Adds the statistics of ``count`` values"""
+        self.count += count
+        self.sum += total
+        self.sum_sq += total_sq
+        self.min = min(self.min, min_value)
+        self.max = max(self.max, max_value)
+
+    def copy(self) -> 'StreamingStats':
+        stats = StreamingStats()
+        stats.__dict__.update(self.__dict__)
+
+        return stats
+
+    @property
+    def mean(self) -> float:
+        if self.count == 0:
+            return float('nan')
+        return self.sum / self.count
+
+    @property
+    def std(self) -> float:
+        if self.count == 0:
+            return float('nan')
+        return max(0., self.sum_sq / self.count - self.mean ** 2) ** 0.5
+
+    def to_dict(self) -> Dict[str, float]:
+        return dict(count=self.count, mean=self.mean, std=self.std, min=self.min, max=self.max)
+
+
+class _DeviceBuffer:
+    """Values of tensors on a device that are not added to the statistics yet, and the statistics"""
+
+    def __init__(self, device, size: int):
+        import torch
+
+        # MPS doesn't support ``float64``
+        dtype = torch.float32 if device.type == 'mps' else torch.float64
+        self.values = torch.empty(size, dtype=dtype, device=device)
+        self.n = 0
+        # ``[sum, sum of squares, minimum, maximum]``
+        self.stats = None
+
+    def add(self, value):
+        n = value.numel()
+        if self.n + n > len(self.values):
+            self.fold()
+        if n == 1:
+            self.values[self.n] = value if value.dim() == 0 else value.reshape(())
+        elif n > len(self.values):
+            self._add_stats(value.reshape(-1).to(self.values.dtype))
+            return
+        else:
+            self.values[self.n:self.n + n] = value.reshape(-1)
+        self.n += n
+
+    def fold(self):
+        if self.n > 0:
+            self._add_stats(self.values[:self.n])
+            self.n = 0
+
+    def _add_stats(self, values):
+        import torch
+
+        stats = torch.stack([values.sum(), values.dot(values), values.min(), values.max()])
+        if self.stats is None:
+            self.stats = stats
+        else:
+            self.stats = torch.cat([self.stats[:2] + stats[:2],
+                                    torch.minimum(self.stats[2:3], stats[2:3]),
+                                    torch.maximum(self.stats[3:], stats[3:])])
+
+
+class DeviceStats:
+    """
+    Count, sum, sum of squares, minimum and maximum of tensors, kept on the device of each tensor.
+
+    Values are copied to a fixed size buffer on the device, which is added to the statistics when it's full,
+     so an update doesn't wait for the device or keep the tensor.
+    The statistics are copied to the host with a single transfer per device when they are read.
+    """
+
+    def __init__(self, buffer_size: int = STREAMING_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._buffers: Dict[Any, _DeviceBuffer] = {}
+        self._host: Optional[StreamingStats] = None
+
+    def update(self, value):
+        value = value.detach()
+        n = value.numel()
+        if n == 0:
+            return
+
+        buffer = self._buffers.get(value.device, None)
+        if buffer is None:
+            buffer = self._buffers[value.device] = _DeviceBuffer(value.device, self.buffer_size)
+        buffer.add(value)
+        self.count += n
+        self._host = None
+
+    def to_host(self) -> StreamingStats:
+        if self._host is None:
+            self._host = StreamingStats()
+            for buffer in self._buffers.values():
+                buffer.fold()
+                self._host.add(0, *buffer.stats.cpu().tolist())
+            self._host.count = self.count
+
+        return self._host
+
+
+class Reservoir:
+    """Uniform random sample of a fixed size, of the values seen so far"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = np.zeros(0)
+        self.seen = 0
+        self._rng = np.random.default_rng()
+
+    def update(self, values: np.ndarray):
+        n = min(self.size - len(self.values), len(values))
+        if n > 0:
+            self.values = np.concatenate((self.values, values[:n]))
+            self.seen += n
+            values = values[n:]
+
+        if len(values) == 0:
+            return
+
+        # the ``t``-th value replaces a random element with probability ``size / t``
+        t = self.seen + np.arange(1, len(values) + 1)
+        idx = (self._rng.random(len(values)) * t).astype(np.int64)
+        is_replaced = idx < self.size
+        self.values[idx[is_replaced]] = values[is_replaced]
+        self.seen += len(values)
 
 
 class NumericIndicator(Indicator, ABC):
@@ -25,11 +185,46 @@ class NumericIndicator(Indicator, ABC):
 
 
 class _Collection(NumericIndicator, ABC):
+    """
+    Collects the values added between two writes.
+
+    Tensors are detached and kept on their device.
+    They are concatenated on the device and copied to the host with a single transfer
+     when the values are written, instead of a transfer for each value.
+    Collections that only need the statistics of the tensors keep ``DeviceStats`` instead.
+
+    In streaming mode, the values are added to running statistics every ``STREAMING_BUFFER_SIZE`` values,
+     so that the memory used doesn't grow with the number of values added between writes.
+    """
+
     def __init__(self, name: str, is_print: bool, options: Optional[Dict] = None):
         super().__init__(name=name, is_print=is_print, options=options)
         self._values = []
+        self._tensors = []
+        self._stats: Optional[StreamingStats] = StreamingStats() if self._is_streaming() else None
+        self._device_stats: Optional[DeviceStats] = DeviceStats() if self._is_device_stats() else None
+
+    def _is_streaming(self) -> bool:
+        return False
+
+    def _is_device_stats(self) -> bool:
+        return False
+
+    def _merge_tensors(self):
+        import torch
+
+        devices = {}
+        for t in self._tensors:
+            devices.setdefault(t.device, []).append(t.reshape(-1))
+        self._tensors = []
+
+        for tensors in devices.values():
+            self._values.append(torch.cat(tensors))
 
     def _merge(self):
+        if self._tensors:
+            self._merge_tensors()
+
         if len(self._values) == 0:
             return []
         elif len(self._values) == 1:
@@ -42,15 +237,66 @@ class _Collection(NumericIndicator, ABC):
             return merged
 
     def collect_value(self, value):
-        self._values.append(value)
+        if is_torch_tensor(value):
+            if self._device_stats is not None:
+                self._device_stats.update(value)
+                return
+            self._tensors.append(value.detach())
+        else:
+            self._values.append(value)
+
+        if self._stats is not None and len(self._values) + len(self._tensors) >= STREAMING_BUFFER_SIZE:
+            self._update_stats()
+
+    def _update_stats(self):
+        values = self._merge()
+        self._values = []
+        self._stats_update(np.asarray(values, dtype=np.float64))
+
+    def _stats_update(self, values: np.ndarray):
+        self._stats.update(values)
 
     def clear(self):
         self._values = []
+        self._tensors = []
+        if self._stats is not None:
+            self._stats = StreamingStats()
+        if self._device_stats is not None:
+            self._device_stats = DeviceStats()
+
+    def _has_device_stats(self) -> bool:
+        return self._device_stats is not None and self._device_stats.count > 0
 
     def is_empty(self) -> bool:
-        return len(self._values) == 0
+        if self._stats is not None and self._stats.count > 0:
+            return False
+        if self._has_device_stats():
+            return False
+
+        return len(self._values) == 0 and len(self._tensors) == 0
+
+    def _get_stats(self) -> StreamingStats:
+        if self._stats is not None:
+            self._update_stats()
+            stats = self._stats.copy()
+        else:
+            stats = StreamingStats()
+            stats.update(np.asarray(self._merge(), dtype=np.float64))
+
+        if self._has_device_stats():
+            d = self._device_stats.to_host()
+            stats.add(d.count, d.sum, d.sum_sq, d.min, d.max)
+
+        return stats
+
+    def get_stats(self) -> Dict[str, float]:
+        """Count, mean, standard deviation, minimum and maximum of the values"""
+        return self._get_stats().to_dict()
 
     def get_mean(self) -> float:
+        if self._stats is not None or self._has_device_stats():
+            return self._get_stats().mean
+
         return float(np.mean(self._merge()))
 
     def get_histogram(self):
@@ -58,15 +304,65 @@ class _Collection(NumericIndicator, ABC):
 
 
 class Histogram(_Collection):
+    """
+    Histogram of the values.
+
+    If ``reservoir_size`` is given in the options,
+     the histogram is of a uniform random sample of that many values.
+    """
+
+    def __init__(self, name: str, is_print: bool, options: Optional[Dict] = None):
+        super().__init__(name=name, is_print=is_print, options=options)
+        self._reservoir: Optional[Reservoir] = None
+        if self._is_streaming():
+            self._reservoir = Reservoir(self.options['reservoir_size'])
+
+    def _is_streaming(self) -> bool:
+        return self.options.get('reservoir_size') is not None
+
+    def _stats_update(self, values: np.ndarray):
+        super()._stats_update(values)
+        self._reservoir.update(values)
+
+    def clear(self):
+        super().clear()
+        if self._reservoir is not None:
+            self._reservoir = Reservoir(self.options['reservoir_size'])
+
+    def get_histogram(self):
+        if self._reservoir is None:
+            return super().get_histogram()
+
+        self._update_stats()
+        return self._reservoir.values.copy()
+
     def copy(self, key: str):
         return Histogram(key, is_print=self.is_print, options=self.options)
 
 
 class Scalar(_Collection):
+    """
+    Mean of the values.
+
+    If ``streaming`` is set in the options,
+     only the running statistics of the values are kept instead of all the values.
+    The statistics of tensors are always kept on their device, instead of the tensors.
+    """
+
+    def _is_streaming(self) -> bool:
+        return bool(self.options.get('streaming', False))
+
+    def _is_device_stats(self) -> bool:
+        return True
+
     def get_histogram(self):
         return None
 
     def get_all_values(self):
+        if self._stats is not None or self._has_device_stats():
+            # only the mean is known in streaming mode, and for tensors
+            return np.array([self.get_mean()])
+
         return self._merge()
 
     def copy(self, key: str):
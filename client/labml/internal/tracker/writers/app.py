@@ -1,6 +1,6 @@
 import threading
 import time
-from typing import Dict
+from typing import Dict, List, Tuple
 
 import numpy as np
 
@@ -13,6 +13,24 @@ MAX_BUFFER_SIZE = 1024
 WARMUP_COMMITS = 5
 
 
+class _Series:
+    """Steps and values of an indicator, in arrays that double in size when full"""
+
+    def __init__(self, capacity: int = 16):
+        self.step = np.empty(capacity, dtype=np.float64)
+        self.value = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    def append(self, step: float, value: float):
+        if self.size == len(self.step):
+            self.step = np.concatenate((self.step, np.empty_like(self.step)))
+            self.value = np.concatenate((self.value, np.empty_like(self.value)))
+
+        self.step[self.size] = step
+        self.value[self.size] = value
+        self.size += 1
+
+
 class Writer(WriteBase, AppTrackDataSource):
     def __init__(self, app_tracker: AppTracker, *,
                  frequency: float):
@@ -46,9 +64,9 @@ class Writer(WriteBase, AppTrackDataSource):
             value = indicator.get_mean()
             key = self._parse_key(indicator.mean_key)
             if key not in self.indicators:
-                self.indicators[key] = []
+                self.indicators[key] = _Series()
 
-            self.indicators[key].append((global_step, value))
+            self.indicators[key].append(global_step, value)
 
     def write(self, *,
               global_step: int,
@@ -81,18 +99,30 @@ class Writer(WriteBase, AppTrackDataSource):
 
         self.app_tracker.has_data(self)
 
-    def _mean(self, values: np.ndarray, n_elems: int):
-        blocks = (len(values) + n_elems - 1) // n_elems
-        if len(values) % n_elems != 0:
-            n_elems = len(values) // blocks
+    @staticmethod
+    def _mean(values: np.ndarray, n_elems: int):
+        """Means of ``n_elems`` blocks along the last axis"""
+        n = values.shape[-1]
+        blocks = (n + n_elems - 1) // n_elems
+        if n % n_elems != 0:
+            n_elems = n // blocks
         means = []
         if blocks > 0:
-            means.append(np.mean(values[:blocks * n_elems].reshape(n_elems, blocks), axis=-1))
+            means.append(np.mean(values[..., :blocks * n_elems].reshape(*values.shape[:-1], n_elems, blocks),
+                                 axis=-1))
 
-        if len(values) > blocks * n_elems:
-            means.append(np.mean(values[blocks * n_elems:].reshape(1, -1), axis=-1))
+        if n > blocks * n_elems:
+            means.append(np.mean(values[..., blocks * n_elems:], axis=-1, keepdims=True))
 
-        return np.concatenate(means)
+        return np.concatenate(means, axis=-1)
+
+    @staticmethod
+    def _max_buffer_size(step: np.ndarray):
+        n = len(step)
+        diff = (step[-1] - step[0] + 1) * n / (n - 1)
+        start_step = max(step[0], 1)
+
+        return max(1, int(min(MAX_BUFFER_SIZE, 1000 / start_step * diff)))
 
     def get_and_clear_indicators(self):
         data = {}
@@ -100,22 +130,26 @@ class Writer(WriteBase, AppTrackDataSource):
         indicators = self.indicators
         self.indicators = {}
 
-        for key, value in indicators.items():
-            value = np.array(value)
-            step: np.ndarray = value[:, 0]
-            value: np.ndarray = value[:, 1]
-            n = len(step)
+        # indicators written at the same steps are downsampled together
+        groups: Dict[Tuple[int, bytes], List[str]] = {}
+        for key, series in indicators.items():
+            step = series.step[:series.size]
+            groups.setdefault((series.size, step.tobytes()), []).append(key)
+
+        for (n, _), keys in groups.items():
+            step = indicators[keys[0]].step[:n]
+            values = np.stack([indicators[k].value[:n] for k in keys])
             if n > 1:
-                diff = (step[-1] - step[0] + 1) * n / (n - 1)
-                start_step = max(step[0], 1)
-                max_buffer_size = max(1, int(min(MAX_BUFFER_SIZE, 1000 / start_step * diff)))
-                if len(value) > max_buffer_size:
+                max_buffer_size = self._max_buffer_size(step)
+                if n > max_buffer_size:
                     step = self._mean(step, max_buffer_size)
-                    value = self._mean(value, max_buffer_size)
-
-            data[key] = {
-                'step': step.tolist(),
-                'value': value.tolist()
-            }
+                    values = self._mean(values, max_buffer_size)
+
+            # arrays are converted to lists only if the packet is sent as JSON
+            for key, value in zip(keys, values):
+                data[key] = {
+                    'step': step,
+                    'value': value
+                }
 
         return data
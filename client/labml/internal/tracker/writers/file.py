@@ -1,14 +1,15 @@
-import json
 import threading
 import time
-from pathlib import PurePath
+from pathlib import PurePath, Path
 from queue import Queue
 from typing import Dict, Optional
 
+import numpy as np
+
 from . import Writer as WriteBase
 from ..indicators import Indicator
 from ..indicators.numeric import NumericIndicator
-from ...util.values import to_numpy
+from ...metrics.log_file import MetricsLogWriter
 
 MAX_BUFFER_SIZE = 1024
 WARMUP_COMMITS = 5
@@ -20,6 +21,7 @@ class FileWriterThread(threading.Thread):
     def __init__(self, file_path: PurePath):
         super().__init__(daemon=False)
         self.file_path = file_path
+        self.log_writer = MetricsLogWriter(Path(file_path))
         self.queue = Queue()
 
     def push(self, data: any):
@@ -34,15 +36,7 @@ class FileWriterThread(threading.Thread):
                 self._process(data)
 
     def _process(self, data: Dict[str, any]):
-        self._send(data['packet'])
-
-    def _send(self, data: Dict[str, any]):
-        with open(str(self.file_path), 'a') as f:
-            f.write(json.dumps(data) + '\n')
-
-
-def _to_list(value):
-    return to_numpy(value).tolist()
+        self.log_writer.append(data['packet']['track'])
 
 
 class Writer(WriteBase):
@@ -75,7 +69,7 @@ class Writer(WriteBase):
             if key not in self.indicators:
                 self.indicators[key] = []
 
-            self.indicators[key].append((global_step, _to_list(values)))
+            self.indicators[key].append((global_step, np.asarray(values, dtype=np.float32)))
 
     def write(self, *,
               global_step: int,
@@ -1,4 +1,6 @@
-from typing import Iterable
+import re
+from typing import Iterable, Optional, Tuple, Dict, List, Pattern
+
 import numpy as np
 
 
@@ -18,19 +20,80 @@ def is_pattern_match(key: str, pattern: str):
     return bool(dp[len(key), len(pattern)])
 
 
+def _pattern_score(pattern: str):
+    return sum(1 for c in pattern if c not in {'*', '?'})
+
+
+def _compile_pattern(pattern: str) -> Pattern:
+    """
+    Regular expression equivalent to ``is_pattern_match``.
+
+    A ``*`` can match an empty string, except at the start of the key.
+    """
+    parts = []
+    for c in pattern:
+        if c == '*':
+            if not parts:
+                parts.append('.+')
+            elif parts[-1] == '.+' and len(parts) == 1:
+                continue
+            elif parts[-1] != '.*':
+                parts.append('.*')
+        elif c == '?':
+            parts.append('.')
+        else:
+            parts.append(re.escape(c))
+
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+class PatternMatcher:
+    """
+    Finds the best matching pattern for keys, same as ``find_best_pattern``.
+
+    The patterns are compiled to regular expressions and sorted by their scores,
+     so that the first match is the best.
+    Results are cached by key.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        scored = [(_pattern_score(p), i, p) for i, p in enumerate(patterns)]
+        # higher scores first, and the last pattern first on ties
+        scored.sort(reverse=True)
+        self._patterns: List[Tuple[str, int, Pattern]] = [(p, s, _compile_pattern(p)) for s, _, p in scored]
+        self._cache: Dict[str, Tuple[Optional[str], float]] = {}
+
+    def find(self, key: str) -> Tuple[Optional[str], float]:
+        res = self._cache.get(key)
+        if res is not None:
+            return res
+
+        best, max_score = None, -1
+        for p, s, regex in self._patterns:
+            if regex.fullmatch(key):
+                best, max_score = p, s
+                break
+
+        res = best, max_score / len(key)
+        self._cache[key] = res
+
+        return res
+
+
 def find_best_pattern(key: str, patterns: Iterable[str]):
-    max_score = -1
-    best = None
-    for p in patterns:
-        if is_pattern_match(key, p):
-            s = 0
-            for c in p:
-                if c not in {'*', '?'}:
-                    s += 1
-
-            # Find the last one
-            if s >= max_score:
-                max_score = s
-                best = p
-
-    return best, max_score / len(key)
+    return PatternMatcher(patterns).find(key)
+
+
+# text after a ``\r`` or ``\n`` up to the last carriage return, that is not part of a ``\r\n``,
+#  and carriage returns followed by a new line
+_OVERWRITTEN_PART = re.compile(r'(?<=[\r\n])[^\n]*\r(?!\n)|\r(?=\n)')
+
+
+def remove_overwritten_output(data: str) -> str:
+    r"""
+    Removes console output that is overwritten by a later carriage return.
+
+    The text before the first ``\r`` or ``\n`` is kept with the ``\r`` after it,
+     since it continues a line that was sent earlier.
+    """
+    return _OVERWRITTEN_PART.sub('', data)
@@ -1,3 +1,5 @@
+import sys
+
 import numpy as np
 
 
@@ -11,6 +13,12 @@ def _torch_to_numpy(tensor):
         return tensor.numpy()
 
 
+def is_torch_tensor(value) -> bool:
+    # a value can only be a tensor if ``torch`` is already imported
+    torch = sys.modules.get('torch')
+    return torch is not None and isinstance(value, torch.Tensor)
+
+
 def to_numpy(value):
     if isinstance(value, int) or isinstance(value, float):
         return np.array(value)
@@ -31,7 +31,7 @@ def get_global_step() -> int:
     return _internal().global_step
 
 
-def set_histogram(name: str, is_print: bool = False):
+def set_histogram(name: str, is_print: bool = False, *, reservoir_size: Optional[int] = None):
     """
     Set indicator type to be a histogram.
     It will log the tracked values as a histogram.
@@ -40,12 +40,18 @@ def set_histogram(name: str, is_print: bool = False):
         name (str): Name of the indicator
         is_print: (bool, optional): Whether the indicator should be printed in console.
             Defaults to ``False``.
+        reservoir_size: (int, optional): If given, the histogram is of a uniform random sample
+            of this many values, instead of all the values tracked between saves.
+            The mean is still of all the values.
     """
     from labml.internal.tracker.indicators.numeric import Histogram
-    _internal().add_indicator(Histogram(name, is_print))
+    options = None
+    if reservoir_size is not None:
+        options = {'reservoir_size': reservoir_size}
+    _internal().add_indicator(Histogram(name, is_print, options))
 
 
-def set_scalar(name: str, is_print: bool = False):
+def set_scalar(name: str, is_print: bool = False, *, streaming: bool = False):
     """
     Set indicator type to be a scalar.
     It will log a scalar of the tracked values.
@@ -55,9 +61,16 @@ def set_scalar(name: str, is_print: bool = False):
         name (str): Name of the indicator
         is_print: (bool, optional): Whether the indicator should be printed in console.
             Defaults to ``False``.
+        streaming: (bool, optional): Whether to keep only running statistics of the values,
+            instead of all the values tracked between saves.
+            Use this when values are added many times between saves.
+            Defaults to ``False``.
     """
     from labml.internal.tracker.indicators.numeric import Scalar
-    _internal().add_indicator(Scalar(name, is_print))
+    options = None
+    if streaming:
+        options = {'streaming': True}
+    _internal().add_indicator(Scalar(name, is_print, options))
 
 
 def _add_dict(values: Dict[str, any]):
@@ -212,6 +225,22 @@ def save(*args, **kwargs):
     _internal().write()
 
 
+def set_background_write(is_background: bool = True):
+    r"""
+    Write tracked values in a background thread.
+
+    When enabled, :func:`labml.tracker.save` hands over the values collected
+    since the last save to a background thread, which computes the means and histograms
+    and passes them to the writers.
+    Only the indicators printed on the screen are computed in the training thread.
+
+    Arguments:
+        is_background (bool, optional): Whether to write in the background.
+            Defaults to ``True``.
+    """
+    _internal().set_background_write(is_background)
+
+
 def new_line():
     r"""
     Prints a new line.
@@ -1,4 +1,5 @@
-from typing import Optional, Dict, TYPE_CHECKING
+import weakref
+from typing import Optional, Dict, List, TYPE_CHECKING
 
 import torch
 
@@ -8,6 +9,9 @@ from labml.configs import BaseConfigs
 if TYPE_CHECKING:
     from torch.optim.optimizer import Optimizer
 
+# optimizer -> optimizer name -> global step when its indicators were last stored
+_optimizer_last_step: 'weakref.WeakKeyDictionary[Optimizer, Dict[str, int]]' = weakref.WeakKeyDictionary()
+
 
 def store_l1_l2(name: str, tensor: torch.Tensor):
     if tensor.is_floating_point():
@@ -16,6 +20,60 @@ def store_l1_l2(name: str, tensor: torch.Tensor):
         tracker.add(f"{name}.l2", (tensor ** 2).mean().sqrt())
 
 
+def _l1_l2(tensors: List[torch.Tensor]) -> torch.Tensor:
+    """
+    Means, L1 norms and L2 norms of a list of tensors, as a ``[n, 3]`` tensor on the CPU.
+
+    Tensors are grouped by device and type, and the norms of each group are
+     computed with ``torch._foreach_norm`` and copied to the CPU with a single transfer.
+    """
+    groups: Dict[any, List[int]] = {}
+    for i, t in enumerate(tensors):
+        groups.setdefault((t.device, t.dtype), []).append(i)
+
+    res = torch.zeros((len(tensors), 3))
+    for idx in groups.values():
+        group = [tensors[i] for i in idx]
+        device = group[0].device
+        numel = torch.tensor([t.numel() for t in group], dtype=torch.float, device=device)
+
+        if hasattr(torch, '_foreach_norm'):
+            l1 = torch.stack(torch._foreach_norm(group, 1)).float()
+            l2 = torch.stack(torch._foreach_norm(group, 2)).float()
+        else:
+            l1 = torch.stack([t.norm(1) for t in group]).float()
+            l2 = torch.stack([t.norm(2) for t in group]).float()
+        total = torch.stack([t.sum() for t in group]).float()
+
+        stats = torch.stack([total / numel, l1 / numel, l2 / numel.sqrt()], dim=-1)
+        res[idx] = stats.cpu()
+
+    return res
+
+
+def store_l1_l2_batch(tensors: Dict[str, torch.Tensor]):
+    """
+    Track means, L1 and L2 norms of tensors, same as ``store_l1_l2`` for each tensor.
+
+    The statistics are computed together and copied to the CPU with a single transfer per device,
+     instead of three transfers for each tensor.
+    """
+    tensors = {name: t for name, t in tensors.items() if t.is_floating_point()}
+    if not tensors:
+        return
+
+    with torch.no_grad():
+        stats = _l1_l2(list(tensors.values())).tolist()
+
+    values = {}
+    for name, (mean, l1, l2) in zip(tensors.keys(), stats):
+        values[f"{name}.mean"] = mean
+        values[f"{name}.l1"] = l1
+        values[f"{name}.l2"] = l2
+
+    tracker.add(values)
+
+
 def store_var(name: str, tensor: torch.Tensor):
     if tensor.is_floating_point():
         dims = tuple(i for i in range(len(tensor.shape)))
@@ -34,17 +92,20 @@ def store_model_indicators(model: torch.nn.Module, *, model_name: str = "model")
     Keyword Arguments:
         model_name (str, optional): name of the model
     """
+    tensors = {}
     for name, param in model.named_parameters():
         if param.requires_grad:
-            with torch.no_grad():
-                store_l1_l2(f"param.{model_name}.{name}", param)
-                if param.grad is not None:
-                    store_l1_l2(f"grad.{model_name}.{name}", param.grad)
+            tensors[f"param.{model_name}.{name}"] = param
+            if param.grad is not None:
+                tensors[f"grad.{model_name}.{name}"] = param.grad
+
+    store_l1_l2_batch(tensors)
 
 
 def store_optimizer_indicators(optimizer: 'Optimizer', *,
                                models: Optional[Dict[str, torch.nn.Module]] = None,
-                               optimizer_name: str = "optimizer"):
+                               optimizer_name: str = "optimizer",
+                               every: int = 1):
     """
     Track optimizer stats such as moments.
 
@@ -55,8 +116,20 @@ def store_optimizer_indicators(optimizer: 'Optimizer', *,
         models (Dict[str, torch.nn.Module], optional): a dictionary of modules being optimized.
             This is used to get the proper parameter names.
         optimizer_name (str, optional): name of the optimizer
+        every (int, optional): track only when the global step has advanced by at least this much
+            since the last time the stats of this optimizer were tracked.
+            Defaults to ``1``.
     """
 
+    if every > 1:
+        global_step = tracker.get_global_step()
+        last_steps = _optimizer_last_step.setdefault(optimizer, {})
+        last = last_steps.get(optimizer_name, None)
+        # the global step goes back when it is reset, e.g. for a new run
+        if last is not None and 0 <= global_step - last < every:
+            return
+        last_steps[optimizer_name] = global_step
+
     if models is None:
         models = {}
     names = {}
@@ -64,6 +137,8 @@ def store_optimizer_indicators(optimizer: 'Optimizer', *,
         for name, p in model.named_parameters():
             names[p] = f'{model_name}.{name}'
 
+    values = {}
+    tensors = {}
     unknown = 0
     for group in optimizer.param_groups:
         for p in group['params']:
@@ -80,9 +155,13 @@ def store_optimizer_indicators(optimizer: 'Optimizer', *,
 
             for k, v in state.items():
                 if isinstance(v, float) or isinstance(v, int):
-                    tracker.add(f'optim.{optimizer_name}.{name}.{k}', v)
+                    values[f'optim.{optimizer_name}.{name}.{k}'] = v
                 if isinstance(v, torch.Tensor):
-                    store_l1_l2(f'optim.{optimizer_name}.{name}.{k}', v)
+                    tensors[f'optim.{optimizer_name}.{name}.{k}'] = v
+
+    if values:
+        tracker.add(values)
+    store_l1_l2_batch(tensors)
 
 
 def get_modules(configs: BaseConfigs):
@@ -0,0 +1,133 @@
+import json
+import socket
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from labml import logger
+from labml.internal.app import wire
+from labml.internal.app.connection import ConnectionPool
+from labml.logger import Text
+
+N = 1_000
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Stand-in for the labml server, that replies to track requests"""
+    protocol_version = 'HTTP/1.1'
+    # headers and content are written separately
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections.append(self.connection)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests[self.path] = self.server.requests.get(self.path, 0) + 1
+        if self.path.startswith('/drop'):
+            # handles the request, and closes the connection before the response is sent
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        content = json.dumps({'errors': [], 'push_interval': 10}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.connections = []
+    server.requests = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server
+
+
+def _body():
+    return wire.encode_json([{'track': {'loss': {'step': list(range(100)), 'value': [0.5] * 100}},
+                              'time': time.time()}])
+
+
+def _headers(body: bytes):
+    return {'Content-Type': wire.JSON_CONTENT_TYPE, 'Content-Length': str(len(body))}
+
+
+def urlopen(url: str):
+    body = _body()
+    req = urllib.request.Request(url, headers=_headers(body))
+    with urllib.request.urlopen(req, body, timeout=15) as response:
+        return response.read()
+
+
+def benchmark(url: str):
+    start = time.time()
+    for _ in range(N):
+        urlopen(url)
+    logger.log('urlopen: ', (f'{(time.time() - start) / N * 1e6:,.0f}us', Text.value), ' per flush')
+
+    pool = ConnectionPool()
+    start = time.time()
+    for _ in range(N):
+        body = _body()
+        pool.post(url, body, _headers(body), timeout=15)
+    logger.log('pool:    ', (f'{(time.time() - start) / N * 1e6:,.0f}us', Text.value), ' per flush',
+               ' connections opened ', (f'{pool.opened}', Text.value))
+
+
+def reconnect(server: ThreadingHTTPServer, url: str):
+    server.connections.clear()
+    pool = ConnectionPool()
+    body = _body()
+    pool.post(url, body, _headers(body), timeout=15)
+
+    # the server drops the idle keep-alive connection
+    for conn in server.connections:
+        conn.shutdown(socket.SHUT_RDWR)
+    time.sleep(0.1)
+
+    result = json.loads(pool.post(url, body, _headers(body), timeout=15))
+    assert result['errors'] == []
+    assert pool.opened == 2
+    logger.log('Reconnected after the connection was closed')
+
+
+def no_resend(server: ThreadingHTTPServer, url: str):
+    """A request that might have been handled by the server is not sent again"""
+    pool = ConnectionPool()
+    body = _body()
+    pool.post(url, body, _headers(body), timeout=15)
+
+    drop_url = url.replace('/api/v1/track', '/drop')
+    try:
+        pool.post(drop_url, body, _headers(body), timeout=15)
+        assert False
+    except ConnectionResetError:
+        pass
+    assert server.requests['/drop?run_uuid=test'] == 1, server.requests
+    assert pool.opened == 1
+    logger.log('Not resent after the server handled the request')
+
+
+def main():
+    server = start_server()
+    url = f'http://127.0.0.1:{server.server_address[1]}/api/v1/track?run_uuid=test'
+
+    benchmark(url)
+    reconnect(server, url)
+    no_resend(server, url)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import time
+
+import numpy as np
+
+from labml import logger
+from labml.internal.tracker.writers.app import Writer, MAX_BUFFER_SIZE, _Series
+from labml.logger import Text
+
+N_INDICATORS = 2_000
+
+
+def _mean(values: np.ndarray, n_elems: int):
+    blocks = (len(values) + n_elems - 1) // n_elems
+    if len(values) % n_elems != 0:
+        n_elems = len(values) // blocks
+    means = []
+    if blocks > 0:
+        means.append(np.mean(values[:blocks * n_elems].reshape(n_elems, blocks), axis=-1))
+
+    if len(values) > blocks * n_elems:
+        means.append(np.mean(values[blocks * n_elems:].reshape(1, -1), axis=-1))
+
+    return np.concatenate(means)
+
+
+def get_and_clear_indicators_lists(indicators):
+    """Downsampling of lists of ``(step, value)`` tuples, one indicator at a time"""
+    data = {}
+    for key, value in indicators.items():
+        value = np.array(value)
+        step: np.ndarray = value[:, 0]
+        value: np.ndarray = value[:, 1]
+        n = len(step)
+        if n > 1:
+            diff = (step[-1] - step[0] + 1) * n / (n - 1)
+            start_step = max(step[0], 1)
+            max_buffer_size = max(1, int(min(MAX_BUFFER_SIZE, 1000 / start_step * diff)))
+            if len(value) > max_buffer_size:
+                step = _mean(step, max_buffer_size)
+                value = _mean(value, max_buffer_size)
+
+        data[key] = {'step': step, 'value': value}
+
+    return data
+
+
+def benchmark(start_step: int, n_steps: int):
+    writer = Writer(None, frequency=1e9)
+    lists = {}
+    values = np.random.random((n_steps, N_INDICATORS))
+    names = [f'loss.{i}' for i in range(N_INDICATORS)]
+
+    for s in range(n_steps):
+        for i, k in enumerate(names):
+            lists.setdefault(k, []).append((start_step + s, float(values[s, i])))
+
+    start = time.time()
+    for s in range(n_steps):
+        for i, k in enumerate(names):
+            if k not in writer.indicators:
+                writer.indicators[k] = _Series()
+            writer.indicators[k].append(start_step + s, float(values[s, i]))
+    append_time = time.time() - start
+
+    start = time.time()
+    expected = get_and_clear_indicators_lists(lists)
+    lists_time = time.time() - start
+
+    start = time.time()
+    data = writer.get_and_clear_indicators()
+    arrays_time = time.time() - start
+
+    assert data.keys() == expected.keys()
+    for k, d in expected.items():
+        assert np.allclose(data[k]['step'], d['step'])
+        assert np.allclose(data[k]['value'], d['value'])
+
+    logger.log(f'steps {start_step:>6,}+{n_steps:<5,}: ',
+               'lists ', (f'{lists_time * 1000:,.1f}ms', Text.value),
+               ' arrays ', (f'{arrays_time * 1000:,.1f}ms', Text.value),
+               ' points ', (f'{len(next(iter(data.values()))["step"])}', Text.subtle),
+               ' append ', (f'{append_time / n_steps / N_INDICATORS * 1e6:,.2f}us', Text.subtle))
+
+
+def main():
+    benchmark(1, 100)
+    benchmark(1, 1_000)
+    benchmark(10_000, 1_000)
+    benchmark(100_000, 5_000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import json
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from labml import logger
+from labml.internal.metrics.compare import compare
+from labml.internal.metrics.log_file import MetricsLogWriter
+from labml.logger import Text
+
+N_RUNS = 500
+N_STEPS = 10_000
+HISTOGRAM_SIZE = 20
+FLUSH_STEPS = 1_000
+
+
+def write_run(run_path: Path, rng: np.random.Generator, n_steps: int):
+    run_path.mkdir(parents=True)
+    writer = MetricsLogWriter(run_path / 'metrics.bin')
+    rate = rng.uniform(1e-4, 1e-3)
+    for start in range(0, n_steps, FLUSH_STEPS):
+        steps = np.arange(start, min(start + FLUSH_STEPS, n_steps))
+        loss = np.exp(-rate * steps) + rng.normal(0, 0.01, len(steps))
+        writer.append({
+            'loss': [(s, np.array([v])) for s, v in zip(steps, loss)],
+            'grad.mean': [(s, rng.random(HISTOGRAM_SIZE)) for s in steps],
+        })
+
+
+def check(path: Path):
+    runs = []
+    for i in range(4):
+        run_path = path / f'run_{i}'
+        runs.append(run_path)
+        run_path.mkdir()
+        writer = MetricsLogWriter(run_path / 'metrics.bin')
+        writer.append({'loss': [(s, np.array([s * (i + 1), s * (i + 1) + 2.])) for s in range(100 + 100 * i)]})
+
+    # a run from an earlier version, a run without the indicator, and a run without metrics
+    (path / 'run_4').mkdir()
+    with open(str(path / 'run_4' / 'log.jsonl'), 'w') as f:
+        f.write(json.dumps({'track': {'loss': [[s, [-1.]] for s in range(50)]}, 'time': 0}) + '\n')
+    runs.append(path / 'run_4')
+    (path / 'run_5').mkdir()
+    MetricsLogWriter(path / 'run_5' / 'metrics.bin').append({'accuracy': [(0, np.array([1.]))]})
+    runs.append(path / 'run_5')
+    (path / 'run_6').mkdir()
+    runs.append(path / 'run_6')
+
+    res = compare(runs, 'loss', n_points=400, processes=2)
+    assert np.array_equal(res.step, np.arange(400))
+    for i in range(4):
+        expected = np.full(400, np.nan)
+        expected[:100 + 100 * i] = np.arange(100 + 100 * i) * (i + 1) + 1
+        assert np.allclose(res.values[i], expected, equal_nan=True)
+    assert np.allclose(res.values[4, :50], -1) and np.isnan(res.values[4, 50:]).all()
+    assert np.isnan(res.values[5:]).all()
+    assert np.array_equal(res.count[[0, 99, 100, 300, 399]], [5, 4, 3, 1, 1])
+    assert np.allclose(res.mean[30], np.mean([31, 61, 91, 121, -1]))
+    assert np.allclose(res.std[30], np.std([31, 61, 91, 121, -1]))
+
+    assert np.array_equal(res.ranking, [4, 0, 1, 2, 3, 5, 6])
+    assert res.best(2) == ['run_4', 'run_0']
+    res = compare(runs, 'loss', n_points=400, is_higher_better=True, processes=1)
+    assert res.best(10) == ['run_3', 'run_2', 'run_1', 'run_0', 'run_4']
+
+    # runs are downsampled to ``n_points``
+    res = compare(runs[:4], 'loss', n_points=40, processes=1)
+    assert len(res.step) == 40
+    assert res.step[0] == 0 and res.step[-1] == 399
+    assert np.allclose(res.values[3, [0, -1]], [4 * 4.5 + 1, 4 * 394.5 + 1])
+    is_inner = (res.step >= 14.5) & (res.step <= 384.5)
+    assert np.allclose(res.values[3, is_inner], res.step[is_inner] * 4 + 1)
+
+
+def benchmark(path: Path):
+    rng = np.random.default_rng(0)
+    runs = [path / f'run_{i}' for i in range(N_RUNS)]
+    for r in runs:
+        write_run(r, rng, int(rng.integers(N_STEPS // 2, N_STEPS)))
+    size = sum((r / 'metrics.bin').stat().st_size for r in runs)
+
+    for processes in [1, 2]:
+        start = time.time()
+        res = compare(runs, 'loss', n_points=1_000, processes=processes)
+        logger.log(f'{N_RUNS} runs, {processes} processes: ', (f'{time.time() - start:,.2f}s', Text.value),
+                   ' logs ', (f'{size / 1e6:,.0f}MB', Text.subtle))
+
+    assert res.values.shape == (N_RUNS, 1_000)
+    assert res.count[0] == N_RUNS
+    assert np.all(np.diff(res.scores[res.ranking]) >= 0)
+    logger.log('best: ', (res.best()[0], Text.value), ' ', (f'{res.scores[res.ranking[0]]:.3f}', Text.subtle))
+    logger.log('max RSS: ', (f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:,.0f}MB', Text.value),
+               ' workers ', (f'{resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1e3:,.0f}MB', Text.value))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        check(Path(path))
+    with tempfile.TemporaryDirectory() as path:
+        benchmark(Path(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import random
+import time
+
+from labml import logger
+from labml.internal.util.strings import remove_overwritten_output
+from labml.logger import Text
+
+N_FUZZ = 200_000
+LOG_SIZE = 50 * 1024 * 1024
+
+
+def remove_overwritten_output_loop(data: str):
+    """Character by character implementation, from ``AppConsoleLogs``"""
+    last_newline = None
+    remove = []
+    for i in range(len(data)):
+        if data[i] == '\r':
+            if i + 1 < len(data) and data[i + 1] == '\n':
+                remove.append((i, i))
+            elif last_newline is not None:
+                remove.append((last_newline + 1, i))
+            last_newline = i
+        elif data[i] == '\n':
+            last_newline = i
+
+    res = []
+    offset = 0
+    for r in remove:
+        if offset < r[0]:
+            res.append(data[offset: r[0]])
+        offset = r[1] + 1
+
+    res.append(data[offset:])
+    return ''.join(res)
+
+
+def fuzz():
+    rng = random.Random(0)
+    for _ in range(N_FUZZ):
+        s = ''.join(rng.choice('ab\r\n') for _ in range(rng.randint(0, 20)))
+        assert remove_overwritten_output(s) == remove_overwritten_output_loop(s), repr(s)
+
+
+def progress_log(size: int):
+    rng = random.Random(0)
+    parts = []
+    length = 0
+    while length < size:
+        total = rng.randint(100, 2_000)
+        for i in range(0, total + 1, rng.randint(1, 10)):
+            bar = '█' * (i * 30 // total)
+            parts.append(f'\r{i * 100 // total:3}%|{bar:<30}| {i}/{total} [00:01<00:02, {rng.random() * 100:.2f}it/s]')
+            length += len(parts[-1])
+        parts.append(f'\nEpoch loss {rng.random():.4f}\r\n')
+
+    return ''.join(parts)
+
+
+def benchmark():
+    log = progress_log(LOG_SIZE)
+
+    for name, loop, fast in [('remove_overwritten_output', remove_overwritten_output_loop, remove_overwritten_output)]:
+        start = time.time()
+        expected = loop(log)
+        loop_time = time.time() - start
+
+        start = time.time()
+        res = fast(log)
+        fast_time = time.time() - start
+
+        assert res == expected
+        logger.log(f'{name:<26}', 'loop ', (f'{loop_time:,.2f}s', Text.value),
+                   ' regex ', (f'{fast_time * 1000:,.0f}ms', Text.value),
+                   ' ', (f'{len(log) / 1e6:,.0f}M', Text.subtle), ' characters')
+
+
+if __name__ == '__main__':
+    fuzz()
+    benchmark()
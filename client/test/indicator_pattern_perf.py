@@ -0,0 +1,66 @@
+import random
+import time
+
+from labml import logger
+from labml.internal.util.strings import is_pattern_match, PatternMatcher
+from labml.logger import Text
+
+PATTERNS = ['*', 'loss.*', 'param.*', 'grad.*', 'module.*', 'optimizer.*.lr', 'param.*.weight', 'grad.layer?.*']
+
+
+def find_best_pattern_dp(key: str, patterns):
+    max_score = -1
+    best = None
+    for p in patterns:
+        if is_pattern_match(key, p):
+            s = sum(1 for c in p if c not in {'*', '?'})
+            if s >= max_score:
+                max_score = s
+                best = p
+
+    return best, max_score / len(key)
+
+
+def model_keys(n: int):
+    keys = []
+    for i in range(n // 4):
+        for kind in ['param', 'grad']:
+            for p in ['weight', 'bias']:
+                keys.append(f'{kind}.layer{i}.{p}')
+
+    return keys
+
+
+def check_random(n: int = 20_000):
+    chars = 'ab.?*'
+    for _ in range(n):
+        key = ''.join(random.choice('ab.') for _ in range(random.randint(1, 6)))
+        patterns = [''.join(random.choice(chars) for _ in range(random.randint(0, 5)))
+                    for _ in range(random.randint(1, 4))]
+        assert PatternMatcher(patterns).find(key) == find_best_pattern_dp(key, patterns), (key, patterns)
+
+
+def main():
+    check_random()
+
+    keys = model_keys(5_000)
+
+    start = time.time()
+    expected = [find_best_pattern_dp(k, PATTERNS) for k in keys]
+    logger.log('dynamic programming: ', (f'{time.time() - start:,.3f}s', Text.value))
+
+    start = time.time()
+    matcher = PatternMatcher(PATTERNS)
+    found = [matcher.find(k) for k in keys]
+    logger.log('compiled:            ', (f'{time.time() - start:,.3f}s', Text.value))
+
+    start = time.time()
+    for k in keys:
+        matcher.find(k)
+    logger.log('cached:              ', (f'{time.time() - start:,.3f}s', Text.value))
+
+    assert found == expected
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from labml import logger
+from labml.internal.metrics.jsonl_index import JsonlIndex, load_index
+from labml.internal.metrics.log_file import MetricsLogWriter
+from labml.internal.metrics.reader import RunMetrics, downsample
+from labml.logger import Text
+
+LOG_SIZE_MB = 2_048
+STEPS_PER_LINE = 10
+N_HISTOGRAMS = 50
+HISTOGRAM_SIZE = 100
+
+
+def _line(step: int, rng: np.random.Generator):
+    steps = range(step, step + STEPS_PER_LINE)
+    track = {
+        'loss': [[s, [float(rng.random())]] for s in steps],
+        'accuracy': [[s, [float(rng.random()), float(rng.random())]] for s in steps],
+    }
+    for i in range(3):
+        track[f'grad.{i}.mean'] = [[s, rng.random(rng.integers(1, 5)).tolist()] for s in steps]
+
+    return json.dumps({'track': track, 'time': time.time()}) + '\n'
+
+
+def _read_all(path: Path, name: str):
+    step, values = [], []
+    with open(str(path)) as f:
+        for line in f:
+            if not line.endswith('\n'):
+                continue
+            for s, v in json.loads(line)['track'].get(name, []):
+                step.append(s)
+                values.append(v)
+
+    return np.array(step), values
+
+
+def check(path: Path):
+    rng = np.random.default_rng(0)
+    log_path = path / 'log.jsonl'
+    with open(str(log_path), 'w') as f:
+        for i in range(100):
+            f.write(_line(i * STEPS_PER_LINE, rng))
+
+    for name in ['loss', 'accuracy', 'grad.1.mean']:
+        step, values = _read_all(log_path, name)
+        with RunMetrics(path) as metrics:
+            res = metrics.get(name)
+            assert np.array_equal(res.step, step)
+            assert all(np.allclose(res[i], v) for i, v in enumerate(values))
+            assert np.allclose(res.mean(), [np.mean(v) for v in values])
+
+            res = metrics.get(name, 95, 312)
+            assert np.array_equal(res.step, np.arange(95, 312))
+            assert np.allclose(res.mean(), [np.mean(v) for v in values[95:312]])
+
+    # lines appended after the index was saved, a line in a different format, and an incomplete line
+    with open(str(log_path), 'a') as f:
+        f.write(_line(1000, rng))
+        f.write(json.dumps({'time': 0, 'track': {'loss': [[1010, 7.]], 'lr': [[1010, [0.1]]]}}) + '\n')
+        f.write('{"track": {"loss": [[1011, [3')
+    index = JsonlIndex(log_path)
+    assert index._load()
+    assert index.indexed_size < log_path.stat().st_size
+    index = load_index(log_path)
+    assert index.columns['is_line'].sum() == 2
+    assert sorted(index.keys()) == ['accuracy', 'grad.0.mean', 'grad.1.mean', 'grad.2.mean', 'loss', 'lr']
+    loss = index.get('loss', 1005)
+    assert np.array_equal(loss.step, np.arange(1005, 1011))
+    assert loss[5][0] == 7.
+
+    step, value = downsample(np.arange(10), np.arange(10.), 3)
+    assert np.allclose(step, [1, 4, 7.5]) and np.allclose(value, step)
+
+    # a run that continued after ``metrics.bin``; the values in ``log.jsonl`` come first
+    legacy_step, legacy_values = _read_all(log_path, 'loss')
+    writer = MetricsLogWriter(path / 'metrics.bin')
+    writer.append({'loss': [(s, np.array([2.])) for s in range(2000, 2010)],
+                   'val.loss': [(2000, np.array([1.]))]})
+    with RunMetrics(path) as metrics:
+        assert sorted(metrics.keys()) == ['accuracy', 'grad.0.mean', 'grad.1.mean', 'grad.2.mean', 'loss', 'lr', 'val.loss']
+        assert metrics.keys()[-1] == 'val.loss'
+        assert 'val.loss' in metrics and 'lr' in metrics and 'test' not in metrics
+        loss = metrics.get('loss')
+        assert np.array_equal(loss.step, np.append(legacy_step, np.arange(2000, 2010)))
+        assert np.allclose(loss.values[-10:], 2.)
+        assert np.array_equal(metrics.get('loss', 1005, 2002).step, [*range(1005, 1011), 2000, 2001])
+        assert len(metrics.get('lr')) == 1 and len(metrics.get('val.loss')) == 1
+
+    # a run converted with ``labml convert-log`` has the values of ``log.jsonl`` in ``metrics.bin``
+    (path / 'metrics.bin').unlink()
+    writer.append({'loss': [(s, np.array([3.])) for s in legacy_step]})
+    with RunMetrics(path) as metrics:
+        loss = metrics.get('loss')
+        assert np.array_equal(loss.step, legacy_step) and np.all(loss.values == 3.)
+
+
+def _histogram(rng: np.random.Generator):
+    return json.dumps(rng.random(HISTOGRAM_SIZE).tolist())
+
+
+def write_large(log_path: Path, size: int):
+    """Writes a large log fast, by reusing the encoded histograms"""
+    rng = np.random.default_rng(0)
+    histograms = [_histogram(rng) for _ in range(1_000)]
+    step = 0
+    with open(str(log_path), 'w') as f:
+        while f.tell() < size:
+            steps = range(step, step + STEPS_PER_LINE)
+            track = [f'"loss": [{", ".join(f"[{s}, [{rng.random()}]]" for s in steps)}]',
+                     f'"accuracy": [{", ".join(f"[{s}, [{rng.random()}]]" for s in steps)}]',
+                     f'"lr": [{", ".join(f"[{s}, [0.001]]" for s in steps)}]']
+            for i in range(N_HISTOGRAMS):
+                points = ', '.join(f'[{s}, {histograms[rng.integers(len(histograms))]}]' for s in steps)
+                track.append(f'"grad.{i}.mean": [{points}]')
+            f.write(f'{{"track": {{{", ".join(track)}}}, "time": {time.time()}}}\n')
+            step += STEPS_PER_LINE
+
+    return step
+
+
+def benchmark(path: Path):
+    log_path = path / 'log.jsonl'
+    start = time.time()
+    n_steps = write_large(log_path, LOG_SIZE_MB * 1024 * 1024)
+    logger.log('write:  ', (f'{log_path.stat().st_size / 1e9:,.2f}GB', Text.value),
+               ' in ', (f'{time.time() - start:,.1f}s', Text.subtle))
+
+    start = time.time()
+    load_index(log_path)
+    logger.log('index:  ', (f'{time.time() - start:,.1f}s', Text.value),
+               ' ', (f'{(path / "log.jsonl.index.npz").stat().st_size / 1e6:,.1f}MB', Text.subtle))
+
+    names = ['loss', 'accuracy', 'lr']
+    start = time.time()
+    with RunMetrics(path) as metrics:
+        res = {name: metrics.get(name) for name in names}
+        means = {name: v.mean() for name, v in res.items()}
+    logger.log('load ', (f'{len(names)}', Text.value), ' indicators: ',
+               (f'{(time.time() - start) * 1000:,.0f}ms', Text.value))
+    for name in names:
+        assert np.array_equal(res[name].step, np.arange(n_steps))
+    assert np.allclose(means['lr'], 0.001)
+
+    # histograms are bound by parsing the numbers
+    start = time.time()
+    with RunMetrics(path) as metrics:
+        grad = metrics.get('grad.7.mean')
+    logger.log('load histogram: ', (f'{(time.time() - start) * 1000:,.0f}ms', Text.value),
+               ' ', (f'{len(grad.values):,}', Text.subtle), ' values')
+    assert np.array_equal(grad.step, np.arange(n_steps))
+
+    start = time.time()
+    with RunMetrics(path) as metrics:
+        for name in names:
+            metrics.get(name, n_steps // 2, n_steps // 2 + 1_000)
+    logger.log('load ', (f'{len(names)}', Text.value), ' indicators, ',
+               ('1,000', Text.value), ' steps: ',
+               (f'{(time.time() - start) * 1000:,.0f}ms', Text.value))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        check(Path(path))
+    with tempfile.TemporaryDirectory() as path:
+        benchmark(Path(path))
+
+
+if __name__ == '__main__':
+    main()
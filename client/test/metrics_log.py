@@ -0,0 +1,105 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from labml import logger
+from labml.internal.metrics.log_file import MetricsLogReader, MetricsLogWriter, convert_jsonl
+from labml.internal.tracker.indicators.numeric import Scalar, Histogram
+from labml.internal.tracker.writers import file
+from labml.logger import Text
+
+N_STEPS = 2_000
+N_FLUSHES = 20
+HISTOGRAM_SIZE = 1_000
+
+
+def check_file_writer(path: Path):
+    writer = file.Writer(path)
+    loss = Scalar('loss', is_print=False)
+    grad = Histogram('grad', is_print=False)
+
+    for step in range(100):
+        loss.collect_value(step * 0.5)
+        loss.collect_value(step * 0.5 + 1)
+        grad.collect_value(np.arange(step % 5 + 1, dtype=np.float64))
+        writer.write(global_step=step, indicators={'loss': loss, 'grad': grad})
+        loss.clear()
+        grad.clear()
+        if step % 30 == 0:
+            writer.flush()
+    writer.finish()
+    writer.thread.join()
+
+    with MetricsLogReader(path) as reader:
+        assert sorted(reader.keys()) == ['grad.mean', 'loss']
+        loss = reader.get('loss')
+        assert np.array_equal(loss.step, np.arange(100))
+        assert np.allclose(loss.mean(), np.arange(100) * 0.5 + 0.5)
+        grad = reader.get('grad.mean')
+        assert np.array_equal(grad[7], np.arange(3))
+
+    # a partially written block is ignored
+    with open(str(path), 'ab') as f:
+        f.write(b'\x04\x00\x00\x00\xff\xff')
+    with MetricsLogReader(path) as reader:
+        assert len(reader.get('loss')) == 100
+
+
+def write_jsonl(path: Path):
+    rng = np.random.default_rng(0)
+    steps_per_flush = N_STEPS // N_FLUSHES
+    with open(str(path), 'w') as f:
+        for i in range(N_FLUSHES):
+            steps = range(i * steps_per_flush, (i + 1) * steps_per_flush)
+            track = {
+                'loss': [(s, [float(rng.random())]) for s in steps],
+                'grad.mean': [(s, rng.random(HISTOGRAM_SIZE).tolist()) for s in steps],
+            }
+            f.write(json.dumps({'track': track, 'time': time.time()}) + '\n')
+
+
+def read_jsonl(path: Path, name: str):
+    step, values = [], []
+    with open(str(path)) as f:
+        for line in f:
+            for s, v in json.loads(line)['track'].get(name, []):
+                step.append(s)
+                values.append(v)
+
+    return np.array(step), values
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        path = Path(path)
+        check_file_writer(path / 'writer.bin')
+
+        write_jsonl(path / 'log.jsonl')
+        start = time.time()
+        convert_jsonl(path / 'log.jsonl', path / 'metrics.bin')
+        logger.log('convert: ', (f'{time.time() - start:,.2f}s', Text.value))
+
+        start = time.time()
+        step, values = read_jsonl(path / 'log.jsonl', 'grad.mean')
+        json_time = time.time() - start
+
+        start = time.time()
+        with MetricsLogReader(path / 'metrics.bin') as reader:
+            grad = reader.get('grad.mean')
+            mean = grad.mean()
+        binary_time = time.time() - start
+
+        assert np.array_equal(grad.step, step)
+        assert np.allclose(mean, [np.mean(v) for v in values], rtol=1e-5)
+
+        logger.log('jsonl:  ', (f'{(path / "log.jsonl").stat().st_size / 1e6:,.1f}MB', Text.value),
+                   ' read ', (f'{json_time * 1000:,.0f}ms', Text.value))
+        logger.log('binary: ', (f'{(path / "metrics.bin").stat().st_size / 1e6:,.1f}MB', Text.value),
+                   ' read ', (f'{binary_time * 1000:,.0f}ms', Text.value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import subprocess
+import sys
+import time
+
+from labml import logger
+from labml.internal.computer.monitor.process import ProcessMonitor
+from labml.logger import Text
+
+N_PROCESSES = 1_000
+N_TICKS = 10
+
+BUSY = 'import time\nwhile True: time.sleep(0) or sum(range(10_000))'
+
+
+def _tracked(monitor: ProcessMonitor, pid: int):
+    key = monitor.pids[pid]
+    assert monitor.processes[key].is_tracked
+
+    return key
+
+
+def check(busy: subprocess.Popen):
+    monitors = [ProcessMonitor(None, use_proc=False), ProcessMonitor(None, use_proc=True)]
+    data = [{}, {}]
+    for _ in range(3):
+        for m, d in zip(monitors, data):
+            d.update(m.track())
+        time.sleep(0.5)
+
+    psutil_data, proc_data = [{k[k.index('.', len('process.')) + 1:]: v for k, v in d.items()
+                               if k.startswith(f'process.{_tracked(m, busy.pid)}.')}
+                              for m, d in zip(monitors, data)]
+    assert psutil_data.keys() == proc_data.keys(), (psutil_data.keys(), proc_data.keys())
+    for k in ['name', 'pid', 'ppid', 'exe', 'cmdline', 'threads']:
+        assert psutil_data[k] == proc_data[k], (k, psutil_data[k], proc_data[k])
+    for k in ['create_time', 'user', 'system']:
+        assert abs(psutil_data[k] - proc_data[k]) < 1., (k, psutil_data[k], proc_data[k])
+    for k in ['rss', 'vms']:
+        assert abs(psutil_data[k] - proc_data[k]) / psutil_data[k] < 0.1, (k, psutil_data[k], proc_data[k])
+
+    # a process that exits while its stat is read is skipped
+    monitor = monitors[1]
+    with open(f'/proc/{busy.pid}/stat', 'rb') as f:
+        stat = f.read()
+    n_processes = len(monitor.processes)
+    for cut in [0, 1, stat.index(b')') + 1, stat.index(b')') + 30]:
+        try:
+            monitor.track_proc_stat(4_000_000, stat[:cut], time.monotonic())
+            assert False, cut
+        except ValueError:
+            pass
+    assert len(monitor.processes) == n_processes
+
+    # processes that exit are marked dead
+    busy.kill()
+    busy.wait()
+    for m in monitors:
+        key = m.pids[busy.pid]
+        assert m.track()[f'process.{key}.dead']
+        assert not m.processes[key].is_tracked
+
+
+def benchmark(use_proc: bool):
+    monitor = ProcessMonitor(None, use_proc=use_proc)
+    monitor.track()
+    start = time.time()
+    for _ in range(N_TICKS):
+        monitor.track()
+    t = (time.time() - start) / N_TICKS
+
+    logger.log('/proc ' if use_proc else 'psutil', ': ', (f'{1 / t:,.1f}', Text.value), ' ticks/s',
+               ' ', (f'{t * 1e3:,.1f}ms', Text.subtle), ' per tick',
+               ' ', (f'{len(monitor.processes):,}', Text.subtle), ' processes')
+
+
+def main():
+    busy = subprocess.Popen([sys.executable, '-c', BUSY])
+    check(busy)
+
+    sleeping = [subprocess.Popen(['sleep', '600']) for _ in range(N_PROCESSES)]
+    try:
+        benchmark(False)
+        benchmark(True)
+    finally:
+        for p in sleeping:
+            p.kill()
+        for p in sleeping:
+            p.wait()
+
+
+if __name__ == '__main__':
+    main()
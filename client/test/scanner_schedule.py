@@ -0,0 +1,108 @@
+import time
+from collections import Counter
+
+from labml import logger
+from labml.internal.computer.monitor.scanner import Scanner
+from labml.internal.computer.monitor.schedule import Probe, Schedule
+from labml.logger import Text
+
+N_SECONDS = 300
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.
+
+    def __call__(self):
+        return self.t
+
+
+def check():
+    clock = Clock()
+    runs = Counter()
+    costs = {'cpu': 0., 'processes': 0., 'slow': 0.}
+
+    def probe(name: str):
+        def func():
+            runs[name] += 1
+            # the cost is measured with ``perf_counter``, so spend it for real
+            end = time.perf_counter() + costs[name]
+            while time.perf_counter() < end:
+                pass
+
+        return func
+
+    schedule = Schedule([Probe('cpu', probe('cpu'), interval=1., budget=0.1),
+                         Probe('processes', probe('processes'), interval=30., budget=1.),
+                         Probe('slow', probe('slow'), interval=1., budget=0.001)],
+                        clock=clock)
+
+    # every probe runs on the first tick
+    assert schedule.run() == ['cpu', 'processes', 'slow']
+
+    costs['slow'] = 0.004
+
+    while clock.t < N_SECONDS:
+        clock.t += schedule.wait_time()
+        schedule.run()
+
+    assert runs['cpu'] == N_SECONDS + 1, runs
+    assert runs['processes'] == N_SECONDS // 30 + 1, runs
+    # a probe over its budget is stretched by the ratio of its cost to the budget
+    assert N_SECONDS / 10 < runs['slow'] < N_SECONDS / 2, runs
+
+    schedule.set_intervals({'cpu': 5})
+    assert schedule.probes[0].interval == 5.
+    try:
+        schedule.set_intervals({'gpus': 1})
+        assert False
+    except ValueError:
+        pass
+
+    # exceptions are printed, unless the probe is required
+    def fail():
+        raise RuntimeError('failed')
+
+    Schedule([Probe('failing', fail, interval=1., budget=1.)], clock=clock).run()
+    try:
+        Schedule([Probe('failing', fail, interval=1., budget=1., is_required=True)], clock=clock).run()
+        assert False
+    except RuntimeError:
+        pass
+
+
+def benchmark():
+    scanner = Scanner()
+    scanner.configs()
+    scanner.first()
+
+    start = time.time()
+    data = scanner.track()
+    logger.log('first tick: ', (f'{(time.time() - start) * 1e3:,.1f}ms', Text.value),
+               ' ', (f'{len(data):,}', Text.subtle), ' indicators')
+
+    probes = {p.name: p for p in scanner.schedule.probes}
+    for p in probes.values():
+        p.next_time = 0.
+    start = time.time()
+    for p in probes.values():
+        p.run(0.)
+    logger.log('all probes: ', (f'{(time.time() - start) * 1e3:,.1f}ms', Text.value))
+
+    # a tick where only the 1 second probes are due
+    for p in probes.values():
+        p.next_time = scanner.schedule.clock() + (0. if p.interval <= 1. else p.interval)
+    start = time.time()
+    data = scanner.track()
+    logger.log('1s probes: ', (f'{(time.time() - start) * 1e3:,.1f}ms', Text.value),
+               ' ', (f'{len(data):,}', Text.subtle), ' indicators')
+    assert not any(k.startswith('process.') or k.startswith('disk.') for k in data)
+
+    for p in probes.values():
+        logger.log(f'{p.name:<10}', (f'{p.cost * 1e3:,.2f}ms', Text.value),
+                   ' every ', (f'{p.effective_interval:,.0f}s', Text.subtle))
+
+
+if __name__ == '__main__':
+    check()
+    benchmark()
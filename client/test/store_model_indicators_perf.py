@@ -0,0 +1,143 @@
+import time
+
+import numpy as np
+import torch
+
+from labml import tracker, logger
+from labml.internal.tracker import tracker_singleton
+from labml.internal.tracker.writers import Writer
+from labml.logger import Text
+from labml.utils.pytorch import store_l1_l2, store_model_indicators, store_optimizer_indicators
+
+N_LAYERS = 200
+REPEAT = 20
+
+
+class MeanWriter(Writer):
+    """Keeps the means of the indicators, like the screen and app writers"""
+
+    def __init__(self):
+        self.values = {}
+
+    def write(self, *, global_step, indicators):
+        for k, ind in indicators.items():
+            if not ind.is_empty():
+                self.values[k] = ind.get_mean()
+
+
+def store_model_indicators_loop(model: torch.nn.Module, *, model_name: str = "model"):
+    for name, param in model.named_parameters():
+        if param.requires_grad:
+            with torch.no_grad():
+                store_l1_l2(f"param.{model_name}.{name}", param)
+                if param.grad is not None:
+                    store_l1_l2(f"grad.{model_name}.{name}", param.grad)
+
+
+def store_optimizer_indicators_loop(optimizer: torch.optim.Optimizer, model: torch.nn.Module):
+    names = {p: f'model.{name}' for name, p in model.named_parameters()}
+    for group in optimizer.param_groups:
+        for p in group['params']:
+            for k, v in optimizer.state[p].items():
+                if isinstance(v, torch.Tensor):
+                    store_l1_l2(f'optim.optimizer.{names[p]}.{k}', v)
+
+
+def create_model(d_model: int):
+    model = torch.nn.Sequential(*[torch.nn.Linear(d_model, d_model) for _ in range(N_LAYERS)])
+    model(torch.randn(4, d_model)).sum().backward()
+
+    return model
+
+
+def check(expected, values):
+    assert expected.keys() == values.keys()
+    for k, v in expected.items():
+        assert np.isclose(values[k], v, rtol=1e-4, atol=1e-6), (k, v, values[k])
+
+
+def measure(store, model: torch.nn.Module, writer: MeanWriter):
+    store(model)
+    tracker.save()
+
+    start = time.time()
+    for _ in range(REPEAT):
+        store(model)
+        tracker.add_global_step()
+        tracker.save()
+
+    return (time.time() - start) / REPEAT
+
+
+class StepsWriter(Writer):
+    """Keeps the global steps at which optimizer indicators were written"""
+
+    def __init__(self):
+        self.steps = []
+
+    def write(self, *, global_step, indicators):
+        if any(k.startswith('optim.') and not ind.is_empty() for k, ind in indicators.items()):
+            self.steps.append(global_step)
+
+
+def check_every():
+    tracker_singleton().reset_writers()
+    writer = StepsWriter()
+    tracker_singleton().add_writer(writer)
+
+    model = create_model(4)
+    optimizer = torch.optim.Adam(model.parameters())
+    optimizer.step()
+
+    # the global step goes up by the batch size
+    tracker.set_global_step(0)
+    for _ in range(40):
+        store_optimizer_indicators(optimizer, models={'model': model}, every=100)
+        # a second call on the same step doesn't track again
+        store_optimizer_indicators(optimizer, models={'model': model}, every=100)
+        tracker.add_global_step(32)
+        tracker.save()
+
+    assert writer.steps == [32, 160, 288, 416, 544, 672, 800, 928, 1056, 1184], writer.steps
+
+
+def main():
+    tracker_singleton().reset_writers()
+    writer = MeanWriter()
+    tracker_singleton().add_writer(writer)
+    tracker.set_global_step(0)
+
+    for d_model in [16, 256]:
+        model = create_model(d_model)
+        writer.values = {}
+
+        t = measure(store_model_indicators_loop, model, writer)
+        expected = writer.values
+        writer.values = {}
+        logger.log(f'd_model={d_model:<4} loop:    ', (f'{t * 1000:,.1f}ms', Text.value))
+
+        t = measure(store_model_indicators, model, writer)
+        logger.log(f'd_model={d_model:<4} batched: ', (f'{t * 1000:,.1f}ms', Text.value))
+
+        check(expected, writer.values)
+
+        optimizer = torch.optim.Adam(model.parameters())
+        optimizer.step()
+        writer.values = {}
+
+        t = measure(lambda m: store_optimizer_indicators_loop(optimizer, m), model, writer)
+        expected = writer.values
+        writer.values = {}
+        logger.log(f'd_model={d_model:<4} optimizer loop:    ', (f'{t * 1000:,.1f}ms', Text.value))
+
+        t = measure(lambda m: store_optimizer_indicators(optimizer, models={'model': m}), model, writer)
+        logger.log(f'd_model={d_model:<4} optimizer batched: ', (f'{t * 1000:,.1f}ms', Text.value))
+        check(expected, writer.values)
+
+        t = measure(lambda m: store_optimizer_indicators(optimizer, models={'model': m}, every=10), model, writer)
+        logger.log(f'd_model={d_model:<4} optimizer every 10: ', (f'{t * 1000:,.1f}ms', Text.value))
+
+
+if __name__ == '__main__':
+    check_every()
+    main()
@@ -0,0 +1,74 @@
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from labml import tracker, logger
+from labml.internal.tracker import tracker_singleton
+from labml.internal.tracker.writers import Writer, file
+from labml.logger import Text
+
+N_INDICATORS = 1_000
+N_STEPS = 100
+N_ADDS = 10
+
+
+class MeanWriter(Writer):
+    """Keeps the means of the indicators, like the app writer"""
+
+    def __init__(self):
+        self.values = {}
+
+    def write(self, *, global_step, indicators):
+        for k, ind in indicators.items():
+            if not ind.is_empty():
+                self.values[(global_step, k)] = ind.get_mean()
+
+
+def run(is_background: bool, log_path: Path):
+    tracker_singleton().indicators = {}
+    tracker_singleton().reset_writers()
+    writer = MeanWriter()
+    tracker_singleton().add_writer(writer)
+    file_writer = file.Writer(log_path)
+    tracker_singleton().add_writer(file_writer)
+    tracker.set_background_write(is_background)
+
+    values = np.random.default_rng(0).random((N_STEPS, N_ADDS, N_INDICATORS))
+    names = [f'loss.{i}' for i in range(N_INDICATORS)]
+
+    save_time = 0.
+    for step in range(N_STEPS):
+        tracker.set_global_step(step)
+        for v in values[step]:
+            tracker.add(dict(zip(names, v.tolist())))
+
+        start = time.time()
+        tracker.save()
+        save_time += time.time() - start
+
+    start = time.time()
+    tracker_singleton().join_writers()
+    join_time = time.time() - start
+    tracker_singleton().finish_loop()
+    file_writer.thread.join()
+    tracker.set_background_write(False)
+
+    return save_time / N_STEPS, join_time, writer.values
+
+
+def main():
+    with tempfile.TemporaryDirectory() as path:
+        save_time, _, expected = run(False, Path(path) / 'sync.jsonl')
+        logger.log('sync:       ', (f'{save_time * 1000:,.2f}ms', Text.value), ' per save')
+
+        save_time, join_time, values = run(True, Path(path) / 'background.jsonl')
+        logger.log('background: ', (f'{save_time * 1000:,.2f}ms', Text.value), ' per save',
+                   ' waited ', (f'{join_time * 1000:,.0f}ms', Text.value), ' for the writers at the end')
+
+    assert values == expected
+
+
+if __name__ == '__main__':
+    main()
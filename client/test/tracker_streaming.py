@@ -0,0 +1,74 @@
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+
+from labml import logger
+from labml.internal.tracker.indicators.numeric import Scalar, Histogram, STREAMING_BUFFER_SIZE
+from labml.logger import Text
+
+N = 1_000_000
+
+
+def check_scalar():
+    values = np.random.random(10_000)
+    scalar = Scalar('loss', is_print=False)
+    streaming = Scalar('loss', is_print=False, options={'streaming': True})
+    for v in values:
+        scalar.collect_value(float(v))
+        streaming.collect_value(float(v))
+    streaming.collect_value(torch.tensor([1., 2.]))
+    scalar.collect_value(torch.tensor([1., 2.]))
+
+    assert len(streaming._values) < STREAMING_BUFFER_SIZE
+    assert np.isclose(streaming.get_mean(), scalar.get_mean())
+    stats = streaming.get_stats()
+    assert stats['count'] == len(values) + 2
+    assert np.isclose(stats['std'], np.std(np.append(values, [1., 2.])))
+    assert stats['max'] == 2.
+
+    streaming.clear()
+    assert streaming.is_empty()
+
+
+def check_histogram():
+    values = np.arange(100_000, dtype=np.float64)
+    histogram = Histogram('grad', is_print=False, options={'reservoir_size': 1_000})
+    for v in values.reshape(-1, 10):
+        histogram.collect_value(v)
+
+    sample = histogram.get_histogram()
+    assert len(sample) == 1_000
+    assert len(np.unique(sample)) == 1_000
+    assert np.isclose(histogram.get_mean(), np.mean(values))
+    # the sample is uniform over all the values
+    assert abs(np.mean(sample) - np.mean(values)) < 0.1 * np.mean(values)
+
+
+def measure(options):
+    scalar = Scalar('loss', is_print=False, options=options)
+    tracemalloc.start()
+    start = time.time()
+    for i in range(N):
+        scalar.collect_value(i * 0.5)
+    mean = scalar.get_mean()
+    t = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return mean, t, peak
+
+
+def main():
+    check_scalar()
+    check_histogram()
+
+    for name, options in [('list', None), ('streaming', {'streaming': True})]:
+        mean, t, peak = measure(options)
+        logger.log(f'{name:>10}: ', (f'{t / N * 1e6:,.2f}us', Text.value), ' per value ',
+                   (f'{peak / 1024:,.0f}KB', Text.value), ' peak memory', f' mean {mean:,.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import time
+
+import numpy as np
+import torch
+
+from labml import tracker, logger
+from labml.internal.tracker import tracker_singleton
+from labml.internal.tracker.indicators.numeric import Scalar, Histogram
+from labml.internal.tracker.writers import Writer
+from labml.logger import Text
+
+N = 100_000
+N_STEPS = 100
+
+
+def check_values():
+    values = [torch.rand(4) for _ in range(10)]
+    expected = torch.cat(values).numpy()
+
+    scalar = Scalar('loss', is_print=False)
+    for v in values:
+        scalar.collect_value(v)
+    scalar.collect_value(0.5)
+    assert np.isclose(scalar.get_mean(), np.mean(np.append(expected, 0.5)))
+
+    # the statistics are kept on the device, instead of the tensors
+    tensors = [torch.rand(()) for _ in range(2_000)] + [torch.rand(16), torch.rand(5_000), torch.rand(0)]
+    all_values = torch.cat([t.reshape(-1) for t in tensors]).double().numpy()
+    scalar = Scalar('loss', is_print=False)
+    for t in tensors:
+        scalar.collect_value(t)
+    assert not scalar._tensors and not scalar._values
+    stats = scalar.get_stats()
+    assert stats['count'] == len(all_values)
+    assert np.isclose(stats['mean'], np.mean(all_values))
+    assert np.isclose(stats['std'], np.std(all_values))
+    assert stats['min'] == np.min(all_values) and stats['max'] == np.max(all_values)
+    assert np.allclose(scalar.get_all_values(), [np.mean(all_values)])
+    scalar.clear()
+    assert scalar.is_empty()
+
+    histogram = Histogram('grad', is_print=False)
+    for v in values:
+        histogram.collect_value(v.reshape(2, 2))
+    assert np.allclose(histogram.get_histogram(), expected)
+
+
+class MeanWriter(Writer):
+    """Reads the means of the indicators, like the screen and app writers"""
+
+    def write(self, *, global_step, indicators):
+        for ind in indicators.values():
+            if not ind.is_empty():
+                ind.get_mean()
+
+
+def add(make_value, name: str):
+    tracker_singleton().indicators = {}
+    tracker.set_scalar('loss', is_print=False)
+    values = [make_value(i) for i in range(N_STEPS)]
+
+    start = time.time()
+    for i in range(N):
+        tracker.add('loss', values[i % N_STEPS])
+        if (i + 1) % N_STEPS == 0:
+            tracker.save()
+    t = (time.time() - start) / N
+
+    logger.log(f'{name:>16}: ', (f'{t * 1e6:,.2f}us', Text.value), ' per add')
+
+
+def main():
+    check_values()
+    # measure the indicators without printing them
+    tracker_singleton().reset_writers()
+    tracker_singleton().add_writer(MeanWriter())
+    tracker.set_global_step(0)
+
+    add(lambda i: float(i), 'float')
+    add(lambda i: torch.tensor(float(i)), 'tensor')
+    add(lambda i: torch.tensor(float(i), requires_grad=True) * 2, 'tensor with grad')
+    add(lambda i: torch.rand(16), 'tensor [16]')
+    add(lambda i: torch.tensor(float(i)).item(), 'tensor.item()')
+
+
+if __name__ == '__main__':
+    main()